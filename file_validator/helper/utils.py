@@ -233,5 +233,5 @@ def read_json(config):
         try:
             with open(config) as json_schema_file:
                 return json.load(json_schema_file)
-        except:
-            return {'invalid': True}
+        except Exception as e:
+            return {'invalid': True, 'message': (str(e),)}
@@ -26,6 +26,27 @@ class LogRecordFactory(object):
     def get_records(self):
         return self._records
 
+    def merge(self, other):
+        """
+        Append the records of another factory, eg: one filled by a worker.
+        :param other: LogRecordFactory
+        :return:
+        """
+        for name, records in other.get_records().items():
+            self._records[name].extend(records)
+
+    def take(self, name):
+        """
+        Move the records of a name into a new factory, eg: the records of one file out of a logger shared by many.
+        :param name:
+        :return: LogRecordFactory
+        """
+        taken = LogRecordFactory()
+        records = self._records.pop(name, None)
+        if records:
+            taken._records[name] = records
+        return taken
+
     def get_records_by(self, name):
         self.get_records().get(name, [])
 
@@ -44,6 +44,7 @@ class MessageMapping:
         FileNameValidation: MessageCodes.CDP_FL_001,
         FileTypeValidation: MessageCodes.CDP_FL_002,
         HeaderValidation: MessageCodes.CDP_FL_003,
+        ForeignKeyValidation: MessageCodes.CDP_FL_004,
         # Attribute validation mapping
         DataTypeAttributeValidation: MessageCodes.CDP_AT_001,
         IsStringAttributeValidation: MessageCodes.CDP_AT_002,
@@ -17,6 +17,7 @@ class Status(object):
     failed = "FAILED"
     validated = "VALIDATED"
     validating = "VALIDATING"
+    skipped = "SKIPPED"
 
 
 class ValidationRecord(Base):
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+from file_validator.reader.mapped import MappedFile
+
+DEFAULT_BLOCK_SIZE = 1 << 24
+
+# default missing value markers of pandas.read_csv; the arrow engine reads the same cells as NaN.
+NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA',
+    'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+]
+
+
+def read_header(file_path, sep=','):
+    """
+    Read the column names of a delimited file.
+    :param file_path:
+    :param sep: delimiter
+    :return: list of column names
+    """
+    with MappedFile(file_path) as f:
+        return f.header(sep)
+
+
+def string_dtype():
+    """
+    Arrow backed string dtype using NaN for missing values, so rules see the same values as with object columns.
+    :return: dtype; None when pandas has no such dtype
+    """
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except (TypeError, ImportError):
+        return None
+
+
+def select_columns(column_names, usecols):
+    """
+    Apply a `usecols` projection the way `read_csv` does: columns keep their file order.
+    :param column_names: header of the file
+    :param usecols: list of column names or callable; None selects every column
+    :return: list of column names
+    """
+    if usecols is None:
+        return column_names
+
+    if callable(usecols):
+        return [name for name in column_names if usecols(name)]
+
+    missing = set(usecols).difference(column_names)
+    if missing:
+        raise ValueError("Usecols do not match columns, columns expected but not found: {}".format(sorted(missing)))
+    return [name for name in column_names if name in set(usecols)]
+
+
+def read_csv_arrow(file_path, sep=',', chunksize=None, usecols=None, memory_map=False, newlines_in_values=False,
+                   block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Read a delimited file with the multithreaded pyarrow parser. Every column is read as string, like
+    `read_csv(dtype=object)`, but values stay in Arrow buffers instead of one Python object per cell.
+    :param file_path:
+    :param sep: delimiter
+    :param chunksize: when set, return a generator of DataFrames of `chunksize` records
+    :param usecols: list of column names or callable selecting them; other columns are not parsed
+    :param memory_map: parse from a memory map of the file
+    :param newlines_in_values: allow quoted values spanning lines; slows down multithreaded parsing
+    :param block_size: bytes parsed per block; blocks are parsed in parallel
+    :return: DataFrame or generator of DataFrames
+    """
+    from pyarrow import csv as pa_csv, string, memory_map as map_file
+
+    column_names = read_header(file_path, sep)
+    include_columns = select_columns(column_names, usecols)
+    read_options = pa_csv.ReadOptions(
+        use_threads=True, block_size=block_size, column_names=column_names, skip_rows=1)
+    parse_options = pa_csv.ParseOptions(delimiter=sep, newlines_in_values=newlines_in_values)
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=include_columns, column_types={name: string() for name in include_columns},
+        null_values=NA_VALUES, strings_can_be_null=True, quoted_strings_can_be_null=True)
+
+    source = map_file(file_path) if memory_map else file_path
+    if chunksize:
+        return _iter_chunks(pa_csv.open_csv(source, read_options, parse_options, convert_options), chunksize, source)
+
+    try:
+        return to_pandas(pa_csv.read_csv(source, read_options, parse_options, convert_options))
+    finally:
+        if memory_map:
+            source.close()
+
+
+def _iter_chunks(reader, chunksize, source):
+    """
+    Regroup the record batches of a streaming reader into DataFrames of `chunksize` records, indexed by record
+    position like the chunks of `read_csv`.
+    """
+    from pyarrow import Table
+
+    pending, pending_rows, start = [], 0, 0
+    try:
+        for batch in reader:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            while pending_rows >= chunksize:
+                table = Table.from_batches(pending)
+                yield _chunk(table.slice(0, chunksize), start)
+                start += chunksize
+                pending = table.slice(chunksize).to_batches()
+                pending_rows -= chunksize
+
+        if pending_rows:
+            yield _chunk(Table.from_batches(pending), start)
+    finally:
+        reader.close()
+        if not isinstance(source, str):
+            source.close()
+
+
+def _chunk(table, start):
+    df = to_pandas(table)
+    df.index = pd.RangeIndex(start, start + len(df))
+    return df
+
+
+def to_pandas(table):
+    """
+    Convert an Arrow table of strings to a DataFrame. Columns are wrapped without copying when pandas has an Arrow
+    backed string dtype; otherwise they become object columns with NaN for missing values.
+    :param table: pyarrow Table
+    :return: DataFrame
+    """
+    dtype = string_dtype()
+    if dtype is not None:
+        return table.to_pandas(types_mapper=lambda arrow_type: dtype)
+
+    df = table.to_pandas()
+    return df.where(df.notna(), np.nan)
@@ -0,0 +1,107 @@
+import csv
+import mmap
+import os
+import numpy as np
+
+# bytes scanned at a time when counting records
+SCAN_WINDOW = 1 << 26
+
+NEWLINE = ord('\n')
+CARRIAGE_RETURN = ord('\r')
+
+
+class MappedFile(object):
+    """
+    Read only memory map of a file. Pages are served from the OS page cache, so repeated runs and worker processes
+    reading the same file share them. Header and record count are answered by scanning the mapped bytes, without
+    decoding the records or building a DataFrame.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.buffer = None
+        self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def open(self):
+        self._file = open(self.file_path, 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # empty files can't be mapped
+            self.buffer = b''
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        if self._file:
+            self._file.close()
+        self.buffer = self._file = None
+
+    def _lines(self, position):
+        """
+        Decoded lines of the file, from the start. `position` holds the offset of the next undecoded byte.
+        """
+        while position[0] < len(self.buffer):
+            start = position[0]
+            end = self.buffer.find(b'\n', start)
+            end = len(self.buffer) if end < 0 else end + 1
+            position[0] = end
+            yield self.buffer[start:end].decode('utf-8-sig' if start == 0 else 'utf-8')
+
+    def read_header(self, sep=','):
+        """
+        Parse the header the way `read_csv` does: leading blank lines are skipped and quoted names may span lines.
+        :param sep: delimiter
+        :return: list of column names, offset of the first record
+        """
+        position = [0]
+        for row in csv.reader(self._lines(position), delimiter=sep):
+            if row:
+                return row, position[0]
+
+        raise ValueError("No columns to parse from file")
+
+    def header(self, sep=','):
+        return self.read_header(sep)[0]
+
+    def records_count(self, sep=','):
+        """
+        Count the non blank lines following the header. Equal to the number of records read by `read_csv`, unless
+        quoted values span lines.
+        :param sep: delimiter
+        :return: int
+        """
+        return self.lines_count(self.read_header(sep)[1])
+
+    def lines_count(self, start=0):
+        """
+        Count the non blank lines from `start`; a line holding only a carriage return is blank.
+        :param start: byte offset
+        :return: int
+        """
+        data = np.frombuffer(self.buffer, dtype=np.uint8)
+        size = len(data)
+        count = 0
+        line_start = start
+        for window_start in range(start, size, SCAN_WINDOW):
+            window = data[window_start:window_start + SCAN_WINDOW]
+            ends = np.flatnonzero(window == NEWLINE) + window_start
+            if not len(ends):
+                continue
+
+            starts = np.concatenate(([line_start], ends[:-1] + 1))
+            lengths = ends - starts
+            count += np.count_nonzero(lengths > 1)
+            count += np.count_nonzero(data[starts[lengths == 1]] != CARRIAGE_RETURN)
+            line_start = ends[-1] + 1
+
+        if line_start < size and not (size - line_start == 1 and data[line_start] == CARRIAGE_RETURN):
+            count += 1
+
+        return int(count)
@@ -33,3 +33,6 @@ class ReaderMessages(Messages):
 
     FILE_READER_VALIDATION_PASSED = ReaderPrefixes.FILE_READER_PREFIX + Messages.PASSED + ' for {}'
     FILE_READER_VALIDATION_FAILED = ReaderPrefixes.FILE_READER_PREFIX + Messages.FAILED + ' for {} with error: {}'
+
+    FILE_PREFLIGHT_VALIDATION_PASSED = ReaderPrefixes.FILE_READER_PREFIX + Messages.PASSED + ' pre-flight checks for {}'
+    FILE_PREFLIGHT_VALIDATION_FAILED = ReaderPrefixes.FILE_READER_PREFIX + Messages.FAILED + ' pre-flight checks for {} with failed rules: {}'
@@ -1,9 +1,13 @@
+import copy
 import traceback
-from pandas import read_csv, read_excel, read_json
+from pandas import DataFrame, read_csv, read_excel, read_json
 import os.path
 from file_validator.reader.messages import ReaderMessages as Messages, ReaderPrefixes as Prefixes
-from file_validator.logger import Logger
+from file_validator.logger import Logger, LogRecordFactory
 from file_validator.helper.utils import read_json as read_json_as_dict
+from file_validator.reader.arrow import read_csv_arrow
+from file_validator.reader.mapped import MappedFile
+from file_validator.validator.validator import Validator
 
 logger = Logger()
 
@@ -14,6 +18,12 @@ XML = "xml"
 XLS = "xls"
 XLSX = "xlsx"
 
+PANDAS = "pandas"
+ARROW = "arrow"
+ENGINES = [PANDAS, ARROW]
+
+DEFAULT_BATCH_ROWS = 100000
+
 
 class FileExistsMixin:
     log_prefix = Prefixes.FILE_EXISTS_PREFIX
@@ -65,15 +75,29 @@ class FileExtensionValidatorMixin:
 
 class FileReaderMixin:
     """
-    Uses Pandas reader methods to read files.
+    Uses Pandas reader methods to read files. With the arrow engine, delimited files are parsed by pyarrow instead
+    (see `read_csv_arrow`); other file types are always read by pandas. With `memory_map`, delimited files are
+    parsed from a memory map, so the pages of a file read again and again are shared through the OS page cache.
     """
     log_prefix = Prefixes.FILE_READER_PREFIX
     func_map = None
+    engine = PANDAS
+    memory_map = False
 
     def set_func_mapping(self):
+        if self.engine not in ENGINES:
+            raise ValueError("{} is not a supported engine. Supported engines are: {}".format(self.engine, ENGINES))
+
+        if self.engine == ARROW:
+            csv_options = [read_csv_arrow, {'sep': ',', 'memory_map': self.memory_map}]
+            psv_options = [read_csv_arrow, {'sep': '|', 'memory_map': self.memory_map}]
+        else:
+            csv_options = [read_csv, {'dtype': object, 'sep': ',', 'memory_map': self.memory_map}]
+            psv_options = [read_csv, {'dtype': object, 'sep': '|', 'memory_map': self.memory_map}]
+
         self.func_map = {
-            CSV: [read_csv, {'dtype': object, 'sep': ','}],
-            PSV: [read_csv, {'dtype': object, 'sep': '|'}],
+            CSV: csv_options,
+            PSV: psv_options,
             JSON: [read_json, {}],
             XLS: [read_excel, {}],
             XLSX: [read_excel, {}],
@@ -88,10 +112,17 @@ class FileReaderMixin:
 
         try:
             if is_config and file_type == JSON:
-                raise Exception("Don't use pandas to read json config")
-
-            df = self._read_file(file_path, file_type, **kwargs)
-            result = df.to_dict() if as_dict else df
+                # configs are read as dicts, without pandas
+                config = read_json_as_dict(file_path)
+                if config.get('invalid'):
+                    has_read = False
+                    msg = Messages.FILE_READER_VALIDATION_FAILED.format(file_path, config['message'][0])
+                    result = config
+                else:
+                    result = config if as_dict else None
+            else:
+                df = self._read_file(file_path, file_type, **kwargs)
+                result = df.to_dict() if as_dict else df
         except Exception as e:
             traceback.print_exc()
 
@@ -108,6 +139,23 @@ class FileReaderMixin:
 
             return has_read, logger, result
 
+    def projection(self, schema, file_type=None):
+        """
+        `usecols` projection reading only the columns required by the schema; other columns are never parsed. Column
+        names are matched with and without surrounding spaces, like header validation does.
+        :param schema:
+        :param file_type:
+        :return: callable; None when every column has to be read
+        """
+        if (file_type or self.get_extn()) not in (CSV, PSV):
+            return None
+
+        columns = schema.required_columns()
+        if columns is None:
+            return None
+
+        return lambda column: column in columns or column.strip() in columns
+
     def _read_file(self, file_path, file_type, **kwargs):
         options = self.func_map.get(file_type or self.get_extn(), {})
         kwargs.update(options[1])
@@ -120,13 +168,36 @@ class FileReader(FileExistsMixin, FileExtensionValidatorMixin, FileReaderMixin):
     extn = None
 
     def __init__(self):
-        pass
+        self._metadata = None
 
     def get_extn(self):
         return self.extn
 
+    def metadata(self):
+        """
+        Header and record count found by the last pre-flight, if any.
+        :return: dict or None
+        """
+        return self._metadata
+
+    def preflight(self, file_path, schema, file_extn=None, **kwargs):
+        """
+        Checks run before the file is loaded. Only delimited files can be checked this way, see `FileScanMixin`.
+        :return: has passed, metadata
+        """
+        return True, None
+
     def validate_and_read(self, file_path, file_extn=None, *args, **kwargs):
+        """
+        :param file_path:
+        :param file_extn:
+        :param kwargs: `check_extn` validates the extension first; with `schema`, the pre-flight rules of the schema
+        run before the file is loaded, a failed fatal rule skips the load, and only the columns required by the
+        schema are read.
+        :return: has read, logger, result
+        """
         should_check_extn = kwargs.pop('check_extn', False)
+        schema = kwargs.pop('schema', None)
 
         if should_check_extn:
             valid_extn = self.check_extn_valid(file_path, file_extn)
@@ -139,16 +210,127 @@ class FileReader(FileExistsMixin, FileExtensionValidatorMixin, FileReaderMixin):
         if not file_exists:
             return file_exists, logger, None
 
+        if schema is not None:
+            passed, self._metadata = self.preflight(file_path, schema, file_extn)
+
+            if not passed:
+                return passed, logger, None
+
+            usecols = self.projection(schema, file_extn)
+            if usecols is not None:
+                kwargs.setdefault('usecols', usecols)
+
         return self.read(file_path, file_extn, *args, **kwargs)
 
 
-class CSVFileReader(FileReader):
+class BatchReaderMixin:
+    """
+    Streams delimited files as DataFrames of `batch_rows` records, so downstream stages (eg: ChunkedValidator) start
+    before the whole file is read. The parser keeps its buffers across batches; only one batch is materialized at a
+    time.
+    """
+    def iter_batches(self, file_path, batch_rows=DEFAULT_BATCH_ROWS, file_extn=None, **kwargs):
+        """
+        Same checks and logs as `validate_and_read`, but the result is a generator of batches. A failure while
+        streaming (eg: a malformed line) is logged against the file and ends the stream.
+        :param file_path:
+        :param batch_rows: number of records per batch; the last batch holds the remainder
+        :param file_extn:
+        :param kwargs:
+        :return: has read, logger, generator of DataFrames
+        """
+        kwargs.pop('as_dict', None)
+        has_read, log, reader = self.validate_and_read(file_path, file_extn, chunksize=batch_rows, **kwargs)
+
+        if not has_read:
+            return has_read, log, None
+
+        return has_read, log, self._stream(file_path, reader)
+
+    @staticmethod
+    def _stream(file_path, reader):
+        try:
+            for batch in reader:
+                yield batch
+        except Exception as e:
+            traceback.print_exc()
+            msg = Messages.FILE_READER_VALIDATION_FAILED.format(file_path, e)
+            logger.record(name=file_path, msg=msg, status=False)
+        finally:
+            reader.close()
+
+
+class FileScanMixin:
+    """
+    Answers header and record count questions from a memory map of a delimited file, without reading it into a
+    DataFrame.
+    """
+    def scan(self, file_path, file_extn=None):
+        """
+        :param file_path:
+        :param file_extn:
+        :return: list of column names, number of records
+        """
+        self.set_func_mapping()
+        sep = self.func_map[file_extn or self.get_extn()][1]['sep']
+
+        with MappedFile(file_path) as f:
+            header, offset = f.read_header(sep)
+            return header, f.lines_count(offset)
+
+    def preflight(self, file_path, schema, file_extn=None, **kwargs):
+        """
+        Run the pre-flight rules of the schema (eg: file name, header) against the file path and the scanned header,
+        instead of the loaded file. Rules are run on copies; the validation of the loaded file runs them again. A
+        file that can't be scanned passes; reading it reports the error.
+        :param file_path:
+        :param schema:
+        :param file_extn:
+        :param kwargs: passed on to the rules
+        :return: has passed, metadata {'header': column names, 'records_count': number of records}
+        """
+        try:
+            header, records_count = self.scan(file_path, file_extn)
+        except Exception:
+            traceback.print_exc()
+            return True, None
+
+        df = DataFrame(columns=header)
+        validator = Validator(LogRecordFactory())
+        failed_rules = []
+        for rule in schema.validations():
+            if not (rule.is_file_rule and rule.preflight):
+                continue
+
+            rule = copy.copy(rule)
+            validator._validate_single(df, rule, file_path=file_path, **kwargs)
+            if rule.fatal and rule.failed_count():
+                failed_rules.append(rule.name())
+
+        passed = not failed_rules
+        msg = Messages.FILE_PREFLIGHT_VALIDATION_PASSED.format(file_path)
+        if not passed:
+            msg = Messages.FILE_PREFLIGHT_VALIDATION_FAILED.format(file_path, failed_rules)
+
+        logger.record(name=file_path, msg=msg, status=passed)
+        return passed, {'header': header, 'records_count': records_count}
+
+
+class CSVFileReader(FileScanMixin, BatchReaderMixin, FileReader):
     extn = CSV
 
 
-class PSVFileReader(FileReader):
+class PSVFileReader(FileScanMixin, BatchReaderMixin, FileReader):
     extn = PSV
 
 
+class ArrowCSVFileReader(CSVFileReader):
+    engine = ARROW
+
+
+class ArrowPSVFileReader(PSVFileReader):
+    engine = ARROW
+
+
 class JSONFileReader(FileReader):
     extn = JSON
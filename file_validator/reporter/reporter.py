@@ -1,10 +1,63 @@
 from collections import defaultdict
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
-from file_validator.helper.utils import clean_value
+from file_validator.validator.utils import first_column
 from file_validator.messages import MessageMapping
 
+# detailed rows built and written at once by a streaming report
+DEFAULT_BATCH_SIZE = 100000
+
+# detail modes of a capped report: the first failures of each rule, or a uniform random sample of them
+FIRST = 'first'
+SAMPLE = 'sample'
+
+
+class FailureSample(object):
+    """
+    Uniform random sample of `cap` failed records of one rule, when failures come batch by batch (reservoir sampling).
+    Memory is bounded by `cap` plus one batch; records are returned in the order they failed.
+    """
+    def __init__(self, cap, rng=None):
+        self.cap = cap
+        self.rng = rng or np.random.default_rng()
+        self.seen = 0
+        self._records = None
+        self._positions = np.empty(0, dtype=np.int64)
+        # failure position held by each slot of the reservoir
+        self._slots = np.full(cap, -1, dtype=np.int64)
+
+    def add(self, failed_objects):
+        positions = np.arange(self.seen, self.seen + len(failed_objects), dtype=np.int64)
+        self.seen += len(failed_objects)
+
+        fill = positions[positions < self.cap]
+        self._slots[fill] = fill
+        rest = positions[positions >= self.cap]
+        slots = self.rng.integers(0, rest + 1)
+        accepted = slots < self.cap
+        rest, slots = rest[accepted], slots[accepted]
+        # a slot replaced several times within the batch keeps the last record, as record by record sampling does
+        slots, last = np.unique(slots[::-1], return_index=True)
+        self._slots[slots] = rest[::-1][last]
+
+        keep = np.isin(positions, self._slots)
+        if not keep.any():
+            return
+        if self._records is None:
+            self._records, self._positions = failed_objects[keep], positions[keep]
+        else:
+            kept = np.isin(self._positions, self._slots)
+            self._records = pd.concat([self._records[kept], failed_objects[keep]])
+            self._positions = np.concatenate([self._positions[kept], positions[keep]])
+
+    def records(self):
+        """
+        :return: DataFrame of the sampled records; None when nothing was added
+        """
+        return self._records
+
 
 class Base(object):
     def __init__(self, message_map=MessageMapping):
@@ -34,18 +87,15 @@ class Base(object):
 
     @staticmethod
     def logs(logs):
-        df = pd.DataFrame(columns=["Name", "Status", "Description"])
-        [
-            df.append({
+        return pd.DataFrame([
+            {
                 "Name": log_record.get_name(),
                 "Status": log_record.get_status(),
                 "Description": log_record.get_message()
-            }, ignore_index=True)
+            }
             for name, log_records in logs.get_records().items()
             for log_record in log_records
-        ]
-
-        return df
+        ], columns=["Name", "Status", "Description"])
 
     def summary(self):
         return self._summary
@@ -67,23 +117,52 @@ class Base(object):
 
 
 class Report(Base):
+    def __init__(self, message_map=MessageMapping, detail_cap=None, detail_mode=FIRST, random_state=None):
+        """
+        :param message_map:
+        :param detail_cap: maximum number of detailed rows per rule; None reports every failure. Summary counts are
+        exact either way.
+        :param detail_mode: FIRST reports the first failures of a rule, SAMPLE a uniform random sample of them
+        :param random_state: seed of the sample
+        """
+        super(Report, self).__init__(message_map)
+        self.detail_cap = detail_cap
+        self.detail_mode = detail_mode
+        self.rng = np.random.default_rng(random_state)
+
+    def detailed_failures(self, rule):
+        """
+        Failed records of a rule to report in detail, at most `detail_cap` of them. Only those are materialized.
+        :param rule:
+        :return: DataFrame
+        """
+        failed_count = rule.failed_count()
+        if self.detail_cap is None or failed_count <= self.detail_cap:
+            return rule.failed_objects()
+        if self.detail_mode == SAMPLE:
+            return rule.failed_objects(np.sort(self.rng.choice(failed_count, self.detail_cap, replace=False)))
+        return rule.failed_objects(np.arange(self.detail_cap))
+
     def prepare_summary(self, schema, **kwargs):
-        def create_row(df, row):
-            return df.append(row, ignore_index=True)
+        rows = []
 
-        def add_empty_row(df):
-            return create_row(df, {"Summary": "", "Details": ""})
+        def create_row(summary, details):
+            rows.append({"Summary": summary, "Details": details})
 
-        df = pd.DataFrame(columns=["Summary", "Details"])
-        df = create_row(df, {"Summary": "File path", "Details": kwargs.get("file_path")})
-        df = create_row(df, {"Summary": "File Type", "Details": schema.schema_type})
-        df = create_row(df, {"Summary": "Ran at", "Details": datetime.now()})
-        df = create_row(df, {"Summary": "Validated Attributes", "Details": schema.fields()})
-        df = create_row(df, {"Summary": "Total Number of Records", "Details": kwargs.get("records_count")})
+        def add_empty_row():
+            create_row("", "")
 
-        df = add_empty_row(df)
-        df = create_row(df, {"Summary": "Rule Summary", "Details": ""})
-        df = add_empty_row(df)
+        create_row("File path", kwargs.get("file_path"))
+        create_row("File Type", schema.schema_type)
+        create_row("Ran at", datetime.now())
+        create_row("Validated Attributes", schema.fields())
+        create_row("Total Number of Records", kwargs.get("records_count"))
+        if self.detail_cap is not None:
+            create_row("Detailed Failures", "{} {} per rule".format(self.detail_mode, self.detail_cap))
+
+        add_empty_row()
+        create_row("Rule Summary", "")
+        add_empty_row()
 
         summarise_rules = defaultdict(list)
 
@@ -93,18 +172,18 @@ class Report(Base):
         for rule_id, rules in summarise_rules.items():
             pass_count = 0
             fail_count = 0
+            skip_count = 0
             for rule in rules:
-                pass_count += len(rule.passed_objects())
-                fail_count += len(rule.failed_objects())
+                pass_count += rule.passed_count()
+                fail_count += rule.failed_count()
+                skip_count += rule.skipped
 
             if fail_count > 0:
-                df = create_row(df, {
-                    "Summary": str(rule_id) + ": Failures",
-                    "Details": fail_count})
-                df = create_row(df, {
-                    "Summary": str(rule_id) + ": Passes",
-                    "Details": pass_count})
-        return df
+                create_row(str(rule_id) + ": Failures", fail_count)
+                create_row(str(rule_id) + ": Passes", pass_count)
+            if skip_count > 0:
+                create_row(str(rule_id) + ": Skipped Rules", skip_count)
+        return pd.DataFrame(rows, columns=["Summary", "Details"])
 
     def detailed_columns(self):
         return [
@@ -112,10 +191,20 @@ class Report(Base):
             # "Rule Name",
         ]
 
-    def prepare_row(self, df, rule, rule_id, category, typ, sub_category, columns, failed_record=None, **kwargs):
-        unique_id = kwargs.get("file_path", 'FILE') if rule.is_file_rule else clean_value(failed_record[rule.unique_key])
-        attr_value = "N/A" if rule.is_file_rule else clean_value(failed_record[rule.attribute])
-        message = rule.fail_message(**kwargs) if rule.is_file_rule else rule.fail_message(failed_record, **kwargs)
+    def prepare_rows(self, rule, rule_id, category, typ, sub_category, columns, failed_objects=None, **kwargs):
+        """
+        Detailed report rows of a failed rule: one row for a file rule, one row per failed record otherwise. Rows are
+        built column by column, with the fail messages of the rule formatted in one batch.
+        :return: DataFrame
+        """
+        if rule.is_file_rule:
+            unique_id = kwargs.get("file_path", 'FILE')
+            attr_value = "N/A"
+            message = [rule.fail_message(**kwargs)]
+        else:
+            unique_id = first_column(failed_objects, rule.unique_key[0]).values
+            attr_value = first_column(failed_objects, rule.attribute).values
+            message = rule.fail_messages(failed_objects, **kwargs)
 
         values = {
             "Rule ID": rule_id,
@@ -130,7 +219,7 @@ class Report(Base):
             "Fail Message": message
         }
         self.length_check(columns, values)
-        return df.append(values, ignore_index=True)
+        return pd.DataFrame(values, index=pd.RangeIndex(len(message)), columns=columns)
 
     def length_check(self, c_list, v_list):
         if len(c_list) != len(v_list):
@@ -139,23 +228,27 @@ class Report(Base):
 
     def validation_result(self, schema, **kwargs):
         columns = self.detailed_columns()
-        df = pd.DataFrame(columns=columns)
+        batches = []
 
         schema_type = schema.schema_type
         for rule in schema.schema():
-            rule_id = self.message_map.get_id(rule)
-            category = rule.tags[0]
-            sub_category = rule.tags[1] if len(rule.tags) > 1 else None
-            passed = rule.failed_objects().empty
+            rule_id, category, sub_category = self.rule_info(rule)
+            passed = rule.failed_count() == 0
 
             if not passed:
-                if rule.is_file_rule:
-                    df = self.prepare_row(df, rule, rule_id, category, schema_type, sub_category, columns, None, **kwargs)
-                else:
-                    for key, failed_record in rule.failed_objects().iterrows():
-                        df = self.prepare_row(df, rule, rule_id, category, schema_type, sub_category, columns, failed_record, **kwargs)
+                failed_objects = None if rule.is_file_rule else self.detailed_failures(rule)
+                batches.append(self.prepare_rows(
+                    rule, rule_id, category, schema_type, sub_category, columns, failed_objects, **kwargs))
+
+        if not batches:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(batches, ignore_index=True)
 
-        return df
+    def rule_info(self, rule):
+        """
+        :return: rule ID, category and sub category of a rule
+        """
+        return self.message_map.get_id(rule), rule.tags[0], rule.tags[1] if len(rule.tags) > 1 else None
 
     def write_into_db(self, validation_record):
         from file_validator.models import Status
@@ -164,3 +257,105 @@ class Report(Base):
         validation_record.summary = self.summary().to_json()
         validation_record.detailed = self.detailed().to_json()
         return validation_record
+
+
+class StreamingReport(Report):
+    """
+    Report written while it is produced: failed records are turned into detailed rows and appended by a streaming
+    writer (see `StreamWriter`) batch by batch, and the summary is built from the pass and fail counters of the
+    rules. Detailed rows are not kept, so memory is bounded by the batch size rather than by the number of failures.
+    Given to `ChunkedValidator` as `stream`, failures are written chunk by chunk while the file is validated, rules
+    interleaved; otherwise `report` writes the failed records of each rule in turn. With `detail_cap` and SAMPLE, the
+    samples are written by `report`, once every failure has been seen.
+    """
+    def __init__(self, writer, message_map=MessageMapping, batch_size=DEFAULT_BATCH_SIZE, detail_cap=None,
+                 detail_mode=FIRST, random_state=None, **kwargs):
+        """
+        :param writer: StreamWriter
+        :param message_map:
+        :param batch_size: maximum number of detailed rows written at once
+        :param detail_cap: see `Report`
+        :param detail_mode: see `Report`
+        :param random_state: see `Report`
+        :param kwargs: options of the writer, eg: report_path, summary_name, detailed_name
+        """
+        super(StreamingReport, self).__init__(message_map, detail_cap, detail_mode, random_state)
+        self.writer = writer
+        self.batch_size = batch_size
+        self.options = kwargs
+        self._schema_type = None
+        self._started = False
+        # per rule: number of detailed rows written, or sample of the failures
+        self._written = {}
+        self._samples = {}
+
+    def start(self, schema, **kwargs):
+        self._schema_type = schema.schema_type
+        self._started = True
+        self._written = {}
+        self._samples = {}
+        self.writer.open(self, self.detailed_columns(), **self.options)
+
+    def add(self, rule, failed_objects=None, **kwargs):
+        """
+        Report failed records of a rule, at most `detail_cap` of them over all calls.
+        :param rule:
+        :param failed_objects: DataFrame of failed records; unused for file rules
+        :param kwargs:
+        :return:
+        """
+        if rule.is_file_rule or self.detail_cap is None:
+            return self.write_rows(rule, failed_objects, **kwargs)
+
+        if self.detail_mode == SAMPLE:
+            if rule not in self._samples:
+                self._samples[rule] = FailureSample(self.detail_cap, self.rng)
+            self._samples[rule].add(failed_objects)
+            return
+
+        written = self._written.get(rule, 0)
+        failed_objects = failed_objects.iloc[:max(0, self.detail_cap - written)]
+        self._written[rule] = written + len(failed_objects)
+        self.write_rows(rule, failed_objects, **kwargs)
+
+    def write_rows(self, rule, failed_objects=None, **kwargs):
+        """
+        Write the detailed rows of failed records of a rule, `batch_size` rows at a time.
+        """
+        rule_id, category, sub_category = self.rule_info(rule)
+        columns = self.detailed_columns()
+        if rule.is_file_rule:
+            self.writer.write_batch(self.prepare_rows(
+                rule, rule_id, category, self._schema_type, sub_category, columns, **kwargs))
+            return
+
+        for start in range(0, len(failed_objects), self.batch_size):
+            self.writer.write_batch(self.prepare_rows(
+                rule, rule_id, category, self._schema_type, sub_category, columns,
+                failed_objects.iloc[start:start + self.batch_size], **kwargs))
+
+    def report(self, schema, logs, **kwargs):
+        streamed = self._started
+        if not streamed:
+            self.start(schema, **kwargs)
+
+        try:
+            log_status = self.find_log_status(logs, **kwargs)
+            if log_status is False:
+                self._summary = self.logs(logs)
+                return log_status
+
+            for rule in schema.schema():
+                if rule.is_file_rule and rule.failed_count():
+                    self.write_rows(rule, **kwargs)
+                elif not streamed and rule.failed_count():
+                    self.write_rows(rule, self.detailed_failures(rule), **kwargs)
+            for rule, sample in self._samples.items():
+                if sample.records() is not None:
+                    self.write_rows(rule, sample.records(), **kwargs)
+            self._summary = self.prepare_summary(schema, **kwargs)
+            return log_status
+        finally:
+            self.writer.write_summary(self._summary)
+            self.writer.close()
+            self._started = False
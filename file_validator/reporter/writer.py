@@ -4,27 +4,44 @@ import os.path
 EXCEL = 'xlsx'
 CSV = 'csv'
 PDF = 'pdf'
+JSONL = 'jsonl'
+PARQUET = 'parquet'
 
 
 class ReportWriter(object):
     summary_path = None
     detailed_path = None
-    summary_json = None
-    detailed_json = None
+    _report = None
 
     def __init__(self):
-        self.allowed_types = [EXCEL, CSV, PDF]
+        self.allowed_types = [EXCEL, CSV, PDF, JSONL]
 
     def set_allowed_type(self, type):
         self.allowed_types.append(type)
 
-    def write(self, report, op_type, **kwargs):
+    def check_type(self, op_type):
         if op_type not in self.allowed_types:
             raise Exception("{} is not an allowed output format. You need to create a writer and add it in the "
                             "allowed_types. The allowed_types are: {}".format(op_type, self.allowed_types))
-        pd.set_option('display.max_colwidth', -1)
-        self.summary_json = report.summary().to_json()
-        self.detailed_json = report.detailed().to_json()
+
+    def write(self, report, op_type, **kwargs):
+        self.check_type(op_type)
+        pd.set_option('display.max_colwidth', None)
+        self._report = report
+
+    @property
+    def summary_json(self):
+        """
+        Summary of the written report as JSON, serialized on access only.
+        """
+        return None if self._report is None else self._report.summary().to_json()
+
+    @property
+    def detailed_json(self):
+        """
+        Detailed report of the written report as JSON, serialized on access only.
+        """
+        return None if self._report is None else self._report.detailed().to_json()
 
 
 class CSVReportWriter(ReportWriter):
@@ -86,3 +103,186 @@ class PDFReportWriter(ReportWriter):
             detailed_html, self.detailed_path,
             options={"--orientation": "Landscape", "--page-size": "A2", "--title": "Non Conformance Report",
                      "header-left": "Non Conformance Report", "--zoom": 1.5})
+
+
+class StreamWriter(ReportWriter):
+    """
+    Writer fed batch by batch, eg: by `StreamingReport`: `open` once, `write_batch` for every batch of detailed rows
+    as it is produced, then `write_summary` and `close`. Only the current batch is held in memory.
+    """
+    op_type = None
+
+    def write(self, report, op_type=None, **kwargs):
+        """
+        Write a report already built in memory, as a single batch.
+        """
+        self.open(report, report.detailed().columns.tolist(), op_type, **kwargs)
+        try:
+            self.write_batch(report.detailed())
+            self.write_summary(report.summary())
+        finally:
+            self.close()
+
+    def open(self, report, columns, op_type=None, **kwargs):
+        """
+        :param report: report being written
+        :param columns: columns of the detailed report
+        :param op_type: output format, defaults to the format of the writer
+        :param kwargs: report_path, summary_name, detailed_name
+        :return:
+        """
+        self.check_type(op_type or self.op_type)
+        self._report = report
+
+        report_path = kwargs.get("report_path")
+        self.summary_path = os.path.join(report_path, kwargs.get("summary_name"))
+        self.detailed_path = os.path.join(report_path, kwargs.get("detailed_name"))
+        self._open(columns)
+
+    def _open(self, columns):
+        raise NotImplementedError()
+
+    def write_batch(self, df):
+        """
+        Append detailed rows.
+        :param df: DataFrame with the detailed columns
+        :return:
+        """
+        raise NotImplementedError()
+
+    def write_summary(self, df):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+    @property
+    def detailed_json(self):
+        """
+        Detailed rows are written as they come and not kept.
+        """
+        return None
+
+
+class CSVStreamWriter(StreamWriter):
+    op_type = CSV
+    _file = None
+
+    def _open(self, columns):
+        self._file = open(self.detailed_path, 'w', newline='', encoding='utf-8')
+        pd.DataFrame(columns=columns).to_csv(self._file, index=False)
+
+    def write_batch(self, df):
+        df.to_csv(self._file, header=False, index=False)
+
+    def write_summary(self, df):
+        df.to_csv(self.summary_path, index=False, mode='w')
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class JsonLinesStreamWriter(StreamWriter):
+    """
+    One JSON object per line, for the detailed rows as well as for the summary.
+    """
+    op_type = JSONL
+    _file = None
+
+    def _open(self, columns):
+        self._file = open(self.detailed_path, 'w', encoding='utf-8')
+
+    def write_batch(self, df):
+        if len(df):
+            df.to_json(self._file, orient='records', lines=True, date_format='iso')
+
+    def write_summary(self, df):
+        with open(self.summary_path, 'w', encoding='utf-8') as summary:
+            if len(df):
+                df.to_json(summary, orient='records', lines=True, date_format='iso')
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParquetReportWriter(StreamWriter):
+    """
+    Columnar report for downstream consumers. Every column is stored as string; `Rule ID`, `Category`, `Attribute`
+    and `Fail Message` are dictionary encoded. Detailed rows are buffered per rule and flushed in row groups of one
+    rule each, whose statistics let readers skip straight to the failures of a rule, eg:
+    `pyarrow.parquet.read_table(path, filters=[('Rule ID', '=', 'CDP_AT_001')])`. At most `row_group_size` rows per
+    rule are buffered.
+    """
+    op_type = PARQUET
+    dictionary_columns = ["Rule ID", "Category", "Attribute", "Fail Message"]
+    # detailed rows of different rules never share a row group
+    rule_columns = ["Rule ID", "Attribute"]
+
+    def __init__(self, row_group_size=100000):
+        super(ParquetReportWriter, self).__init__()
+        self.set_allowed_type(PARQUET)
+        self.row_group_size = row_group_size
+        self._writer = None
+        self._pending = {}
+
+    def _open(self, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._schema = pa.schema([(column, pa.string()) for column in columns])
+        self._pending = {}
+        self._writer = pq.ParquetWriter(
+            self.detailed_path, self._schema, use_dictionary=self.dictionary_columns, write_statistics=True)
+
+    def write_batch(self, df):
+        if not len(df):
+            return
+        for rule, rows in df.groupby(self.rule_columns, sort=False, dropna=False):
+            # NaN keys (eg: rules without a rule ID) have to compare equal across batches
+            rule = tuple(None if pd.isna(value) else value for value in rule)
+            pending = self._pending.setdefault(rule, [])
+            pending.append(self._table(rows, self._schema))
+            if sum(len(table) for table in pending) >= self.row_group_size:
+                self._flush(rule)
+
+    def _flush(self, rule):
+        import pyarrow as pa
+
+        table = pa.concat_tables(self._pending.pop(rule))
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+
+    def write_summary(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(column, pa.string()) for column in df.columns])
+        pq.write_table(self._table(df, schema), self.summary_path)
+
+    def close(self):
+        if self._writer is None:
+            return
+        for rule in list(self._pending):
+            self._flush(rule)
+        self._writer.close()
+        self._writer = None
+
+    @staticmethod
+    def _table(df, schema):
+        """
+        :return: pyarrow Table of `df`, values as strings; None and NaN are stored as nulls
+        """
+        import pyarrow as pa
+
+        arrays = []
+        for column in schema.names:
+            values = df[column].astype(object)
+            try:
+                arrays.append(pa.array(values, pa.string(), from_pandas=True))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                arrays.append(pa.array(
+                    [None if pd.isna(value) is True else str(value) for value in values], pa.string()))
+        return pa.Table.from_arrays(arrays, schema=schema)
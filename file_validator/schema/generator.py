@@ -1,3 +1,11 @@
+import copy
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
 from file_validator.reader.reader import (
     JSONFileReader, CSV
 )
@@ -5,7 +13,8 @@ from file_validator.validator.rules import (
     RequiredAttributeValidation, IsNullAttributeValidation, IsDateAttributeValidation, FileNameValidation,
     FileTypeValidation, HeaderValidation, IsStringAttributeValidation, AttributeLengthValidation,
     RegexAttributeValidation, EnumAttributeValidation, DateFormatAttributeValidation, AlphaNumericAttributeValidation,
-    IsIntegerAttributeValidation, EmailValidation, PhoneValidation,
+    IsIntegerAttributeValidation, EmailValidation, PhoneValidation, UniqueAttributeValidation,
+    ForeignKeyValidation,
 )
 
 
@@ -35,13 +44,105 @@ BASE_RULES_MAPPING = {
     "check_alphanumeric": AlphaNumericAttributeValidation,
     "email": EmailValidation,
     "phone": PhoneValidation,
+    "check_unique": UniqueAttributeValidation,
+    "check_foreign_key": ForeignKeyValidation,
 }
 
 
+DEFAULT_SCHEMA_CACHE_SIZE = 32
+
+
+class SchemaCache(object):
+    """
+    Compiled schemas, keyed by the content of their config, the schema class, the schema type, the file type and the
+    options of `SchemaFactory.generate`. A changed config gets a new key, so stale schemas are never used. Schemas are
+    kept in an in-process LRU and, with `cache_dir`, pickled on disk to be shared with other processes; schemas that
+    can't be pickled (eg: lambda pre validations) stay in memory only. Shared by threads.
+    """
+    def __init__(self, maxsize=DEFAULT_SCHEMA_CACHE_SIZE, cache_dir=None):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self._schemas = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(schema_class, schema_type, config_path, file_type=CSV, **kwargs):
+        """
+        :param config_path: path of the JSON config, or the JSON config itself
+        :return: hex digest
+        """
+        if os.path.isfile(config_path):
+            with open(config_path, 'rb') as config:
+                content = config.read()
+        else:
+            content = str(config_path).encode('utf-8')
+
+        key = hashlib.sha1(content)
+        options = (schema_class.__module__, schema_class.__qualname__, schema_type, file_type, sorted(kwargs.items()))
+        key.update(repr(options).encode('utf-8'))
+        return key.hexdigest()
+
+    def get(self, key):
+        """
+        :return: cached schema, None when missing. The cached schema itself: don't validate with it, see `SchemaFactory`.
+        """
+        with self._lock:
+            if key in self._schemas:
+                self._schemas.move_to_end(key)
+                return self._schemas[key]
+
+        schema = self._load(key)
+        if schema is not None:
+            self._remember(key, schema)
+        return schema
+
+    def put(self, key, schema):
+        self._remember(key, schema)
+        self._save(key, schema)
+
+    def clear(self):
+        with self._lock:
+            self._schemas.clear()
+
+    def _remember(self, key, schema):
+        with self._lock:
+            self._schemas[key] = schema
+            self._schemas.move_to_end(key)
+            while len(self._schemas) > self.maxsize:
+                self._schemas.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.pkl')
+
+    def _load(self, key):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as cached:
+                return pickle.load(cached)
+        except Exception:
+            # missing, truncated or written by another version of the rules: rebuilt and overwritten
+            return None
+
+    def _save(self, key, schema):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as cached:
+                pickle.dump(schema, cached, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except (pickle.PicklingError, AttributeError, TypeError):
+            os.remove(tmp_path)
+
+
 class SchemaFactory:
-    def __init__(self):
+    def __init__(self, cache=None):
         self.schema_class = None
         self._schema = None
+        # SchemaCache; None builds the schema on every call
+        self.cache = cache
 
     def generate(self, *args, **kwargs):
         self._schema = self._get_schema(*args, **kwargs)
@@ -50,6 +151,20 @@ class SchemaFactory:
         return self._schema
 
     def _get_schema(self, schema_class, schema_type, config_path, file_type=CSV, **kwargs):
+        """
+        Build the schema, or copy the cached one. Rules keep their results, so every call gets its own copy.
+        """
+        if self.cache is None:
+            return self._build_schema(schema_class, schema_type, config_path, file_type, **kwargs)
+
+        key = self.cache.key(schema_class, schema_type, config_path, file_type, **kwargs)
+        schema = self.cache.get(key)
+        if schema is None:
+            schema = self._build_schema(schema_class, schema_type, config_path, file_type, **kwargs)
+            self.cache.put(key, schema)
+        return copy.deepcopy(schema)
+
+    def _build_schema(self, schema_class, schema_type, config_path, file_type=CSV, **kwargs):
         has_read, logs, config = self.read(file_type, config_path)
 
         if not has_read:
@@ -1,4 +1,5 @@
 from file_validator.schema.generator import ValidationMapping, BASE_RULES_MAPPING
+from file_validator.validator.plan import ExecutionPlan
 from file_validator.exception import (
     EmptySchemaException, SchemaMissingFieldsException, NotDeclaredFieldsException,
     NotDeclaredValidationMappingException, InvalidSchemaException, NotDeclaredUniqueFieldsException
@@ -20,6 +21,7 @@ class Base:
         self._schema = []
         self._validation_mapping = ValidationMapping()
         self._fields = []
+        self._unique_keys = []
 
     def __call__(self, *args, **kwargs):
         self.schema_type = args[0]
@@ -35,6 +37,30 @@ class Base:
     def fields(self):
         return self._fields
 
+    def unique_keys(self):
+        return self._unique_keys
+
+    def plan(self):
+        """
+        Compile the validations into an execution plan, see `ExecutionPlan.explain`.
+        """
+        return ExecutionPlan(self.validations())
+
+    def required_columns(self):
+        """
+        Columns of the file read by the validation: declared fields, columns read by the rules and unique keys.
+        Other columns can be left unread.
+        :return: set of column names; None when a rule may read any column
+        """
+        columns = set(self.fields()).union(self.unique_keys())
+        for rule in self.validations():
+            rule_columns = rule.required_columns()
+            if rule_columns is None:
+                return None
+            columns.update(rule_columns)
+
+        return columns.difference(self.config_fields)
+
     def _append_rule(self, rule):
         self._schema.append(rule)
 
@@ -75,6 +101,7 @@ class Base:
 
         self._register_base_validations()
         self.set_fields(all_fields)
+        self._unique_keys = [unique_keys] if isinstance(unique_keys, str) else unique_keys
 
         if not self.validations_mapping():
             raise NotDeclaredValidationMappingException("Base Validation Mapping needs to be declared.")
@@ -161,7 +188,7 @@ class GenericSchema(Base):
                     )
 
     def _create_validation_rule(self, validation_class, validate_key, field, unique_key, constraint, message, tags, pre_validation):
-        self._append_rule(validation_class(
+        rule = validation_class(
             validate_key=validate_key,
             attribute=field,
             unique_key=unique_key,
@@ -169,7 +196,9 @@ class GenericSchema(Base):
             message=message,
             tags=tags,
             pre_validation=pre_validation
-        ))
+        )
+        rule.compile()
+        self._append_rule(rule)
 
 
 class FeatureSchema(GenericSchema):
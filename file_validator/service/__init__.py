@@ -0,0 +1,3 @@
+from file_validator.service.job import *
+from file_validator.service.daemon import *
+from file_validator.service.batch import *
@@ -0,0 +1,214 @@
+import fnmatch
+import glob
+import json
+import os
+import time
+import traceback
+from collections import Counter
+
+import pandas as pd
+
+from file_validator.helper.utils import read_json as read_json_as_dict
+from file_validator.models import Status
+from file_validator.service.job import ValidationJob
+from file_validator.service.daemon import DEFAULT_WORKERS
+from file_validator.validator.executor import Executor, PROCESS
+
+
+def _run_batch_job(runner, job):
+    return runner.run(job)
+
+
+class SchemaMapping(object):
+    """
+    Which schema validates which file: file name patterns (fnmatch, eg: 'tbl_contact_*.csv') mapped to the options of
+    a job, ie: schema_type, config_path and optionally schema_class, file_type or report options. Patterns are tried
+    in order; the first one matching the file name wins.
+    """
+    def __init__(self, mapping, base_path=None):
+        """
+        :param mapping: dict or list of pattern and job options
+        :param base_path: directory relative config paths are resolved against
+        """
+        self.mapping = list(mapping.items()) if isinstance(mapping, dict) else list(mapping)
+        self.base_path = base_path
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        :param path: JSON object of pattern and job options; config paths are relative to the file
+        :return: SchemaMapping
+        """
+        return cls(read_json_as_dict(path), os.path.dirname(os.path.abspath(path)))
+
+    def schema_classes(self):
+        """
+        :return: schema classes named by the mapping, for the runner to allow them
+        """
+        return [job_options['schema_class'] for _, job_options in self.mapping if job_options.get('schema_class')]
+
+    def job(self, file_path, **options):
+        """
+        :param file_path:
+        :param options: job options the mapping doesn't set, eg: report_path
+        :return: ValidationJob; None when no pattern matches the file
+        """
+        name = os.path.basename(file_path)
+        for pattern, job_options in self.mapping:
+            if fnmatch.fnmatch(name, pattern):
+                job_options = dict(options, **job_options)
+                if self.base_path:
+                    job_options['config_path'] = os.path.join(self.base_path, job_options['config_path'])
+                return ValidationJob(file_path, **job_options)
+        return None
+
+
+class BatchSummary(object):
+    """
+    Aggregate of a batch: one row per file and counts per status. Rows only keep what the aggregate needs; the
+    reports of every file are on disk and, with a RecordStore, in the database.
+    """
+    columns = ['File', 'Schema', 'Status', 'Records', 'Seconds', 'Summary Report', 'Detailed Report', 'Error']
+
+    def __init__(self):
+        self.rows = []
+        self.started_at = time.time()
+        self.elapsed = None
+
+    def add(self, result):
+        """
+        :param result: JobResult
+        """
+        output_path = result.output_path or {}
+        seconds = (result.ended_at - result.started_at).total_seconds() if result.ended_at else None
+        self.rows.append([
+            result.input_path, result.name, result.status, result.records_count, seconds,
+            output_path.get('summary'), output_path.get('detailed'), result.error,
+        ])
+
+    def skip(self, file_path):
+        self.rows.append([file_path, None, Status.skipped, None, None, None, None, "No schema matches the file."])
+
+    def finish(self):
+        self.elapsed = time.time() - self.started_at
+
+    def counts(self):
+        """
+        :return: number of files per status
+        """
+        return Counter(row[2] for row in self.rows)
+
+    def records_count(self):
+        return sum(row[3] for row in self.rows if row[3] is not None)
+
+    def passed(self):
+        """
+        :return: whether every file was validated; skipped files don't count
+        """
+        return all(row[2] in (Status.validated, Status.skipped) for row in self.rows)
+
+    def to_frame(self):
+        return pd.DataFrame(self.rows, columns=self.columns)
+
+    def totals(self):
+        counts = self.counts()
+        return {
+            'files': len(self.rows),
+            'validated': counts[Status.validated],
+            'failed': counts[Status.failed],
+            'skipped': counts[Status.skipped],
+            'records': self.records_count(),
+            'seconds': self.elapsed,
+        }
+
+    def write(self, path):
+        """
+        :param path: CSV of the rows of the batch
+        """
+        self.to_frame().to_csv(path, index=False, mode='w')
+
+    def __str__(self):
+        return json.dumps(self.totals())
+
+
+class BatchValidator(object):
+    """
+    Validates many files concurrently. Files are matched to schemas by a SchemaMapping and run through the JobRunner
+    on a pool of workers: reading, validation and reporting of different files overlap, while records are persisted
+    by the calling process as results come back, in file order. With the process backend (the default), throughput
+    scales with cores instead of being bound by the latency of each file; the schemas of the batch are built before
+    the workers are forked, so workers start warm.
+    """
+    def __init__(self, runner, workers=DEFAULT_WORKERS, backend=PROCESS, store=None, window=None):
+        """
+        :param runner: JobRunner; with `name_reports_by_file` when files share a schema, so their reports don't
+        overwrite each other
+        :param workers: number of files validated in parallel
+        :param backend: thread or process
+        :param store: RecordStore; results are not persisted when None
+        :param window: number of files in flight; defaults to twice the workers
+        """
+        self.runner = runner
+        self.executor = Executor(workers, backend)
+        self.store = store
+        self.window = window or 2 * workers
+
+    def files(self, pattern):
+        """
+        :param pattern: glob of input files, eg: 'input/*.csv'; `**` matches nested directories
+        :return: sorted file paths
+        """
+        return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+    def run(self, pattern, mapping, **options):
+        """
+        :param pattern: glob of input files
+        :param mapping: SchemaMapping
+        :param options: job options the mapping doesn't set, eg: report_path
+        :return: BatchSummary
+        """
+        summary = BatchSummary()
+        jobs = []
+        for file_path in self.files(pattern):
+            job = mapping.job(file_path, **options)
+            if job is None:
+                summary.skip(file_path)
+            else:
+                jobs.append(job)
+
+        self.warm(jobs)
+        records = {}
+        results = self.executor.imap(_run_batch_job, self._start(jobs, records), self.runner, self.window)
+        for result in results:
+            record_id = records.pop(result.job_id, None)
+            if record_id is not None:
+                self.store.finish(record_id, result)
+            summary.add(result)
+
+        summary.finish()
+        return summary
+
+    def warm(self, jobs):
+        """
+        Build the schema of every distinct schema of the batch once, before workers start.
+        """
+        seen = set()
+        for job in jobs:
+            key = (job.schema_class, job.schema_type, job.config_path)
+            if key in seen:
+                continue
+            seen.add(key)
+            try:
+                self.runner.schema(job)
+            except Exception:
+                # reported by the jobs of this schema
+                traceback.print_exc()
+
+    def _start(self, jobs, records):
+        """
+        Add the record of each job as it is handed to the workers.
+        """
+        for job in jobs:
+            if self.store is not None:
+                records[job.job_id] = self.store.start(job)
+            yield job
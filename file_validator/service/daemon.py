@@ -0,0 +1,242 @@
+import glob
+import json
+import os
+import socket
+import socketserver
+import threading
+import traceback
+from concurrent.futures import Future
+
+from file_validator.models import Status
+from file_validator.service.job import ValidationJob, JobResult
+from file_validator.validator.executor import Executor, THREAD, PROCESS
+
+DEFAULT_WORKERS = 4
+# seconds between two scans of a watched directory
+DEFAULT_POLL_INTERVAL = 1.0
+
+# job files of a watched directory: <name>.json is claimed as <name>.running, then <name>.result.json is written and
+# the job file is renamed <name>.done
+JOB_SUFFIX = '.json'
+RUNNING_SUFFIX = '.running'
+DONE_SUFFIX = '.done'
+RESULT_SUFFIX = '.result.json'
+
+
+def _run_job(runner, job):
+    return runner.run(job)
+
+
+class ValidationDaemon(object):
+    """
+    Long running validation service. Jobs come in over a local socket or through a watched directory and run on a
+    pool of workers kept for the life of the daemon, with the schemas of the JobRunner kept warm across jobs. At most
+    `max_pending` jobs are accepted at a time: once they are all taken, new jobs wait for a free slot, so a burst of
+    jobs can't exhaust memory. With the process backend, workers are forked when the daemon starts and inherit the
+    runner through fork.
+    """
+    def __init__(self, runner, workers=DEFAULT_WORKERS, backend=THREAD, store=None, max_pending=None):
+        """
+        :param runner: JobRunner; with `name_reports_by_file` when files share a schema, so their reports don't
+        overwrite each other
+        :param workers: number of jobs run in parallel
+        :param backend: thread or process
+        :param store: RecordStore; results are not persisted when None
+        :param max_pending: number of jobs accepted at a time; defaults to twice the workers
+        """
+        self.runner = runner
+        self.store = store
+        self.executor = Executor(workers, backend)
+        self._slots = threading.BoundedSemaphore(max_pending or 2 * workers)
+        self._stopped = threading.Event()
+
+        self.pool = self.executor.pool(runner)
+        if self.executor.backend == PROCESS:
+            # fork the workers now, before any serving thread is started
+            for future in [self.pool.submit(os.getpid) for _ in range(workers)]:
+                future.result()
+
+    def submit(self, job):
+        """
+        Queue a job; blocks while `max_pending` jobs are pending. The record of the job is added when it is accepted
+        and completed when it ends.
+        :param job: ValidationJob
+        :return: Future of the JobResult, set once the result is persisted
+        """
+        self._slots.acquire()
+        done = Future()
+        try:
+            record_id = self.store.start(job) if self.store is not None else None
+            future = self.executor.submit(self.pool, _run_job, job, self.runner)
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda f: self._complete(job, record_id, f, done))
+        return done
+
+    def run(self, job):
+        """
+        :return: JobResult of the job, once it has run
+        """
+        return self.submit(job).result()
+
+    def _complete(self, job, record_id, future, done):
+        try:
+            try:
+                result = future.result()
+            except Exception as e:
+                # the worker itself failed, eg: a killed process
+                result = JobResult(job, Status.failed)
+                result.error = '{}: {}'.format(type(e).__name__, e)
+
+            if record_id is not None:
+                self.store.finish(record_id, result)
+            done.set_result(result)
+        except Exception as e:
+            traceback.print_exc()
+            done.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def serve(self, address):
+        """
+        Serve jobs over a local socket until `stop`. Clients send one JSON job per line (see `ValidationJob`) and get
+        one JSON result per line back, in the same order. Jobs of a connection run one at a time; connections run
+        concurrently. Clients aren't authenticated: the Unix socket is only open to the user of the daemon, and jobs
+        are confined to the schema classes and report path of the runner.
+        :param address: path of a Unix socket, or port of a TCP socket on localhost
+        """
+        if isinstance(address, int):
+            server_class, server_address = socketserver.ThreadingTCPServer, ('127.0.0.1', address)
+        else:
+            server_class, server_address = socketserver.ThreadingUnixStreamServer, address
+            if os.path.exists(address):
+                os.remove(address)
+
+        daemon = self
+
+        class JobHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    result = daemon._handle(line)
+                    self.wfile.write(json.dumps(result).encode('utf-8') + b'\n')
+                    self.wfile.flush()
+
+        class JobServer(server_class):
+            daemon_threads = True
+            allow_reuse_address = True
+            timeout = 0.2
+
+        with JobServer(server_address, JobHandler) as server:
+            if server_class is socketserver.ThreadingUnixStreamServer:
+                # jobs aren't authenticated: only the user of the daemon may connect
+                os.chmod(address, 0o600)
+            while not self._stopped.is_set():
+                server.handle_request()
+
+    def _handle(self, line):
+        try:
+            job = ValidationJob.from_dict(json.loads(line))
+        except Exception as e:
+            return {'status': Status.failed, 'error': 'Invalid job. {}: {}'.format(type(e).__name__, e)}
+        return self.run(job).to_dict()
+
+    def watch(self, directory, interval=DEFAULT_POLL_INTERVAL):
+        """
+        Run the jobs dropped in a directory until `stop`. A job file is claimed by renaming it, so that many daemons
+        may watch the same directory; its result is written next to it.
+        :param directory:
+        :param interval: seconds between two scans
+        """
+        while not self._stopped.is_set():
+            for path in sorted(glob.glob(os.path.join(directory, '*' + JOB_SUFFIX))):
+                if self._stopped.is_set():
+                    break
+                if not path.endswith(RESULT_SUFFIX):
+                    self._claim(path)
+            self._stopped.wait(interval)
+
+    def _claim(self, path):
+        base = path[:-len(JOB_SUFFIX)]
+        running = base + RUNNING_SUFFIX
+        try:
+            os.rename(path, running)
+        except OSError:
+            # claimed by another daemon
+            return
+
+        try:
+            with open(running) as f:
+                job = ValidationJob.from_dict(json.load(f))
+        except Exception as e:
+            self._write_result(base, {'status': Status.failed, 'error': 'Invalid job. {}: {}'.format(
+                type(e).__name__, e)})
+            return
+
+        try:
+            future = self.submit(job)
+        except Exception as e:
+            # eg: the record store is down
+            traceback.print_exc()
+            result = JobResult(job, Status.failed)
+            result.error = '{}: {}'.format(type(e).__name__, e)
+            self._write_result(base, result.to_dict())
+            return
+
+        future.add_done_callback(lambda f: self._write_result(base, self._result_dict(job, f)))
+
+    @staticmethod
+    def _result_dict(job, future):
+        if future.exception() is None:
+            return future.result().to_dict()
+        result = JobResult(job, Status.failed)
+        result.error = str(future.exception())
+        return result.to_dict()
+
+    @staticmethod
+    def _write_result(base, result):
+        tmp_path = base + RESULT_SUFFIX + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, base + RESULT_SUFFIX)
+        os.replace(base + RUNNING_SUFFIX, base + DONE_SUFFIX)
+
+    def stop(self):
+        """
+        Stop serving and watching; jobs already accepted still run.
+        """
+        self._stopped.set()
+
+    def close(self):
+        """
+        Stop, then wait for the jobs accepted so far and release the workers.
+        """
+        self.stop()
+        self.pool.shutdown(wait=True)
+
+
+def send_jobs(address, jobs, timeout=None):
+    """
+    Run jobs on a daemon serving `address`.
+    :param address: path of a Unix socket, or port of a TCP socket on localhost
+    :param jobs: ValidationJob or dict of each job
+    :param timeout: seconds to wait for each result
+    :return: list of result dicts, in job order
+    """
+    if isinstance(address, int):
+        client = socket.create_connection(('127.0.0.1', address), timeout=timeout)
+    else:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.settimeout(timeout)
+        client.connect(address)
+
+    with client, client.makefile('rwb') as stream:
+        for job in jobs:
+            job = job.to_dict() if isinstance(job, ValidationJob) else job
+            stream.write(json.dumps(job).encode('utf-8') + b'\n')
+        stream.flush()
+        client.shutdown(socket.SHUT_WR)
+        return [json.loads(line) for line in stream if line.strip()]
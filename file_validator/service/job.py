@@ -0,0 +1,331 @@
+import importlib
+import os
+import traceback
+import uuid
+from datetime import datetime
+
+from file_validator.logger import LogRecordFactory
+from file_validator.models import ValidationRecord, Status
+from file_validator.reader.reader import (
+    CSVFileReader, PSVFileReader, JSONFileReader, CSV, PSV, JSON, logger as reader_logger,
+)
+from file_validator.reporter.reporter import Report
+from file_validator.reporter.writer import CSVReportWriter
+from file_validator.schema.generator import SchemaFactory, SchemaCache
+from file_validator.schema.schema import GenericSchema
+from file_validator.validator.validator import Validator
+
+READERS = {
+    CSV: CSVFileReader,
+    PSV: PSVFileReader,
+    JSON: JSONFileReader,
+}
+# options of a job naming its report files; names only, reports are written in the report path of the job
+REPORT_NAMES = ('report_name', 'summary_name', 'detailed_name')
+
+
+def load_class(path):
+    """
+    :param path: class, or its dotted path, eg: 'examples.sample_1.schema.ContactsSchema'
+    :return: class
+    """
+    if not isinstance(path, str):
+        return path
+
+    module_name, _, name = path.replace(':', '.').rpartition('.')
+    return getattr(importlib.import_module(module_name), name)
+
+
+def class_path(cls):
+    """
+    :param cls: class, or its dotted path
+    :return: dotted path of the class
+    """
+    return cls if isinstance(cls, str) else '{}.{}'.format(cls.__module__, cls.__qualname__)
+
+
+class ValidationJob(object):
+    """
+    One file to validate against one schema. Jobs are plain values: they pickle and round trip through JSON, eg: to
+    be sent to a daemon.
+    """
+    def __init__(self, file_path, schema_type, config_path, file_type=CSV, schema_class=None, report_path=None,
+                 job_id=None, **options):
+        """
+        :param file_path: file to validate
+        :param schema_type: name of the schema, eg: 'KTAS-CONTACT'
+        :param config_path: JSON config of the schema
+        :param file_type: csv, psv or json
+        :param schema_class: schema class or its dotted path; defaults to GenericSchema
+        :param report_path: directory of the reports; defaults to the one of the runner
+        :param job_id: defaults to a random id
+        :param options: passed on to the validator and the report writer, eg: report_name
+        """
+        self.file_path = file_path
+        self.schema_type = schema_type
+        self.config_path = config_path
+        self.file_type = file_type
+        self.schema_class = schema_class
+        self.report_path = report_path
+        self.job_id = job_id or uuid.uuid4().hex
+        self.options = options
+
+    def __str__(self):
+        return '<ValidationJob: id={}, file={}, schema={}>'.format(self.job_id, self.file_path, self.schema_type)
+
+    __repr__ = __str__
+
+    @classmethod
+    def from_dict(cls, job):
+        return cls(**job)
+
+    def to_dict(self):
+        job = {
+            'file_path': self.file_path,
+            'schema_type': self.schema_type,
+            'config_path': self.config_path,
+            'file_type': self.file_type,
+            'report_path': self.report_path,
+            'job_id': self.job_id,
+        }
+        if self.schema_class is not None:
+            job['schema_class'] = class_path(self.schema_class)
+        job.update(self.options)
+        return job
+
+
+class JobResult(object):
+    """
+    Outcome of a job, with the fields of a ValidationRecord. Results pickle, eg: to come back from a worker process.
+    """
+    def __init__(self, job, status=Status.validating, started_at=None):
+        self.job_id = job.job_id
+        self.input_path = job.file_path
+        self.name = job.schema_type
+        self.status = status
+        self.started_at = started_at or datetime.now()
+        self.ended_at = None
+        self.records_count = None
+        self.logs = []
+        self.output_path = None
+        self.summary = None
+        self.detailed = None
+        self.error = None
+
+    def __str__(self):
+        return '<JobResult: id={}, file={}, status={}>'.format(self.job_id, self.input_path, self.status)
+
+    __repr__ = __str__
+
+    def passed(self):
+        return self.status == Status.validated
+
+    def to_dict(self):
+        result = dict(vars(self))
+        result['started_at'] = self.started_at.isoformat()
+        result['ended_at'] = self.ended_at.isoformat() if self.ended_at else None
+        return result
+
+
+class JobRunner(object):
+    """
+    Runs jobs end to end: read, validate, report. Schemas are built once and kept in a SchemaCache shared by every
+    job of the runner, so a long running process pays for imports and schema compilation once. Jobs may run
+    concurrently in threads; each one gets its own logs, schema copy and report.
+
+    Jobs may come from other processes, eg: through a daemon, so they are confined to what the runner allows: they
+    only name schema classes of the runner, and their reports stay in the report path of the runner when it has one.
+    """
+    def __init__(self, schema_cache=None, report_path=None, schema_class=GenericSchema, validator_class=Validator,
+                 report_class=Report, writer_class=CSVReportWriter, name_reports_by_file=False, schema_classes=None,
+                 **validator_options):
+        """
+        :param schema_cache: SchemaCache; defaults to an in-memory cache
+        :param report_path: directory of the reports of jobs that don't name one, and of the report paths jobs may
+        name; defaults to the directory of the file
+        :param schema_class: schema class of jobs that don't name one
+        :param validator_class:
+        :param report_class:
+        :param writer_class:
+        :param name_reports_by_file: include the file name in the names of the reports, eg: when many files of the same
+        schema are validated
+        :param schema_classes: other schema classes jobs may name, or their dotted paths
+        :param validator_options: eg: workers, fail_fast
+        """
+        self.schema_cache = schema_cache if schema_cache is not None else SchemaCache()
+        self.report_path = report_path
+        self.name_reports_by_file = name_reports_by_file
+        self.schema_class = schema_class
+        self.schema_classes = {class_path(cls): cls for cls in [schema_class] + list(schema_classes or [])}
+        self.validator_class = validator_class
+        self.report_class = report_class
+        self.writer_class = writer_class
+        self.validator_options = validator_options
+
+    def run(self, job):
+        """
+        Run a job. Errors are caught and reported in the result, so one bad job never stops the others.
+        :param job: ValidationJob
+        :return: JobResult
+        """
+        result = JobResult(job)
+        log = LogRecordFactory()
+        try:
+            self._run(job, result, log)
+        except Exception as e:
+            traceback.print_exc()
+            result.status = Status.failed
+            result.error = '{}: {}'.format(type(e).__name__, e)
+        finally:
+            result.logs = log.serialize()
+            result.ended_at = datetime.now()
+        return result
+
+    def _run(self, job, result, log):
+        options = dict(job.options, file_path=job.file_path, data_type=job.file_type)
+        report_options = self.report_options(job, options)
+        schema_class = self.load_schema_class(job)
+
+        df = self.read(job, log)
+        if df is None:
+            result.status = Status.failed
+            return
+
+        validator = self.validator_class(log, **self.validator_options)
+        schema, log = validator(df, self.schema(job, schema_class), **options)
+
+        result.records_count = len(df)
+        report = self.report_class()
+        report.report(schema=schema, logs=log, records_count=result.records_count, **options)
+
+        writer = self.writer_class()
+        writer.write(report, **report_options)
+        result.output_path = {'detailed': writer.detailed_path, 'summary': writer.summary_path}
+        result.summary = writer.summary_json
+        result.detailed = writer.detailed_json
+        result.status = Status.validated
+
+    def load_schema_class(self, job):
+        """
+        :return: schema class of a job
+        :raise ValueError: when the job names a schema class the runner doesn't allow
+        """
+        if job.schema_class is None:
+            return load_class(self.schema_class)
+
+        path = class_path(job.schema_class)
+        if path not in self.schema_classes:
+            raise ValueError("Schema class {} is not allowed.".format(path))
+        return load_class(self.schema_classes[path])
+
+    def schema(self, job, schema_class=None):
+        """
+        Schema of a job, out of the schema cache of the runner; built on first use. The records logged while reading
+        the config are dropped, so they don't pile up in a long running process.
+        :param schema_class: schema class of the job, see `load_schema_class`
+        :return: schema, a copy of its own
+        """
+        factory = SchemaFactory(self.schema_cache)
+        try:
+            factory.generate(schema_class or self.load_schema_class(job), job.schema_type, job.config_path)
+        finally:
+            reader_logger.take(job.config_path)
+        return factory.schema()
+
+    def read(self, job, log):
+        """
+        Read the file of a job. Readers log into a logger shared by the process; the records of the file are moved
+        into the logs of the job.
+        :return: DataFrame; None when the file couldn't be read
+        """
+        has_read, shared_log, df = READERS[job.file_type]().validate_and_read(job.file_path, job.file_type)
+        log.merge(shared_log.take(job.file_path))
+        return df if has_read else None
+
+    def report_options(self, job, options):
+        """
+        Where the reports of a job go. Reports are named after the schema, like those of a single run, eg: 'Summary
+        Report ACCOUNT.csv'; with `name_reports_by_file`, names include the file name too, so jobs of the same schema
+        don't overwrite each other's reports.
+        :raise ValueError: when the job names a report path outside the one of the runner, or report names that are
+        paths
+        """
+        name = job.schema_type
+        if self.name_reports_by_file:
+            name = '{} {}'.format(job.schema_type, os.path.splitext(os.path.basename(job.file_path))[0])
+
+        report_options = {
+            'report_path': self.report_dir(job),
+            'report_name': 'validation-report-{}.xlsx'.format(name.replace(' ', '-')),
+            'summary_name': 'Summary Report {}.csv'.format(name),
+            'detailed_name': 'Detailed Report {}.csv'.format(name),
+        }
+        for key, value in options.items():
+            if key == 'report_path':
+                continue
+            if key in REPORT_NAMES and (os.path.basename(value) != value or value in ('', '.', '..')):
+                raise ValueError("Report name {!r} is not a file name.".format(value))
+            report_options[key] = value
+        return report_options
+
+    def report_dir(self, job):
+        """
+        :return: report path of a job
+        :raise ValueError: when the job names a report path outside the one of the runner
+        """
+        if not job.report_path:
+            return self.report_path or os.path.dirname(os.path.abspath(job.file_path))
+        if self.report_path:
+            root = os.path.realpath(self.report_path)
+            if os.path.commonpath([root, os.path.realpath(job.report_path)]) != root:
+                raise ValueError("Report path {} is outside {}.".format(job.report_path, self.report_path))
+        return job.report_path
+
+
+class RecordStore(object):
+    """
+    Persists jobs as ValidationRecord rows, the way a single run does: the record is added with status VALIDATING
+    when the job starts and completed with its logs, reports and status once it ends. Every call uses a session of
+    its own, so records can be written from many threads.
+    """
+    def __init__(self, session_factory):
+        """
+        :param session_factory: eg: sessionmaker(bind=engine)
+        """
+        self.session_factory = session_factory
+
+    def start(self, job):
+        """
+        :param job: ValidationJob
+        :return: id of the record
+        """
+        session = self.session_factory()
+        try:
+            record = ValidationRecord(input_path=job.file_path, name=job.schema_type, status=Status.validating)
+            session.add(record)
+            session.commit()
+            return record.id
+        finally:
+            session.close()
+
+    def finish(self, record_id, result):
+        """
+        :param record_id: id returned by `start`
+        :param result: JobResult
+        """
+        session = self.session_factory()
+        try:
+            record = session.query(ValidationRecord).filter_by(id=record_id).one()
+            record.name = result.name
+            record.status = result.status
+            record.logs = result.logs
+            record.ended_at = result.ended_at
+            if result.output_path is not None:
+                record.output_path = result.output_path
+            if result.summary is not None:
+                record.summary = result.summary
+            if result.detailed is not None:
+                record.detailed = result.detailed
+            session.commit()
+        finally:
+            session.close()
@@ -1,4 +1,8 @@
+from file_validator.validator.executor import *
+from file_validator.validator.keys import *
+from file_validator.validator.plan import *
 from file_validator.validator.messages import *
 from file_validator.validator.rules import *
 from file_validator.validator.utils import *
 from file_validator.validator.validator import *
+from file_validator.validator.incremental import *
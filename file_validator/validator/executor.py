@@ -0,0 +1,96 @@
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger()
+
+THREAD = "thread"
+PROCESS = "process"
+BACKENDS = [THREAD, PROCESS]
+
+# context of the pool of a worker process, set when the worker starts (see `Executor.pool`)
+_context = None
+
+
+def _set_context(context):
+    global _context
+    _context = context
+
+
+def _run_task(task_item):
+    task, item = task_item
+    return task(_context, item)
+
+
+class Executor(object):
+    """
+    Maps a task over items with a pool of workers and returns the results in item order, whatever order the workers
+    finish in. The task is called as `task(context, item)`. The context (eg: the input DataFrame) is shared with the
+    workers without being copied: threads see it directly, processes inherit it when they are forked. Tasks run by
+    processes must be module level functions and their results must be picklable.
+    """
+    def __init__(self, workers, backend=THREAD):
+        if backend not in BACKENDS:
+            raise ValueError("{} is not a supported backend. Supported backends are: {}".format(backend, BACKENDS))
+
+        if backend == PROCESS and 'fork' not in multiprocessing.get_all_start_methods():
+            logger.info("Process backend needs fork start method; falling back to threads.")
+            backend = THREAD
+
+        self.workers = workers
+        self.backend = backend
+
+    def pool(self, context=None):
+        """
+        A new pool of the backend, eg: to keep workers warm across many maps. Process workers are forked from the
+        current process, so they inherit whatever is loaded when they start. The context is handed to each process
+        worker as it starts, through fork rather than pickling; every pool has its own, so pools may overlap.
+        :param context: shared with the tasks of the pool, see `submit`
+        :return: ProcessPoolExecutor or ThreadPoolExecutor
+        """
+        if self.backend == PROCESS:
+            return ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('fork'), initializer=_set_context,
+                initargs=(context,))
+        return ThreadPoolExecutor(self.workers)
+
+    def submit(self, pool, task, item, context=None):
+        """
+        Submit `task(context, item)` to a pool created by `pool(context)`.
+        :return: Future
+        """
+        if self.backend == PROCESS:
+            return pool.submit(_run_task, (task, item))
+        return pool.submit(task, context, item)
+
+    def map(self, task, items, context=None):
+        return list(self.imap(task, items, context))
+
+    def imap(self, task, items, context=None, window=None):
+        """
+        Lazy version of `map`. Items are consumed as workers free up and at most `window` of them are in flight, so
+        memory stays bounded when items are large (eg: chunks of a file).
+        :param task: function called as task(context, item)
+        :param items: iterable
+        :param context: shared with all workers
+        :param window: maximum number of items in flight; unbounded when None
+        :return: generator of results, in item order
+        """
+        with self.pool(context) as pool:
+            pending = deque()
+            try:
+                for item in items:
+                    pending.append(self.submit(pool, task, item, context))
+
+                    if window and len(pending) >= window:
+                        yield pending.popleft().result()
+
+                while pending:
+                    yield pending.popleft().result()
+            except GeneratorExit:
+                # the caller stopped early: items not started yet are dropped
+                for future in pending:
+                    future.cancel()
+                raise
+
@@ -0,0 +1,178 @@
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+import pandas as pd
+
+from file_validator.reader.mapped import MappedFile
+from file_validator.validator.plan import ExecutionPlan
+from file_validator.validator.validator import ChunkedValidator
+
+# bytes of records per block; blocks end on a line boundary
+DEFAULT_BLOCK_SIZE = 1 << 22
+# layout of the kept state; state of another layout is dropped
+STATE_VERSION = 1
+
+
+def schema_hash(rules, *options):
+    """
+    Hash of what the results of a run depend on besides the records: the rules, with their configuration and
+    fingerprint, and the options of the run.
+    :param rules: rules of the schema
+    :param options: repr-able values
+    :return: hex digest
+    """
+    digest = hashlib.sha1()
+    for rule in rules:
+        rule_class = type(rule)
+        digest.update(repr((
+            rule_class.__module__, rule_class.__qualname__, rule.validate_key, rule.attribute, rule.unique_key,
+            rule.constraint, rule.message, rule.tags, rule.pre_validation, rule.fingerprint(),
+        )).encode('utf-8'))
+    digest.update(repr(options).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class IncrementalValidator(ChunkedValidator):
+    """
+    Validates a delimited file by blocks of lines and keeps, between runs, the chunk state of every rule for every
+    block, along with the byte range, the number of records and the content hash of the block. The next run
+    validates new or changed blocks only, eg: the tail of an append-only feed, and merges them with the kept states
+    in file order: rules end up exactly like after a `ChunkedValidator` run over the same blocks. Blocks are reused by
+    content, so a block that moved is reused too. Kept state is dropped when the rules, the options of the run or the
+    header of the file change.
+    Blocks are parsed on their own, like chunks are; records must not span lines (eg: quoted newlines).
+    """
+    def __init__(self, logs, state_dir=None, block_size=DEFAULT_BLOCK_SIZE, sep=',', read_options=None, **kwargs):
+        """
+        :param logs:
+        :param state_dir: directory of the kept states; defaults to the temporary directory
+        :param block_size: bytes of records per block
+        :param sep: delimiter
+        :param read_options: `read_csv` options of the blocks; values are read as strings (dtype object) unless set
+        otherwise, like `FileReaderMixin` reads them
+        :param kwargs: see `ChunkedValidator`
+        """
+        super(IncrementalValidator, self).__init__(logs, **kwargs)
+        self.state_dir = state_dir or os.path.join(tempfile.gettempdir(), 'file_validator_state')
+        self.block_size = block_size
+        self.sep = sep
+        self.read_options = dict({'dtype': object}, **(read_options or {}))
+        self._validated_blocks = 0
+
+    def validated_blocks(self):
+        """
+        :return: number of blocks validated by the last run; the others were reused
+        """
+        return self._validated_blocks
+
+    def state_path(self, file_path):
+        name = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.state_dir, name + '.pkl')
+
+    def _validate(self, source, schema, **kwargs):
+        """
+        :param source: path of the file
+        """
+        plan = ExecutionPlan(schema.validations())
+        key = schema_hash(plan.rules, self.sep, sorted(self.read_options.items()), sorted(kwargs.items()))
+
+        blocks = []
+        with MappedFile(source) as mapped:
+            header, offset = mapped.read_header(self.sep)
+            header = bytes(mapped.buffer[:offset])
+            kept = self._load_state(source, key, header)
+            results = self._block_results(mapped, header, offset, kept, plan, blocks, **kwargs)
+            self._merge_chunks(results, plan, schema, **kwargs)
+
+        self._save_state(source, {'version': STATE_VERSION, 'schema': key, 'header': header, 'blocks': blocks})
+        return source, schema
+
+    def _split(self, mapped, offset, kept):
+        """
+        Split the records into blocks of about `block_size` bytes, ending on a line boundary. Where a kept block
+        starts and its bytes are unchanged, its boundary is kept, so that the last block of an appended file is
+        reused. A kept block without a final line break is never reused: its last record may have been extended.
+        :return: list of start, end and content hash of every block
+        """
+        by_start = {block['start']: block for block in kept.values()}
+        buffer = mapped.buffer
+        size = len(buffer)
+        blocks = []
+        start = offset
+        while start < size:
+            block = by_start.get(start)
+            if block is not None and block['end'] <= size and buffer[block['end'] - 1:block['end']] == b'\n':
+                digest = hashlib.sha1(buffer[start:block['end']]).hexdigest()
+                if digest == block['sha1']:
+                    blocks.append((start, block['end'], digest))
+                    start = block['end']
+                    continue
+
+            end = buffer.find(b'\n', min(start + self.block_size, size) - 1)
+            end = size if end < 0 else end + 1
+            blocks.append((start, end, hashlib.sha1(buffer[start:end]).hexdigest()))
+            start = end
+        return blocks
+
+    def _block_results(self, mapped, header, offset, kept, plan, blocks, **kwargs):
+        """
+        Results of the blocks in file order: kept states of unchanged blocks, validated states of the others. The
+        states of every block are appended to `blocks`, to be kept for the next run.
+        :return: generator of number of records and chunk state per rule, one item per block
+        """
+        split = self._split(mapped, offset, kept)
+        changed = [(start, end) for start, end, digest in split if digest not in kept]
+        self._validated_blocks = len(changed)
+        frames = (self._read_block(mapped, header, start, end) for start, end in changed)
+        validated = self._map_chunks(frames, plan, **kwargs)
+
+        rows = 0
+        try:
+            for start, end, digest in split:
+                if digest in kept:
+                    records_count, states = kept[digest]['rows'], kept[digest]['states']
+                else:
+                    records_count, states = next(validated)
+                blocks.append({'start': start, 'end': end, 'sha1': digest, 'rows': records_count, 'states': states})
+
+                yield records_count, [
+                    state if state is None else rule.shift_state(state, rows)
+                    for rule, state in zip(plan.rules, states)
+                ]
+                rows += records_count
+        finally:
+            validated.close()
+
+    def _read_block(self, mapped, header, start, end):
+        """
+        :return: DataFrame of the records of the block, numbered from 0
+        """
+        return pd.read_csv(io.BytesIO(header + mapped.buffer[start:end]), sep=self.sep, **self.read_options)
+
+    def _load_state(self, file_path, key, header):
+        """
+        :return: kept blocks by content hash; empty when there is no state or it is stale
+        """
+        try:
+            with open(self.state_path(file_path), 'rb') as f:
+                state = pickle.load(f)
+        except Exception:
+            # missing, truncated or written by another version of the rules
+            return {}
+
+        if state.get('version') != STATE_VERSION or state.get('schema') != key or state.get('header') != header:
+            return {}
+        return {block['sha1']: block for block in state['blocks']}
+
+    def _save_state(self, file_path, state):
+        os.makedirs(self.state_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.state_path(file_path))
+        except Exception:
+            os.remove(tmp_path)
+            raise
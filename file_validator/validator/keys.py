@@ -0,0 +1,415 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from pandas.util import hash_pandas_object
+
+# distinct keys held in memory by a KeyCounter before it spills to disk
+DEFAULT_MAX_KEYS = 10 * 1000 * 1000
+# spill files; each one is counted on its own once all keys are added
+DEFAULT_PARTITIONS = 64
+# pending runs are compacted once they hold more keys than this, or than the compacted keys
+COMPACT_SIZE = 1 << 20
+# records of a reference file read at a time while indexing it
+INDEX_CHUNK_SIZE = 1 << 20
+# bytes of a reference file checked to tell an append from a rewrite
+FINGERPRINT_SIZE = 1 << 16
+
+_index_lock = threading.Lock()
+
+
+def hash_keys(df, columns):
+    """
+    64 bit hash of the key of every record. Keys with a missing value are left out, like `value_counts` does.
+    :param df: DataFrame
+    :param columns: key columns; several columns make a composite key
+    :return: hashes, positions of the hashed records
+    """
+    keys = df[columns]
+    present = keys.notna().all(axis=1).values
+    positions = np.flatnonzero(present)
+    if len(positions) < len(keys):
+        keys = keys.iloc[positions]
+    # values are hashed directly; factorizing them first only pays off with few distinct values
+    return hash_pandas_object(keys, index=False, categorize=False).values, positions
+
+
+def key_values(keys, positions):
+    """
+    Keys at `positions`, as Python objects: values for a single column, tuples for composite keys.
+    :param keys: DataFrame of the key columns
+    :return: object ndarray
+    """
+    keys = keys.iloc[positions]
+    if len(keys.columns) == 1:
+        return keys.iloc[:, 0].to_numpy(dtype=object)
+
+    values = np.empty(len(keys), dtype=object)
+    values[:] = list(keys.itertuples(index=False, name=None))
+    return values
+
+
+def count_keys(df, columns):
+    """
+    Count the keys of a DataFrame, eg: one chunk of a file, in one pass over their hashes.
+    :param df: DataFrame
+    :param columns: key columns
+    :return: KeyCounts
+    """
+    hashes, positions = hash_keys(df, columns)
+    hashes, first, counts = np.unique(hashes, return_index=True, return_counts=True)
+    first = positions[first]
+    return KeyCounts(hashes, counts.astype(np.int64), first.astype(np.int64), df[columns].iloc[first], len(df))
+
+
+def aggregate(hashes, counts, first, sources):
+    """
+    Sum the counts of equal hashes. For each hash, the first position is the smallest one and the source is the
+    source of its last entry.
+    :param sources: where the key of each entry can be found; -1 for none
+    :return: hashes (sorted, unique), counts, first positions, sources
+    """
+    order = np.argsort(hashes, kind='stable')
+    hashes = hashes[order]
+    if not len(hashes):
+        return hashes, counts, first, sources
+
+    starts = np.concatenate(([0], np.flatnonzero(hashes[1:] != hashes[:-1]) + 1))
+    ends = np.concatenate((starts[1:], [len(hashes)])) - 1
+    return (hashes[starts], np.add.reduceat(counts[order], starts), np.minimum.reduceat(first[order], starts),
+            sources[order][ends])
+
+
+class KeyCounts(object):
+    """
+    Keys counted over some records, by hash: sorted unique hashes, their counts, the position of their first record
+    and their key. Keys stay in the columns they were read from until they are needed.
+    """
+    def __init__(self, hashes, counts, first, keys, rows):
+        self.hashes = hashes
+        self.counts = counts
+        self.first = first
+        # DataFrame of the key columns, one row per hash
+        self.keys = keys
+        # number of records counted, keys with missing values included
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.hashes)
+
+
+class KeyCounter(object):
+    """
+    Counts keys across the chunks of a file, to find the duplicated ones. Keys are counted by hash: the counter
+    holds a hash, a count and a position per distinct key, while the key itself is only kept once it is
+    duplicated. Chunk counts are compacted together as they pile up. Past `max_keys` distinct keys the counter spills
+    to disk: counts are written to `partitions` files by hash, and each file is counted on its own at the end.
+    Distinct keys may share a 64 bit hash; the chance is about n^2 / 2^65 for n distinct keys.
+    """
+    def __init__(self, max_keys=DEFAULT_MAX_KEYS, spill_dir=None, partitions=DEFAULT_PARTITIONS):
+        self.max_keys = max_keys
+        self.spill_dir = spill_dir
+        self.partitions = partitions
+        self.rows = 0
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._first = np.empty(0, dtype=np.int64)
+        self._pending = []
+        self._pending_size = 0
+        # hash -> key, for duplicated keys
+        self._keys = {}
+        self._spill_path = None
+
+    def spilled(self):
+        return self._spill_path is not None
+
+    def add(self, counts):
+        """
+        Add the counts of the next records of the file.
+        :param counts: KeyCounts
+        :return:
+        """
+        run = KeyCounts(counts.hashes, counts.counts, counts.first + self.rows, counts.keys, counts.rows)
+        self.rows += counts.rows
+        if self.spilled():
+            self._spill(run.hashes, run.counts, run.first, key_values(run.keys, np.arange(len(run))))
+            return
+
+        self._pending.append(run)
+        self._pending_size += len(run)
+        threshold = max(len(self._hashes), COMPACT_SIZE)
+        if self.max_keys is not None:
+            threshold = min(threshold, self.max_keys)
+        if self._pending_size > threshold:
+            self._compact()
+
+    def _compact(self):
+        if not self._pending:
+            return
+
+        runs = self._pending
+        offsets = np.cumsum([0] + [len(run) for run in runs])
+        hashes, counts, first, sources = aggregate(
+            np.concatenate([self._hashes] + [run.hashes for run in runs]),
+            np.concatenate([self._counts] + [run.counts for run in runs]),
+            np.concatenate([self._first] + [run.first for run in runs]),
+            np.concatenate([np.full(len(self._hashes), -1), np.arange(offsets[-1])]))
+
+        # keys of the hashes duplicated by the pending runs; other duplicated hashes are known already
+        duplicated = np.flatnonzero((counts > 1) & (sources >= 0))
+        for index, run in enumerate(runs):
+            selected = duplicated[(sources[duplicated] >= offsets[index]) & (sources[duplicated] < offsets[index + 1])]
+            keys = key_values(run.keys, sources[selected] - offsets[index])
+            for hash_value, key in zip(hashes[selected].tolist(), keys):
+                self._keys.setdefault(hash_value, key)
+
+        self._hashes, self._counts, self._first = hashes, counts, first
+        self._pending, self._pending_size = [], 0
+
+        if self.max_keys is not None and len(self._hashes) > self.max_keys:
+            self._start_spill()
+
+    def _start_spill(self):
+        self._spill_path = tempfile.mkdtemp(prefix='file_validator_keys_', dir=self.spill_dir)
+        self._spill(self._hashes, self._counts, self._first, np.full(len(self._hashes), None, dtype=object))
+        self._hashes = self._hashes[:0]
+        self._counts = self._counts[:0]
+        self._first = self._first[:0]
+
+    def _partition_path(self, partition):
+        return os.path.join(self._spill_path, 'partition_{}.pkl'.format(partition))
+
+    def _spill(self, hashes, counts, first, keys):
+        """
+        Append counts to the partition files; keys are None for hashes that were compacted in memory.
+        """
+        partitions = (hashes % np.uint64(self.partitions)).astype(np.int64)
+        order = np.argsort(partitions, kind='stable')
+        bounds = np.searchsorted(partitions[order], np.arange(self.partitions + 1))
+        for partition in range(self.partitions):
+            selected = order[bounds[partition]:bounds[partition + 1]]
+            if not len(selected):
+                continue
+            with open(self._partition_path(partition), 'ab') as f:
+                pickle.dump((hashes[selected], counts[selected], first[selected], keys[selected]), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _read_partition(self, partition):
+        path = self._partition_path(partition)
+        if not os.path.exists(path):
+            return None
+
+        runs = []
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    runs.append(pickle.load(f))
+                except EOFError:
+                    break
+
+        hashes, counts, first, keys = [np.concatenate(column) for column in zip(*runs)]
+        sources = np.arange(len(keys))
+        # entries compacted in memory come first in the file; they have no key
+        sources[np.equal(keys, None)] = -1
+        hashes, counts, first, sources = aggregate(hashes, counts, first, sources)
+        return hashes, counts, first, lambda index: keys[sources[index]] if sources[index] >= 0 else None
+
+    def _counted(self):
+        """
+        Generator of the compacted counts, with a function returning the key of a hash that is not a known
+        duplicate; one item per partition once spilled.
+        """
+        self._compact()
+        if not self.spilled():
+            yield self._hashes, self._counts, self._first, lambda index: None
+            return
+
+        for partition in range(self.partitions):
+            counted = self._read_partition(partition)
+            if counted is not None:
+                yield counted
+
+    def duplicates(self):
+        """
+        Every key found more than once, with its count, in the order of their first record.
+        :return: dict; key -> count
+        """
+        firsts, totals, values = [], [], []
+        for hashes, counts, first, key in self._counted():
+            duplicated = np.flatnonzero(counts > 1)
+            firsts.append(first[duplicated])
+            totals.append(counts[duplicated])
+            values.extend(self._keys[hash_value] if hash_value in self._keys else key(index)
+                          for hash_value, index in zip(hashes[duplicated].tolist(), duplicated))
+
+        if not values:
+            return {}
+        order = np.argsort(np.concatenate(firsts), kind='stable')
+        totals = np.concatenate(totals)[order].tolist()
+        return {values[index]: count for index, count in zip(order.tolist(), totals)}
+
+    def close(self):
+        """
+        Remove the spill files.
+        """
+        if self._spill_path:
+            shutil.rmtree(self._spill_path, ignore_errors=True)
+            self._spill_path = None
+
+
+class KeyIndex(object):
+    """
+    Persistent index of the keys of a column of a reference file, eg: account ids of the account feed, to look up
+    foreign keys of other files without loading the reference file. The index holds the sorted, distinct hashes of
+    the keys in a .npy file, memory mapped for lookups, plus a meta file describing the indexed file. It is reused
+    across runs while the reference file is unchanged. When records were appended, only the new records are read and
+    merged into the index; any other change rebuilds it. Quoted values spanning lines may defeat the append
+    detection.
+    """
+    def __init__(self, source, column, sep=',', index_dir=None):
+        self.source = os.path.abspath(source)
+        self.column = column
+        self.sep = sep
+        self.index_dir = index_dir or os.path.join(tempfile.gettempdir(), 'file_validator_index')
+        name = hashlib.sha1('{}|{}|{}'.format(self.source, column, sep).encode('utf-8')).hexdigest()
+        self.path = os.path.join(self.index_dir, name + '.npy')
+        self.meta_path = os.path.join(self.index_dir, name + '.json')
+        self._hashes = None
+
+    def __getstate__(self):
+        # workers map the index file themselves
+        state = dict(self.__dict__)
+        state['_hashes'] = None
+        return state
+
+    def meta(self):
+        """
+        :return: dict describing the indexed file; None when there is no index yet
+        """
+        if not (os.path.exists(self.meta_path) and os.path.exists(self.path)):
+            return None
+        with open(self.meta_path, 'r') as f:
+            return json.load(f)
+
+    def hashes(self):
+        """
+        :return: sorted ndarray of the hashes of the keys, memory mapped
+        """
+        if self._hashes is None:
+            self._hashes = np.load(self.path, mmap_mode='r')
+        return self._hashes
+
+    def contains(self, hashes):
+        """
+        :param hashes: hashes of keys, see `hash_keys`
+        :return: boolean ndarray; which keys are in the index
+        """
+        index = self.hashes()
+        if not len(index):
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.minimum(np.searchsorted(index, hashes), len(index) - 1)
+        return index[positions] == hashes
+
+    def update(self):
+        """
+        Bring the index up to date with the reference file.
+        :return: number of records read; 0 when the index was up to date
+        """
+        with _index_lock:
+            stat = os.stat(self.source)
+            meta = self.meta()
+            if meta and meta['size'] == stat.st_size and meta['mtime_ns'] == stat.st_mtime_ns:
+                return 0
+
+            if meta and self._appended(meta, stat.st_size):
+                hashes, read = self._read(meta['offset'])
+                hashes = np.union1d(self.hashes(), hashes)
+                records = meta['records'] + read
+            else:
+                hashes, read = self._read()
+                records = read
+
+            self._save(hashes, dict(
+                size=stat.st_size, mtime_ns=stat.st_mtime_ns, records=records, offset=self._last_line_end(),
+                column=self.column))
+            return read
+
+    def _fingerprint(self, offset):
+        """
+        Digest of the start of the file and of the bytes before `offset`.
+        """
+        digest = hashlib.sha1()
+        with open(self.source, 'rb') as f:
+            digest.update(f.read(min(offset, FINGERPRINT_SIZE)))
+            start = max(0, offset - FINGERPRINT_SIZE)
+            f.seek(start)
+            digest.update(f.read(offset - start))
+        return digest.hexdigest()
+
+    def _appended(self, meta, size):
+        # a last record without line break may have been extended; only complete records are kept as they are
+        return 0 < meta['offset'] == meta['size'] < size and self._fingerprint(meta['offset']) == meta['fingerprint']
+
+    def _last_line_end(self):
+        """
+        Offset following the last line break: records past it may still grow.
+        """
+        with open(self.source, 'rb') as f:
+            end = f.seek(0, os.SEEK_END)
+            while end > 0:
+                start = max(0, end - FINGERPRINT_SIZE)
+                f.seek(start)
+                position = f.read(end - start).rfind(b'\n')
+                if position >= 0:
+                    return start + position + 1
+                end = start
+        return 0
+
+    def _column_name(self, header):
+        for name in header:
+            if name == self.column or name.strip() == self.column:
+                return name
+        raise ValueError("Column {} not found in {}".format(self.column, self.source))
+
+    def _read(self, offset=0):
+        """
+        Hash the keys of the records of the reference file from `offset`; 0 reads the whole file.
+        :return: sorted distinct hashes, number of records read
+        """
+        header = list(pd.read_csv(self.source, sep=self.sep, nrows=0).columns)
+        name = self._column_name(header)
+        options = dict(sep=self.sep, usecols=[name], dtype=object, chunksize=INDEX_CHUNK_SIZE)
+        if offset:
+            options.update(header=None, names=header)
+
+        parts, records = [np.empty(0, dtype=np.uint64)], 0
+        with open(self.source, 'rb') as f:
+            f.seek(offset)
+            for chunk in pd.read_csv(f, **options):
+                parts.append(np.unique(hash_keys(chunk, [name])[0]))
+                records += len(chunk)
+
+        return np.unique(np.concatenate(parts)), records
+
+    def _save(self, hashes, meta):
+        """
+        Write the index and its meta file; each is replaced at once, so readers never see a partial file.
+        """
+        if not os.path.isdir(self.index_dir):
+            os.makedirs(self.index_dir, exist_ok=True)
+        meta['fingerprint'] = self._fingerprint(meta['offset'])
+
+        self._hashes = None
+        temp_path = self.path + '.{}.tmp.npy'.format(os.getpid())
+        np.save(temp_path, np.asarray(hashes, dtype=np.uint64))
+        os.replace(temp_path, self.path)
+
+        temp_path = self.meta_path + '.{}.tmp'.format(os.getpid())
+        with open(temp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self.meta_path)
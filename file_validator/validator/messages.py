@@ -20,6 +20,7 @@ class ValidatorPrefixes(Prefixes):
     FILE_EXTN_PREFIX = "Verify File Extension: "
     HEADER_VALIDATOR_PREFIX = "Verify field names: "
     VERIFY_DUPLICATES_PREFIX = "Verify duplicates: "
+    VERIFY_FOREIGN_KEYS_PREFIX = "Verify foreign keys: "
 
 
 class ValidatorMessages(Messages):
@@ -38,3 +39,9 @@ class ValidatorMessages(Messages):
 
     # Attribute Validation
     DUPLICATE_VALIDATION_FAILED = ValidatorPrefixes.VERIFY_DUPLICATES_PREFIX + Messages.FAILED + " for {}"
+    FOREIGN_KEY_VALIDATION_FAILED = ValidatorPrefixes.VERIFY_FOREIGN_KEYS_PREFIX + Messages.FAILED + \
+        " for {}. Keys not found in {}"
+
+    # Stop policies
+    RULE_SKIPPED = "Skipped: validation stopped early."
+    VALIDATION_STOPPED = "Validation stopped after {} records: {}"
@@ -0,0 +1,132 @@
+from collections import OrderedDict
+
+# relative cost of one pass over the records of a column
+SERIES_PASS_COST = 1
+# a pass calling Python code once per record (eg: pre validation, rules without column-at-a-time execution)
+RECORD_PASS_COST = 20
+
+
+def transform_chain(pre_validation):
+    """
+    Normalized pre validation of a rule, usable as a key.
+    :param pre_validation: action, list of actions or None
+    :return: tuple of actions
+    """
+    if not pre_validation:
+        return ()
+    if isinstance(pre_validation, str):
+        return (pre_validation,)
+    return tuple(pre_validation)
+
+
+def rule_cost(rule):
+    """
+    Estimated cost of executing a rule over a column, in passes over the records.
+    """
+    if rule.is_file_rule:
+        # pre-flight rules only read the file path and header
+        return 0 if rule.preflight else SERIES_PASS_COST
+    if rule.supports_series():
+        return SERIES_PASS_COST
+    return RECORD_PASS_COST
+
+
+class PlanStep(object):
+    """
+    Rules reading the same column through the same pre validation chain. The chain is applied once for all of them.
+    """
+    def __init__(self, attribute, chain):
+        self.attribute = attribute
+        self.chain = chain
+        self.rules = []
+
+    def transform_cost(self):
+        return len(self.chain) * RECORD_PASS_COST
+
+
+class PlanTask(object):
+    """
+    Unit of execution: every step of one column, or a single file rule. Tasks don't depend on each other and can
+    run in any order.
+    """
+    def __init__(self, attribute, is_file_rule=False):
+        self.attribute = attribute
+        self.is_file_rule = is_file_rule
+        self.steps = OrderedDict()
+
+    def step(self, chain):
+        if chain not in self.steps:
+            self.steps[chain] = PlanStep(self.attribute, chain)
+        return self.steps[chain]
+
+
+class ExecutionPlan(object):
+    """
+    Rules of a schema compiled for execution: attribute rules are grouped by column, so each column is scanned
+    once and each distinct pre validation chain is applied once, for all the rules reading it. File rules run on
+    their own. Rules are referred to by their position in the schema; results are reported in schema order.
+    """
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.tasks = []
+
+        columns = {}
+        for index, rule in enumerate(self.rules):
+            chain = transform_chain(rule.pre_validation)
+            if rule.is_file_rule:
+                task = PlanTask(rule.attribute, is_file_rule=True)
+                self.tasks.append(task)
+            else:
+                task = columns.get(rule.attribute)
+                if task is None:
+                    task = columns[rule.attribute] = PlanTask(rule.attribute)
+                    self.tasks.append(task)
+
+            task.step(chain).rules.append(index)
+
+    def steps(self):
+        return [step for task in self.tasks for step in task.steps.values()]
+
+    def cost(self):
+        """
+        :return: estimated cost in passes over the records; with the plan, without it (one pass per rule and one
+        pre validation per rule)
+        """
+        planned, unplanned = 0, 0
+        for step in self.steps():
+            planned += step.transform_cost()
+            for index in step.rules:
+                planned += rule_cost(self.rules[index])
+                unplanned += step.transform_cost() + rule_cost(self.rules[index])
+
+        return planned, unplanned
+
+    def explain(self, records_count=None):
+        """
+        Print the plan and its estimated cost.
+        :param records_count: when given, the cost is estimated for that many records
+        :return: the printed text
+        """
+        lines = ["Execution plan: {} tasks, {} rules".format(len(self.tasks), len(self.rules))]
+        for task in self.tasks:
+            if task.is_file_rule:
+                lines.append("  file rule on {}".format(task.attribute))
+            else:
+                lines.append("  column {}: 1 scan, {} pre validation chains".format(
+                    task.attribute, sum(1 for chain in task.steps if chain)))
+
+            for step in task.steps.values():
+                rules = ", ".join(
+                    "{} ({})".format(self.rules[index].__class__.__name__, rule_cost(self.rules[index]))
+                    for index in step.rules)
+                lines.append("    pre validation {} ({}): {}".format(list(step.chain), step.transform_cost(), rules))
+
+        planned, unplanned = self.cost()
+        unit = "record passes"
+        if records_count is not None:
+            planned, unplanned, unit = planned * records_count, unplanned * records_count, "record operations"
+        lines.append("Estimated cost: {} {} ({} without the plan)".format(planned, unit, unplanned))
+
+        text = "\n".join(lines)
+        print(text)
+        return text
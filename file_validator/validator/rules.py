@@ -1,10 +1,42 @@
 import re
 import os
+from collections.abc import Hashable
+import numpy as np
+import pandas as pd
 from file_validator.validator.utils import (
-    empty, is_date, required, clean_value, remove_space
+    empty, is_date, is_date_series, required, clean_value, first_column, remove_space, required_series,
+    compile_patterns, match_series, prepare_series, string_mask, factorize_values,
 )
+from file_validator.validator.keys import KeyCounter, KeyIndex, count_keys, hash_keys, DEFAULT_MAX_KEYS
 from file_validator.validator.messages import ValidatorMessages
 
+ALPHANUMERIC_REGEX = "^[A-Za-z0-9]+$"
+EMAIL_REGEX = """(?:[a-zA-Z0-9!#$%&'*+/=?^_`{|}~-]+(?:\\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*|"(?:[\x01-\x08\x0b\x0c\x0e-\x1f\x21\x23-\x5b\x5d-\x7f]|\\[\x01-\x09\x0b\x0c\x0e-\x7f])*")@(?:(?:[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?\\.)+[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?|\\[(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?|[A-Za-z0-9-]*[A-Za-z0-9]:(?:[\x01-\x08\x0b\x0c\x0e-\x1f\x21-\x5a\x53-\x7f]|\\[\x01-\x09\x0b\x0c\x0e-\x7f])+)\\])"""
+PHONE_REGEX = "^[+]*[(]{0,1}[0-9]{1,4}[)]{0,1}[-\\s\\./0-9]*$"
+# attributes of a validated rule kept by `Base.result_state`
+RESULT_STATE = ('_failed_positions', '_passed_count', '_failed_count', '_failed_info')
+
+
+def compile_rule_patterns(patterns):
+    """
+    Compile patterns of a rule while building the schema. An invalid constraint is left to fail on execution, where
+    the error is reported against the rule.
+    """
+    try:
+        return compile_patterns(patterns)
+    except (TypeError, re.error):
+        return None
+
+
+def defining_class(cls, attr):
+    """
+    Class in the MRO of `cls` that defines `attr`.
+    """
+    for klass in cls.__mro__:
+        if attr in vars(klass):
+            return klass
+    return None
+
 
 class Base(object):
     validate_key = None
@@ -12,12 +44,24 @@ class Base(object):
     unique_key = None
     constraint = None
     is_file_rule = False
+    # file rules that only need the file path and header; they can run before the file is loaded.
+    preflight = False
+    # a failure rejects the file; with pre-flight, the file is then not loaded at all.
+    fatal = False
     message = ""
     tags = []
     pre_validation = []
     _passed_objects = []
     _failed_objects = []
     _failed_info = []
+    # validated result and positions of its failed records, see `process_result`
+    _result = None
+    _failed_positions = None
+    _passed_count = 0
+    _failed_count = 0
+    _chunk_state = None
+    # not run, since validation stopped early; see `skip`
+    skipped = False
     _passed = True
     _failed = False
 
@@ -76,6 +120,27 @@ class Base(object):
         """
         raise NotImplementedError()
 
+    def compile(self):
+        """
+        Prepare whatever the rule needs ahead of execution, eg: compiled patterns. Called once when the schema is built.
+        :return:
+        """
+        pass
+
+    def required_columns(self):
+        """
+        Columns of the file read by the rule.
+        :return: list of column names; None when the rule may read any column
+        """
+        return [self.attribute]
+
+    def supports_series(self):
+        """
+        Whether the rule can be executed column-at-a-time through `_execute_series`.
+        :return: boolean
+        """
+        return False
+
     def pass_message(self, *args, **kwargs):
         """
         Passed description message. normally is not customisable.
@@ -87,12 +152,128 @@ class Base(object):
 
     def process_result(self, result_df):
         """
-        Get passed and failed records from validated result.
+        Keep the validated result compactly: positions of the failed records and the number of passed ones. Passed and
+        failed records are materialized from `result_df` only when asked for; `result_df` shares the columns of the
+        validated DataFrame rather than copying them.
         :param result_df: all executed rules in DataFrame
         :return:
         """
-        self._passed_objects = result_df[result_df[self.name()] == True]
-        self._failed_objects = result_df[result_df[self.name()] == False]
+        result = result_df[self.name()].values
+        self._result = result_df
+        self._failed_positions = np.flatnonzero(result == False)
+        self._passed_count = int((result == True).sum())
+        self._failed_count = len(self._failed_positions)
+
+    def result_state(self):
+        """
+        The validated result without the validated columns, eg: to send it back from a worker process. Records that
+        neither passed nor failed (eg: a custom rule returning None) are rare; only then are passed positions kept.
+        :return: dict; see `restore_result`
+        """
+        state = {name: value for name, value in vars(self).items() if name in RESULT_STATE}
+        if self._result is not None and not self.is_file_rule and (
+                self._passed_count + self._failed_count < len(self._result)):
+            state['_passed_positions'] = np.flatnonzero(self._result[self.name()].values == True)
+        return state
+
+    def restore_result(self, state, df):
+        """
+        Restore a `result_state`, rebuilding the result from the validated DataFrame.
+        :param state: dict
+        :param df: DataFrame the rule was validated against; unique key and attribute, corrected
+        :return:
+        """
+        state = dict(state)
+        passed_positions = state.pop('_passed_positions', None)
+        vars(self).update(state)
+        if '_failed_positions' not in state:
+            # the rule didn't run through
+            return
+
+        if self.is_file_rule:
+            self.process_result(pd.DataFrame({self.name(): [self._failed_count == 0]}, index=[self.name()]))
+            return
+
+        if passed_positions is None:
+            result = np.ones(len(df), dtype=bool)
+        else:
+            result = np.full(len(df), None, dtype=object)
+            result[passed_positions] = True
+        result[self._failed_positions] = False
+        self.process_result(pd.concat([
+            df[self.unique_key[0]], df[self.attribute], pd.Series(result, index=df.index, name=self.name()),
+        ], axis=1))
+
+    def reset_result(self):
+        """
+        Start accumulating results chunk by chunk, see `merge_result`.
+        :return:
+        """
+        self._chunk_state = None
+        self._result = None
+        self._failed_positions = None
+
+    def merge_result(self, state):
+        """
+        Fold the result of one chunk of the file, as returned by `chunk_state`, into the rule. Chunks are merged in
+        file order.
+        :param state: chunk state
+        :return:
+        """
+        self._chunk_state = state if self._chunk_state is None else self.merge_states(self._chunk_state, state)
+
+    def skip(self):
+        """
+        Mark the rule as not run: it has neither passed nor failed records.
+        :return:
+        """
+        self.reset_result()
+        self.skipped = True
+        self._passed_count = 0
+        self._failed_count = 0
+
+    def shift_state(self, state, rows):
+        """
+        Move the state of a chunk validated on its own, with records numbered from 0, to where the chunk starts in the
+        file.
+        :param state: chunk state
+        :param rows: number of records before the chunk
+        :return: chunk state
+        """
+        return state
+
+    def fingerprint(self):
+        """
+        What the result of the rule depends on besides its configuration and the records, eg: a reference file. Kept
+        results of the rule (see `IncrementalValidator`) are dropped when it changes.
+        :return: repr-able value
+        """
+        return None
+
+    def chunk_failures(self, state):
+        """
+        Number of failures known from the state of a chunk, as counted by `failed_count`. Rules that can only tell
+        once every chunk is merged (eg: duplicates) return 0.
+        :param state: chunk state
+        :return: int
+        """
+        return 0
+
+    def merge_states(self, state, other):
+        """
+        Combine the states of two consecutive chunks.
+        :param state: state of the earlier chunks
+        :param other: state of the next chunk
+        :return: combined state
+        """
+        raise NotImplementedError()
+
+    def finish_result(self):
+        """
+        Turn the merged chunk state into passed and failed objects.
+        :return:
+        """
+        raise NotImplementedError()
 
     def failed_info(self):
         """
@@ -117,11 +298,37 @@ class Base(object):
         """
         return self.message.format(args, **kwargs)
 
+    def fail_messages(self, failed_objects, **kwargs):
+        """
+        Fail messages of many failed records at once.
+        :param failed_objects: DataFrame of failed records
+        :param kwargs:
+        :return: list of strings, one per failed record
+        """
+        return [self.fail_message(record, **kwargs) for _, record in failed_objects.iterrows()]
+
     def passed_objects(self):
-        return self._passed_objects
+        if self._result is None:
+            return self._passed_objects
+        return self._result[self._result[self.name()] == True]
+
+    def failed_objects(self, positions=None):
+        """
+        Failed records, materialized on every call.
+        :param positions: positions among the failed records of the ones to return, eg: a sample; all by default
+        :return: DataFrame
+        """
+        if self._result is None:
+            failed_objects = self._failed_objects
+            return failed_objects if positions is None else failed_objects.iloc[positions]
+        failed_positions = self._failed_positions if positions is None else self._failed_positions[positions]
+        return self._result.iloc[failed_positions]
+
+    def passed_count(self):
+        return self._passed_count
 
-    def failed_objects(self):
-        return self._failed_objects
+    def failed_count(self):
+        return self._failed_count
 
 
 class FileValidation(Base):
@@ -134,13 +341,62 @@ class FileValidation(Base):
     def _execute(self, record, **kwargs):
         raise NotImplementedError()
 
+    def required_columns(self):
+        return None
+
+    def chunk_state(self, df, **kwargs):
+        """
+        Run the rule against one chunk of the file. By default the rule has to pass on every chunk; rules that need
+        the whole file (eg: duplicates) return partial state and override `merge_states` and `finish_result`.
+        :param df: chunk
+        :param kwargs:
+        :return: state of the chunk
+        """
+        return self._execute(df, **kwargs), self._failed_info
+
+    def merge_states(self, state, other):
+        # keep the failure info of the first failing chunk
+        return other if state[0] else state
+
+    def chunk_failures(self, state):
+        return 0 if state[0] else 1
+
+    def finish_result(self):
+        passed, self._failed_info = self._chunk_state
+        self.process_result(pd.DataFrame({self.name(): passed}, index=[self.name()]))
+
 
 class AttributeValidation(Base):
     tags = ["Attribute"]
+    # per-record methods that `execute_series` has to mirror
+    series_counterparts = ('_get_value', '_execute', 'is_empty', 'execute')
+    # execute once per distinct value of low cardinality columns; only safe for rules whose result depends on the
+    # value alone, so custom rules turn it on themselves. Built-in attribute rules do.
+    memoize = False
 
     def fail_message(self, *args, **kwargs):
         failed_record = args[0]
-        return self.message.format(clean_value(failed_record[self.attribute]))
+        return self.message.format(*self.fail_message_args(clean_value(failed_record[self.attribute])))
+
+    def fail_message_args(self, value):
+        """
+        Arguments of the fail message of a failed value.
+        :param value: value of the attribute
+        :return: tuple
+        """
+        return value,
+
+    def fail_messages(self, failed_objects, **kwargs):
+        """
+        Fail messages depend on the value of the attribute only, so each distinct value is formatted once. A subclass
+        overriding `fail_message` gets its messages record by record.
+        """
+        if defining_class(type(self), 'fail_message') is not AttributeValidation:
+            return super(AttributeValidation, self).fail_messages(failed_objects, **kwargs)
+
+        codes, values = pd.factorize(first_column(failed_objects, self.attribute), use_na_sentinel=False)
+        messages = np.array([self.message.format(*self.fail_message_args(value)) for value in values], dtype=object)
+        return messages[codes].tolist()
 
     def _execute(self, record, **kwargs):
         self._attr_value = self._get_value(record)
@@ -156,22 +412,173 @@ class AttributeValidation(Base):
     def execute(self, record, **kwargs):
         raise NotImplementedError()
 
+    def supports_series(self):
+        """
+        Column-at-a-time execution is used only when the class implementing `execute_series` also owns the per-record
+        path. A subclass that overrides any of the per-record methods (eg: a custom rule overriding `_execute`) falls
+        back to per-record execution, so both paths always give the same result.
+        :return: boolean
+        """
+        owner = defining_class(type(self), 'execute_series')
+        if owner is AttributeValidation:
+            return False
+        return all(issubclass(owner, defining_class(type(self), name)) for name in self.series_counterparts)
+
+    def _execute_series(self, series, prepared=None, factorized=None, **kwargs):
+        """
+        Run validation for a whole column. String values are validated in one vectorized pass through
+        `execute_series`, over the distinct values only when the column has few of them (see `memoize`); the remaining
+        values (None, NaN, numbers) go through `_execute` one by one, exactly like per-record execution.
+        :param series: Series; column to validate
+        :param prepared: `prepare_series` of the column, when shared with other rules
+        :param factorized: `factorize_values` of the prepared strings, when shared with other rules; False when the
+        column has too many distinct values
+        :param kwargs:
+        :return: boolean Series. Has the rule passed or failed, per record.
+        """
+        result = np.ones(len(series), dtype=bool)
+        strings, positions, values = prepared or prepare_series(series)
+
+        others = ~strings
+        if others.any():
+            result[others] = self._execute_others(series[others], **kwargs).astype(bool)
+
+        if len(positions):
+            factorized = factorize_values(values) if self.memoize and factorized is None else factorized
+            if factorized:
+                codes, uniques = factorized
+                result[positions] = self.execute_series(uniques, **kwargs).astype(bool).values[codes]
+            else:
+                result[positions] = self.execute_series(values, **kwargs).astype(bool).values
+
+        return pd.Series(result, index=series.index)
+
+    def _execute_records(self, series, **kwargs):
+        """
+        Run `_execute` record by record for a whole column. With `memoize`, strings of a low cardinality column are
+        executed once per distinct value and the results broadcast back.
+        :param series: Series; column to validate
+        :param kwargs:
+        :return: Series. Has the rule passed or failed, per record.
+        """
+        if not self.memoize:
+            return series.apply(self._execute, **kwargs)
+
+        strings = string_mask(series).values
+        factorized = factorize_values(series[strings])
+        if not factorized:
+            return series.apply(self._execute, **kwargs)
+
+        codes, uniques = factorized
+        result = np.empty(len(series), dtype=object)
+        result[strings] = uniques.apply(self._execute, **kwargs).values[codes]
+        others = ~strings
+        if others.any():
+            result[others] = self._execute_others(series[others], **kwargs)
+        return pd.Series(result, index=series.index, name=series.name).infer_objects()
+
+    def _execute_others(self, others, **kwargs):
+        """
+        `_execute` of the values that are not strings. With `memoize`, missing values of the same type (eg: NaN of a
+        sparse column) are executed once.
+        :param others: Series of values that are not strings
+        :return: ndarray
+        """
+        missing = others.isna().values
+        if not (self.memoize and missing.any()):
+            return others.apply(self._execute, **kwargs).values
+
+        results = {}
+
+        def execute(value):
+            kind = type(value)
+            if kind not in results:
+                results[kind] = self._execute(value, **kwargs)
+            return results[kind]
+
+        result = np.empty(len(others), dtype=object)
+        result[missing] = [execute(value) for value in others.values[missing]]
+        if not missing.all():
+            result[~missing] = others[~missing].apply(self._execute, **kwargs).values
+        return result
+
+    def chunk_state(self, result_df):
+        """
+        Reduce the result of one chunk: failed records are kept, passed records are only counted.
+        :param result_df: validated chunk; unique key, attribute and result columns
+        :return: number of passed records, list of failed records, number of failed records
+        """
+        result = result_df[self.name()]
+        failed = result_df[result == False]
+        return int((result == True).sum()), [failed], len(failed)
+
+    def drain_state(self, state):
+        """
+        Take the failed records out of a chunk state, eg: to stream them to a report rather than keep them in the rule.
+        Their count is kept, so `failed_count` stays exact.
+        :param state: chunk state, as returned by `chunk_state`
+        :return: list of failed records, chunk state without them
+        """
+        passed, failed, failed_count = state
+        return failed, (passed, [frame.iloc[0:0] for frame in failed[:1]], failed_count)
+
+    def merge_states(self, state, other):
+        return state[0] + other[0], state[1] + other[1], state[2] + other[2]
+
+    def chunk_failures(self, state):
+        return state[2]
+
+    def shift_state(self, state, rows):
+        if not rows:
+            return state
+        passed, failed, failed_count = state
+        return passed, [frame.set_axis(frame.index + rows) for frame in failed], failed_count
+
+    def finish_result(self):
+        self._passed_count, failed, self._failed_count = self._chunk_state
+        self._failed_objects = pd.concat(failed)
+        self._passed_objects = self._failed_objects.iloc[0:0]
+
+    def execute_series(self, values, **kwargs):
+        """
+        Vectorized counterpart of `execute`.
+        :param values: Series of non empty strings, already cleaned by `_get_value`
+        :param kwargs:
+        :return: boolean Series
+        """
+        raise NotImplementedError()
+
 
 class CustomMessageWithConstraint(AttributeValidation):
-    def fail_message(self, *args, **kwargs):
-        failed_record = args[0]
-        return self.message.format(clean_value(failed_record[self.attribute]), self.constraint)
+    def fail_message_args(self, value):
+        return value, self.constraint
 
 
 class FileNameValidation(FileValidation):
     message = ValidatorMessages.FILE_NAME_VALIDATION_FAILED
+    preflight = True
+    fatal = True
+
+    def __init__(self, *args, **kwargs):
+        super(FileNameValidation, self).__init__(*args, **kwargs)
+        self._regex = None
+
+    def compile(self):
+        self._regex = compile_rule_patterns(self.constraint)
+
+    def required_columns(self):
+        return []
 
     def _execute(self, df, **kwargs):
         file_path = os.path.basename(kwargs.get('file_path', ''))
-        file_path_format = self.constraint
         self._failed_info = file_path
 
-        return any([re.match(item, file_path) for item in file_path_format])
+        return any([regex.match(file_path) for regex in self.regex()])
+
+    def regex(self):
+        if self._regex is None:
+            self._regex = compile_patterns(self.constraint)
+        return self._regex
 
     def fail_message(self, *args, **kwargs):
         return self.message.format(self.failed_info(), self.constraint)
@@ -179,6 +586,11 @@ class FileNameValidation(FileValidation):
 
 class FileTypeValidation(FileValidation):
     message = ValidatorMessages.FILE_EXTN_VALIDATION_FAILED
+    preflight = True
+    fatal = True
+
+    def required_columns(self):
+        return []
 
     def _execute(self, df, **kwargs):
         file_path = kwargs.get('file_path', '')
@@ -193,6 +605,11 @@ class FileTypeValidation(FileValidation):
 
 class HeaderValidation(FileValidation):
     message = ValidatorMessages.HEADER_VALIDATION_FAILED_WITH_MISSING_COLUMN
+    preflight = True
+    fatal = True
+
+    def required_columns(self):
+        return self.constraint or []
 
     def _execute(self, df, **kwargs):
         required_columns = self.constraint
@@ -201,7 +618,7 @@ class HeaderValidation(FileValidation):
             return True
 
         columns = df.columns.values.tolist()
-        columns = map(str.strip, columns)
+        columns = list(map(str.strip, columns))
         if sorted(columns) == sorted(required_columns):
             return True
 
@@ -217,20 +634,116 @@ class HeaderValidation(FileValidation):
         return self.message.format(self.failed_info())
 
 
+class ForeignKeyValidation(FileValidation):
+    """
+    Fails when values of the attribute are not keys of a reference file, eg: account ids of the contact feed missing
+    from the account feed. The constraint holds the path of the reference file, its key column and optionally its
+    delimiter. Reference keys are looked up in a `KeyIndex`, kept in `index_dir` and reused across runs. Missing
+    values are not checked. The failure info maps every key not found to its count.
+    """
+    message = ValidatorMessages.FOREIGN_KEY_VALIDATION_FAILED
+    # directory of the key indexes; None keeps them in the temporary directory
+    index_dir = None
+    _index = None
+
+    def compile(self):
+        # build or refresh the index while the schema is built; a missing reference file is reported on execution
+        try:
+            self.key_index()
+        except (OSError, ValueError, TypeError, IndexError):
+            pass
+
+    def required_columns(self):
+        return [self.attribute]
+
+    def key_index(self):
+        if self._index is None:
+            source, column = self.constraint[0], self.constraint[1]
+            sep = self.constraint[2] if len(self.constraint) > 2 else ','
+            index = KeyIndex(source, column, sep, self.index_dir)
+            index.update()
+            self._index = index
+        return self._index
+
+    def refresh_index(self):
+        """
+        Bring the index up to date with the reference file, on every run: rules are reused across runs, eg: out of a
+        SchemaCache. Cheap when the file is unchanged.
+        """
+        if self._index is None:
+            self.key_index()
+        else:
+            self._index.update()
+
+    def reset_result(self):
+        super(ForeignKeyValidation, self).reset_result()
+        # chunks look up the index refreshed here; a missing reference file is reported by them
+        try:
+            self.refresh_index()
+        except (OSError, ValueError, TypeError, IndexError):
+            pass
+
+    def _execute(self, df, **kwargs):
+        self.refresh_index()
+        self._failed_info = self.chunk_state(df)
+        return not self._failed_info
+
+    def chunk_state(self, df, **kwargs):
+        hashes, positions = hash_keys(df, [self.attribute])
+        missing = positions[~self.key_index().contains(hashes)]
+        counts = df[self.attribute].iloc[missing].value_counts(sort=False)
+        return {key: int(count) for key, count in counts.items()}
+
+    def merge_states(self, state, other):
+        merged = dict(state)
+        for key, count in other.items():
+            merged[key] = merged.get(key, 0) + count
+        return merged
+
+    def chunk_failures(self, state):
+        return 1 if state else 0
+
+    def fingerprint(self):
+        # the reference file, as last modified
+        try:
+            stat = os.stat(self.constraint[0])
+        except (OSError, TypeError, IndexError):
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def finish_result(self):
+        self._failed_info = self._chunk_state
+        self.process_result(pd.DataFrame({self.name(): not self._failed_info}, index=[self.name()]))
+
+    def fail_message(self, *args, **kwargs):
+        return self.message.format(self.failed_info(), self.constraint[0])
+
+
 class DataTypeAttributeValidation(AttributeValidation):
     tags = ["Attribute", "Data Type"]
+    memoize = True
 
     def execute(self, record, **kwargs):
         return type(self._attr_value) in kwargs.get('data_type')
 
+    def execute_series(self, values, **kwargs):
+        return values.map(type).isin(kwargs.get('data_type'))
+
 
 class IsStringAttributeValidation(DataTypeAttributeValidation):
     def execute(self, record, **kwargs):
         kwargs.update({"data_type": [str]})
         return super(IsStringAttributeValidation, self).execute(record, **kwargs)
 
+    def execute_series(self, values, **kwargs):
+        kwargs.update({"data_type": [str]})
+        return super(IsStringAttributeValidation, self).execute_series(values, **kwargs)
+
 
 class IsIntegerAttributeValidation(DataTypeAttributeValidation):
+    # strings accepted by int()
+    int_regex = r'^[+-]?\d(?:_?\d)*$'
+
     def _get_value(self, record):
         try:
             value = int(record)
@@ -243,77 +756,186 @@ class IsIntegerAttributeValidation(DataTypeAttributeValidation):
         kwargs.update({"data_type": [int]})
         return super(IsIntegerAttributeValidation, self).execute(record, **kwargs)
 
+    def execute_series(self, values, **kwargs):
+        # `_get_value` casts int-like strings; those, and only those, end up as int.
+        return match_series(values, self.int_regex)
+
 
 class IsNullAttributeValidation(AttributeValidation):
+    memoize = True
+
     def execute(self, record, **kwargs):
         return not empty(self._attr_value)
 
+    def execute_series(self, values, **kwargs):
+        return required_series(values)
+
 
 class RequiredAttributeValidation(AttributeValidation):
+    memoize = True
+
     def execute(self, record, **kwargs):
         return required(self._attr_value)
 
+    def execute_series(self, values, **kwargs):
+        return required_series(values)
+
 
 class IsDateAttributeValidation(AttributeValidation):
+    memoize = True
+
     def execute(self, record, **kwargs):
         return is_date(self._attr_value)
 
+    def execute_series(self, values, **kwargs):
+        return is_date_series(values)
+
 
 class AttributeLengthValidation(AttributeValidation):
+    memoize = True
+
     def execute(self, record, **kwargs):
         return self.constraint[0] <= len(self._attr_value) <= self.constraint[1]
 
-    def fail_message(self, *args, **kwargs):
-        failed_record = args[0]
-        return self.message.format(self.attribute, self.constraint, clean_value(failed_record[self.attribute]))
+    def execute_series(self, values, **kwargs):
+        return values.str.len().between(self.constraint[0], self.constraint[1])
+
+    def fail_message_args(self, value):
+        return self.attribute, self.constraint, value
 
 
 class RegexAttributeValidation(CustomMessageWithConstraint):
+    # built-in patterns of the rule; when set, they replace the configured constraint.
+    patterns = None
+    memoize = True
+
+    def __init__(self, *args, **kwargs):
+        super(RegexAttributeValidation, self).__init__(*args, **kwargs)
+        if self.patterns:
+            self.constraint = self.patterns
+        self._regex = None
+
+    def compile(self):
+        self._regex = compile_rule_patterns(self.constraint)
+
+    def regex(self):
+        """
+        Compiled patterns of the constraint; shared by all rules configured with the same constraint.
+        :return: tuple of compiled patterns
+        """
+        if self._regex is None:
+            self._regex = compile_patterns(self.constraint)
+        return self._regex
+
     def execute(self, record, **kwargs):
-        return any([re.match(regex, self._attr_value) for regex in self.constraint])
+        return any([regex.match(self._attr_value) for regex in self.regex()])
+
+    def execute_series(self, values, **kwargs):
+        result = pd.Series(False, index=values.index)
+        for regex in self.regex():
+            result |= match_series(values, regex)
+        return result
 
 
 class EnumAttributeValidation(CustomMessageWithConstraint):
+    memoize = True
+
     def execute(self, record, **kwargs):
         return self._attr_value in self.constraint
 
+    def execute_series(self, values, **kwargs):
+        # unhashable items (eg: nested option lists) can never be equal to a string value
+        return values.isin([item for item in self.constraint if isinstance(item, Hashable)])
+
 
 class DateFormatAttributeValidation(CustomMessageWithConstraint):
+    memoize = True
+
     def execute(self, record, **kwargs):
         return is_date(self._attr_value, self.constraint)
 
+    def execute_series(self, values, **kwargs):
+        return is_date_series(values, self.constraint)
+
 
 class AlphaNumericAttributeValidation(RegexAttributeValidation):
-    def execute(self, record, **kwargs):
-        self.constraint = ["^[A-Za-z0-9]+$"]
-        return super(AlphaNumericAttributeValidation, self).execute(record, **kwargs)
+    patterns = [ALPHANUMERIC_REGEX]
 
-    def fail_message(self, *args, **kwargs):
-        failed_record = args[0]
-        return self.message.format(clean_value(failed_record[self.attribute]))
+    def fail_message_args(self, value):
+        return value,
 
 
 class EmailValidation(RegexAttributeValidation):
-    def execute(self, record, **kwargs):
-        self.constraint = ["""(?:[a-zA-Z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*|"(?:[\x01-\x08\x0b\x0c\x0e-\x1f\x21\x23-\x5b\x5d-\x7f]|\\[\x01-\x09\x0b\x0c\x0e-\x7f])*")@(?:(?:[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?\.)+[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?|\[(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?|[A-Za-z0-9-]*[A-Za-z0-9]:(?:[\x01-\x08\x0b\x0c\x0e-\x1f\x21-\x5a\x53-\x7f]|\\[\x01-\x09\x0b\x0c\x0e-\x7f])+)\])"""]
-        return super(EmailValidation, self).execute(record, **kwargs)
+    patterns = [EMAIL_REGEX]
 
 
 class PhoneValidation(RegexAttributeValidation):
-    def execute(self, record, **kwargs):
-        self.constraint = ["^[+]*[(]{0,1}[0-9]{1,4}[)]{0,1}[-\s\./0-9]*$"]
-        return super(PhoneValidation, self).execute(record, **kwargs)
+    patterns = [PHONE_REGEX]
 
 
 class UniqueAttributeValidation(FileValidation):
+    """
+    Fails when keys are found more than once; the failure info maps every duplicated key to its count. The key is the
+    attribute, or the columns listed in the constraint (composite key). On "ALL", the key is the unique key of the
+    schema.
+    """
     message = ValidatorMessages.DUPLICATE_VALIDATION_FAILED
+    # distinct keys counted in memory before counting spills to `spill_dir`; None never spills
+    max_keys = DEFAULT_MAX_KEYS
+    spill_dir = None
+
+    def key_columns(self):
+        if self.constraint:
+            return list(self.constraint)
+        if self.attribute == 'ALL':
+            return list(self.unique_key)
+        return [self.attribute]
+
+    def required_columns(self):
+        return self.key_columns()
+
+    def key_counter(self):
+        return KeyCounter(self.max_keys, self.spill_dir)
 
     def _execute(self, df, **kwargs):
-        counts = df.pivot_table(index=[self.attribute], aggfunc='size')
-        failed = counts[counts > 1].to_dict()
-        self._failed_info = failed
+        counter = self.key_counter()
+        counter.add(count_keys(df, self.key_columns()))
+        return self._count_duplicates(counter)
+
+    def chunk_state(self, df, **kwargs):
+        return count_keys(df, self.key_columns())
+
+    def merge_states(self, state, other):
+        counter = self._counter(state)
+        counter.add(other)
+        return counter
+
+    def chunk_failures(self, state):
+        # duplicates may span chunks
+        return 0
+
+    def finish_result(self):
+        counter = self._counter(self._chunk_state)
+        self.process_result(pd.DataFrame({self.name(): self._count_duplicates(counter)}, index=[self.name()]))
+
+    def _counter(self, state):
+        """
+        Counter of the chunks merged so far; the state of the first chunk holds the counts of that chunk only.
+        """
+        if isinstance(state, KeyCounter):
+            return state
+
+        counter = self.key_counter()
+        counter.add(state)
+        return counter
+
+    def _count_duplicates(self, counter):
+        try:
+            self._failed_info = counter.duplicates()
+        finally:
+            counter.close()
 
-        return any(failed)
+        return not self._failed_info
 
     def fail_message(self, *args, **kwargs):
         return self.message.format(self.failed_info())
@@ -1,5 +1,10 @@
+import locale
+import re
 from datetime import datetime
+from functools import lru_cache
+import numpy as np
 import pandas as pd
+from pandas.api.types import infer_dtype
 
 
 def clean_value(val):
@@ -10,6 +15,17 @@ def clean_value(val):
     return result
 
 
+def first_column(df, name):
+    """
+    Column of a DataFrame; the first one when the name is repeated, eg: a unique key that is also the attribute.
+    :return: Series
+    """
+    column = df[name]
+    if isinstance(column, pd.DataFrame):
+        return column.iloc[:, 0]
+    return column
+
+
 def empty(value):
     if isinstance(value, str):
         value = value.strip()
@@ -23,14 +39,17 @@ def required(value):
     return not empty(value)
 
 
+DEFAULT_DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+]
+
+
 def is_date(value, formats=[]):
     if not formats:
-        formats = [
-            '%Y-%m-%d',
-            '%Y/%m/%d',
-            '%d/%m/%Y',
-            '%d-%m-%Y',
-        ]
+        formats = DEFAULT_DATE_FORMATS
     for format_str in formats:
         try:
             datetime.strptime(value, format_str)
@@ -42,6 +61,161 @@ def is_date(value, formats=[]):
     return is_valid_date
 
 
+# directives checked column-at-a-time; formats using any other directive are checked with `strptime`, record by record.
+DATE_DIRECTIVES = set('dmYyHMSf')
+DATE_DIRECTIVE_RE = re.compile(r'%(.?)', re.DOTALL)
+NEVER_MATCH_RE = re.compile(r'(?!)')
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+# rules are executed once per distinct value when the distinct values are at most this share of the values
+MEMO_RATIO = 0.1
+# smaller columns are executed value by value
+MEMO_MIN_SIZE = 1000
+# number of values the cardinality of a column is estimated on
+MEMO_SAMPLE_SIZE = 10000
+
+_to_int = np.frompyfunc(int, 1, 1)
+
+
+def is_date_series(values, formats=[]):
+    """
+    Column-at-a-time version of `is_date`. Each format is tried once, on the values not matched by the previous
+    formats: the value is matched with the regular expression `strptime` builds for the format, then the parsed
+    fields are checked as whole arrays (eg: day within the month, leap years).
+    :param values: Series of strings
+    :param formats: list of formats, as for `is_date`
+    :return: boolean Series
+    """
+    formats = formats or DEFAULT_DATE_FORMATS
+    values = values.astype(object)
+    if not all(isinstance(value, str) for value in values):
+        return values.map(lambda value: is_date(value, formats))
+
+    result = np.zeros(len(values), dtype=bool)
+    for format_str in formats:
+        remaining = np.flatnonzero(~result)
+        if not len(remaining):
+            break
+        result[remaining] = _match_date_format(values.iloc[remaining], format_str)
+
+    return pd.Series(result, index=values.index)
+
+
+def _strptime_matches(value, format_str):
+    try:
+        datetime.strptime(value, format_str)
+        return True
+    except ValueError:
+        return False
+
+
+def _date_regex(format_str):
+    """
+    Regular expression of `strptime` for a format, when the format only uses directives of `DATE_DIRECTIVES`, each
+    at most once.
+    :return: compiled pattern; None when the format has to be checked with `strptime`
+    """
+    # `strptime` rebuilds its patterns when the LC_TIME locale changes; so does this cache.
+    return _locale_date_regex(format_str, locale.getlocale(locale.LC_TIME))
+
+
+@lru_cache(maxsize=256)
+def _locale_date_regex(format_str, time_locale):
+    # `_strptime.TimeRE` is private: it is the very pattern builder of `strptime`, so the regex accepts what
+    # `strptime` accepts. Should it change or go away, every format falls back to `strptime`.
+    try:
+        import _strptime
+        time_re = _strptime.TimeRE()
+    except Exception:
+        return None
+
+    try:
+        pattern = time_re.pattern(format_str)
+    except (KeyError, IndexError):
+        # bad directive or stray %: `strptime` rejects every value
+        return NEVER_MATCH_RE
+
+    directives = [directive for directive in DATE_DIRECTIVE_RE.findall(format_str) if directive != '%']
+    if len(set(directives)) != len(directives) or not DATE_DIRECTIVES.issuperset(directives):
+        return None
+    return re.compile(pattern, re.IGNORECASE)
+
+
+_len = np.frompyfunc(len, 1, 1)
+_match_end = np.frompyfunc(re.Match.end, 1, 1)
+_match_group = np.frompyfunc(re.Match.group, 2, 1)
+
+
+def _match_date_format(values, format_str):
+    """
+    :param values: Series of strings
+    :param format_str: format
+    :return: boolean ndarray; which values are dates of the format
+    """
+    regex = _date_regex(format_str) if isinstance(format_str, str) else None
+    if regex is None:
+        return values.map(lambda value: _strptime_matches(value, format_str)).values.astype(bool)
+
+    # `strptime` takes the first match and rejects the value unless the match covers it entirely.
+    values = values.values
+    matches = np.frompyfunc(regex.match, 1, 1)(values)
+    matched = matches != None
+    matched[matched] = _match_end(matches[matched]) == _len(values[matched])
+    result = np.zeros(len(values), dtype=bool)
+    if not matched.any():
+        return result
+
+    matches = matches[matched]
+    count = len(matches)
+
+    def field(name, default):
+        if name not in regex.groupindex:
+            return np.full(count, default, dtype=np.int64)
+        return _to_int(_match_group(matches, name)).astype(np.int64)
+
+    if 'y' in regex.groupindex:
+        year = field('y', 0)
+        year = np.where(year <= 68, year + 2000, year + 1900)
+    else:
+        year = field('Y', 1900)
+    month = field('m', 1)
+    day = field('d', 1)
+    second = field('S', 0)
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    days = DAYS_IN_MONTH[month - 1] + (leap & (month == 2))
+    # hours and minutes are bounded by the pattern; seconds 60 and 61 are not valid for `datetime`.
+    result[matched] = (year >= 1) & (day <= days) & (second <= 59)
+    return result
+
+
+# back references can't be combined into one alternation; group numbers would shift.
+GROUP_REFERENCE_RE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+
+def compile_patterns(patterns):
+    """
+    Compile a list of patterns that are matched with `any`. Whenever possible the patterns are combined into one
+    alternation, so every value is matched by a single automaton. Compiled patterns are cached and shared by all
+    callers passing the same patterns.
+    :param patterns: list of regular expressions
+    :return: tuple of compiled patterns
+    """
+    return _compile_patterns(tuple(patterns))
+
+
+@lru_cache(maxsize=None)
+def _compile_patterns(patterns):
+    compiled = tuple(re.compile(pattern) for pattern in patterns)
+    if len(compiled) < 2 or any(GROUP_REFERENCE_RE.search(pattern) for pattern in patterns):
+        return compiled
+
+    try:
+        return re.compile('|'.join('(?:{})'.format(pattern) for pattern in patterns)),
+    except re.error:
+        # eg: global flags or group names repeated across patterns
+        return compiled
+
+
 def upper_case(value):
     return str(value).upper()
 
@@ -54,3 +228,150 @@ def remove_space(value):
     if isinstance(value, str):
         return value.strip()
     return value
+
+
+def string_mask(series):
+    """
+    Flags the values of a Series that are strings. Missing values (None/NaN) and non string values are flagged False.
+    :param series: Series
+    :return: boolean Series
+    """
+    present = series.notna()
+    if infer_dtype(series[present], skipna=False) in ('string', 'empty'):
+        return present
+    return series.map(lambda value: isinstance(value, str))
+
+
+def empty_series(series):
+    """
+    Column-at-a-time version of `empty` for a Series of strings.
+    """
+    return series.str.strip().str.len() == 0
+
+
+def required_series(series):
+    """
+    Column-at-a-time version of `required` for a Series of strings.
+    """
+    return ~empty_series(series)
+
+
+def remove_space_series(series):
+    """
+    Column-at-a-time version of `remove_space`: strings are stripped, other values are left as they are.
+    """
+    strings = string_mask(series).values
+    if not strings.any():
+        return series
+    if strings.all():
+        return series.str.strip()
+
+    result = series.astype(object)
+    result[strings] = series[strings].str.strip().values
+    return result
+
+
+# `str` and its methods applied element-wise in C loops; no Python frame per value.
+_to_str = np.frompyfunc(str, 1, 1)
+_upper = np.frompyfunc(str.upper, 1, 1)
+_lower = np.frompyfunc(str.lower, 1, 1)
+
+
+def is_ascii_arrow_series(series):
+    """
+    Whether a Series holds Arrow backed strings that are all ASCII; Arrow string kernels then give the same results
+    as the `str` methods. Missing values are ignored.
+    """
+    if not (isinstance(series.dtype, pd.StringDtype) and series.dtype.storage == 'pyarrow'):
+        return False
+
+    import pyarrow
+    import pyarrow.compute
+    return bool(pyarrow.compute.all(pyarrow.compute.string_is_ascii(pyarrow.array(series.array))).as_py())
+
+
+def upper_case_series(series):
+    """
+    Column-at-a-time version of `upper_case`.
+    """
+    if is_ascii_arrow_series(series):
+        return series.fillna(str(np.nan)).str.upper()
+    return pd.Series(_upper(_to_str(series.to_numpy(dtype=object))), index=series.index, name=series.name, dtype=object)
+
+
+def lower_case_series(series):
+    """
+    Column-at-a-time version of `lower_case`.
+    """
+    if is_ascii_arrow_series(series):
+        return series.fillna(str(np.nan)).str.lower()
+    return pd.Series(_lower(_to_str(series.to_numpy(dtype=object))), index=series.index, name=series.name, dtype=object)
+
+
+def read_only(series):
+    """
+    Protect a column shared by several rules against changes made by one of them.
+    :return: series
+    """
+    values = series.values
+    if isinstance(values, np.ndarray):
+        values.flags.writeable = False
+    return series
+
+
+def prepare_series(series):
+    """
+    Split a column for column-at-a-time execution: which values are strings, and the strings that are not empty once
+    spaces are removed. Computed once per column and shared by the rules reading it.
+    :param series: Series
+    :return: boolean ndarray of strings, positions of non empty strings, Series of those strings without spaces
+    """
+    strings = string_mask(series).values
+    values = series[strings]
+    factorized = factorize_values(values)
+    if factorized:
+        # strip each distinct string once
+        codes, uniques = factorized
+        uniques = uniques.str.strip()
+        values = pd.Series(uniques.values.take(codes), index=values.index, dtype=uniques.dtype)
+        active = (uniques.str.len() > 0).values[codes]
+    else:
+        values = values.str.strip()
+        active = (values.str.len() > 0).values
+    return strings, np.flatnonzero(strings)[active], values[active]
+
+
+def factorize_values(values):
+    """
+    Distinct values of a Series of strings, to execute a rule once per distinct value and broadcast the results back.
+    Only columns of low cardinality are factorized: the number of distinct values is estimated on an evenly spaced
+    sample first, so that a column of mostly distinct values costs a sample only.
+    :param values: Series of strings
+    :return: codes (position of every value among the distinct values), Series of distinct values; None when there
+    are too many distinct values for memoization to pay off
+    """
+    size = len(values)
+    if size < MEMO_MIN_SIZE:
+        return None
+
+    sample = values.iloc[::max(1, size // MEMO_SAMPLE_SIZE)]
+    if sample.nunique() > MEMO_RATIO * len(sample):
+        return None
+
+    codes, uniques = pd.factorize(values)
+    if len(uniques) > MEMO_RATIO * size:
+        return None
+    return codes, pd.Series(uniques, dtype=values.dtype)
+
+
+def match_series(series, regex):
+    """
+    Column-at-a-time version of `regex.match` for a Series of strings. Arrow backed strings would be matched by the
+    Arrow regex engine, whose syntax and semantics differ from `re`; they are matched as Python strings instead.
+    :param series: Series of strings
+    :param regex: pattern or compiled pattern
+    :return: boolean Series
+    """
+    if series.dtype != object:
+        series = series.astype(object)
+    return series.str.match(regex)
@@ -1,14 +1,153 @@
+import copy
 import pandas as pd
 import logging
+from file_validator.logger import LogRecordFactory
+from file_validator.validator.executor import Executor, THREAD, PROCESS
+from file_validator.validator.messages import ValidatorMessages
+from file_validator.validator.plan import ExecutionPlan, transform_chain
 from file_validator.validator.utils import *
 
 logger = logging.getLogger()
 
 
+def _validate_task(context, index):
+    """
+    Validate one task of the execution plan. Module level so that process workers can run it.
+    :param context: validator, transform cache of the DataFrame, plan and keyword arguments of the run
+    :param index: position of the task
+    :return: position, state and log records of every rule of the task
+    """
+    validator, transforms, plan, kwargs = context
+    return validator._validate_task(transforms, plan, plan.tasks[index], **kwargs)
+
+
+def _validate_task_state(context, index):
+    """
+    `_validate_task` run by a worker process. Only the `result_state` of each rule goes back, rather than the
+    validated columns; the parent rebuilds the results from its own DataFrame.
+    """
+    validator, transforms, plan, kwargs = context
+    outcomes = validator._validate_task(transforms, plan, plan.tasks[index], **kwargs)
+    return [(position, plan.rules[position].result_state(), log) for position, state, log in outcomes]
+
+
+def _validate_chunk(context, chunk):
+    """
+    Validate every rule against one chunk of a chunked run. Module level so that process workers can run it.
+    :param context: validator, plan and keyword arguments of the run
+    :param chunk: DataFrame
+    :return: number of records in the chunk, chunk state per rule (None when the rule raised)
+    """
+    validator, plan, kwargs = context
+    transforms = TransformCache(chunk)
+    states = [None] * len(plan.rules)
+    for step in plan.steps():
+        for index in step.rules:
+            states[index] = validator._validate_chunk_rule(chunk, plan.rules[index], transforms, **kwargs)
+    return len(chunk), states
+
+
+# column-at-a-time versions of pre validation actions
+SERIES_TRANSFORMS = {
+    'upper_case': upper_case_series,
+    'lower_case': lower_case_series,
+    'remove_space': remove_space_series,
+}
+
+
+def transform_column(series, action):
+    """
+    Apply one pre validation action to a column.
+    :param series: column
+    :param action: name of a function of this module, or callable
+    :return: corrected column; `series` is left untouched
+    """
+    series_func = SERIES_TRANSFORMS.get(action, None)
+    if series_func:
+        return series_func(series)
+
+    global_func = globals().get(action, None)
+    if global_func:
+        return series.apply(lambda x: global_func(x))
+    return series.apply(action)
+
+
+class TransformCache(object):
+    """
+    Columns corrected by pre validation, keyed by attribute and transform chain and computed once per run (or per
+    chunk). A chain reuses the cached result of its prefix, eg: ('str', 'upper_case') starts from ('str',). Cached
+    columns are read only, since every rule with the same chain gets the same column. The DataFrame itself is never
+    modified.
+    """
+    def __init__(self, df):
+        self.df = df
+        self._columns = {}
+        self._prepared = {}
+        self._factorized = {}
+
+    def column(self, attribute, pre_validation):
+        chain = transform_chain(pre_validation)
+        if not chain:
+            return self.df[attribute]
+
+        key = (attribute, chain)
+        if key not in self._columns:
+            self._columns[key] = read_only(transform_column(self.column(attribute, chain[:-1]), chain[-1]))
+        return self._columns[key]
+
+    def prepared(self, attribute, pre_validation):
+        """
+        `prepare_series` of a corrected column, shared by the rules executed column-at-a-time.
+        """
+        key = (attribute, transform_chain(pre_validation))
+        if key not in self._prepared:
+            self._prepared[key] = prepare_series(self.column(attribute, pre_validation))
+        return self._prepared[key]
+
+    def factorized(self, attribute, pre_validation):
+        """
+        `factorize_values` of the prepared strings of a corrected column, shared by the memoized rules reading it.
+        :return: codes, distinct values; False when the column has too many distinct values
+        """
+        key = (attribute, transform_chain(pre_validation))
+        if key not in self._factorized:
+            self._factorized[key] = factorize_values(self.prepared(attribute, pre_validation)[2]) or False
+        return self._factorized[key]
+
+
 class Base(object):
-    def __init__(self, logs):
+    def __init__(self, logs, workers=None, backend=THREAD, fail_fast=False, max_failures=None,
+                 stop_after_fatal_file_rule=False):
         self._status = True
         self.log = logs
+        # number of workers running independent rules in parallel; None/1 runs rules one by one.
+        self.workers = workers
+        self.backend = backend
+        # stop policies: validation stops at the first failure, once `max_failures` records failed, or once a fatal
+        # file rule failed. Rules left are skipped.
+        self.fail_fast = fail_fast
+        self.max_failures = max_failures
+        self.stop_after_fatal_file_rule = stop_after_fatal_file_rule
+
+    def stops(self):
+        """
+        :return: whether a stop policy is set
+        """
+        return self.fail_fast or self.max_failures is not None or self.stop_after_fatal_file_rule
+
+    def stop_reason(self, failures, fatal_failed):
+        """
+        :param failures: number of failures so far
+        :param fatal_failed: whether a fatal file rule failed
+        :return: why validation should stop; None to go on
+        """
+        if self.fail_fast and failures:
+            return "fail fast"
+        if self.max_failures is not None and failures >= self.max_failures:
+            return "{} failures reached".format(self.max_failures)
+        if self.stop_after_fatal_file_rule and fatal_failed:
+            return "fatal file rule failed"
+        return None
 
     def __call__(self, *args, **kwargs):
         return self._run(*args, **kwargs)
@@ -81,43 +220,124 @@ class Validator(AttributeValidator, FileValidator):
         ignored_columns = [col for col in df.columns if col not in schema_fields]
         logger.info('Source columns {} will be ignored.'.format(ignored_columns))
 
-        for rule in schema.validations():
-            logger.info("Starting Rule {}" .format(rule.name()))
-            try:
-                result_df = self._validate_rule(
-                    self.apply_pre_validation_correction(df, rule, **kwargs), rule, **kwargs)
-                self._post_validate_rule(result_df, df, rule, **kwargs)
-            except Exception as e:
-                logger.info("Failed Rule {}. {}".format(rule.name(), e))
-            logger.info("Ending Rule {}".format(rule.name()))
+        plan = ExecutionPlan(schema.validations())
+        transforms = TransformCache(df)
+        processes = False
+        if self.stops():
+            results = [self._validate_until(transforms, plan, **kwargs)]
+        elif self.workers and self.workers > 1:
+            tasks = range(len(plan.tasks))
+            executor = Executor(self.workers, self.backend)
+            processes = executor.backend == PROCESS
+            task = _validate_task_state if processes else _validate_task
+            results = executor.map(task, tasks, (self, transforms, plan, kwargs))
+        else:
+            results = [self._validate_task(transforms, plan, task, **kwargs) for task in plan.tasks]
+
+        # tasks may finish in any order; rule states and log records are merged back in schema order.
+        outcomes = {index: (state, log) for result in results for index, state, log in result}
+        for index, rule in enumerate(plan.rules):
+            if index not in outcomes:
+                rule.skip()
+                self.log.record(rule.name(), ValidatorMessages.RULE_SKIPPED, False)
+                continue
+            state, log = outcomes[index]
+            if processes:
+                rule.restore_result(state, df if rule.is_file_rule else self.corrected_frame(df, rule, transforms))
+            else:
+                rule.__dict__.update(state)
+            self.log.merge(log)
 
         return df, schema
 
-    def apply_pre_validation_correction(self, df, rule, **kwargs):
+    def _validate_task(self, transforms, plan, task, **kwargs):
         """
-        Execute the pre validation rules. This could be clean up or
+        Validate the rules of one task of the execution plan. Rules of a step share their corrected column and its
+        preparation for column-at-a-time execution, through the transform cache.
+        :return: list of position, state and log records of each rule
+        """
+        outcomes = []
+        for step in task.steps.values():
+            for index in step.rules:
+                rule = plan.rules[index]
+                log = self._validate_isolated(transforms.df, rule, transforms, **kwargs)
+                outcomes.append((index, rule.__dict__, log))
+        return outcomes
+
+    def _validate_until(self, transforms, plan, **kwargs):
+        """
+        Validate rules one at a time until a stop policy is met. File rules run first, so that a failing file rule
+        spares the scan of the columns.
+        :return: list of position, state and log records of each validated rule; rules left out are skipped
+        """
+        outcomes = []
+        failures, fatal_failed = 0, False
+        for task in sorted(plan.tasks, key=lambda task: not task.is_file_rule):
+            for step in task.steps.values():
+                for index in step.rules:
+                    rule = plan.rules[index]
+                    log = self._validate_isolated(transforms.df, rule, transforms, **kwargs)
+                    outcomes.append((index, rule.__dict__, log))
+
+                    failures += rule.failed_count()
+                    fatal_failed = fatal_failed or (rule.is_file_rule and rule.fatal and rule.failed_count() > 0)
+                    if self.stop_reason(failures, fatal_failed):
+                        return outcomes
+        return outcomes
+
+    def _validate_single(self, df, rule, transforms=None, **kwargs):
+        logger.info("Starting Rule {}" .format(rule.name()))
+        try:
+            transforms = transforms or TransformCache(df)
+            df = self.apply_pre_validation_correction(df, rule, transforms, **kwargs)
+            result_df = self._validate_rule(df, rule, transforms, **kwargs)
+            self._post_validate_rule(result_df, df, rule, **kwargs)
+        except Exception as e:
+            logger.info("Failed Rule {}. {}".format(rule.name(), e))
+        logger.info("Ending Rule {}".format(rule.name()))
+
+    def _validate_isolated(self, df, rule, transforms=None, **kwargs):
+        """
+        Validate a rule, recording its logs apart from the logs of the run.
+        :return: LogRecordFactory with the records of the rule
+        """
+        validator = copy.copy(self)
+        validator.log = LogRecordFactory()
+        validator._validate_single(df, rule, transforms, **kwargs)
+        return validator.log
+
+    def apply_pre_validation_correction(self, df, rule, transforms=None, **kwargs):
+        """
+        Execute the pre validation rules on the attribute of the rule. This could be clean up or normalization. `df`
+        is left untouched: the corrected attribute is returned in a new frame, along with the unique key.
         :param df:
         :param rule:
+        :param transforms: TransformCache of `df`, shared by the rules of the run
         :param kwargs:
-        :return:
+        :return: DataFrame to validate the rule against
         """
-        pre_validation = rule.pre_validation
-        if not pre_validation:
+        if not rule.pre_validation:
             self.log.record(rule.name(), "No pre validation applied.".format(rule.attribute), True)
             return df
 
-        if isinstance(pre_validation, str):
-            pre_validation = [pre_validation]
+        corrected = self.corrected_frame(df, rule, transforms)
+        self.log.record(rule.name(), "Pre validation applied on {} successfully.".format(rule.attribute), True)
+        return corrected
 
-        for action in pre_validation:
-            global_func = globals().get(action, None)
-            if global_func:
-                df[rule.attribute] = df[rule.attribute].apply(lambda x: global_func(x))
-            else:
-                df[rule.attribute] = df[rule.attribute].apply(action)
+    @staticmethod
+    def corrected_frame(df, rule, transforms=None):
+        """
+        :return: DataFrame with the attribute of the rule corrected by its pre validation rules; `df` without any
+        """
+        if not rule.pre_validation:
+            return df
 
-        self.log.record(rule.name(), "Pre validation applied on {} successfully.".format(rule.attribute), True)
-        return df
+        column = (transforms or TransformCache(df)).column(rule.attribute, rule.pre_validation)
+        if rule.is_file_rule:
+            return df.assign(**{rule.attribute: column})
+        corrected = pd.DataFrame({rule.unique_key[0]: df[rule.unique_key[0]]})
+        corrected[rule.attribute] = column
+        return corrected
 
     def apply_constraints(self, df, rule, **kwargs):
         """
@@ -132,18 +352,26 @@ class Validator(AttributeValidator, FileValidator):
 
         return df
 
-    def _validate_rule(self, df, rule, **kwargs):
+    def _validate_rule(self, df, rule, transforms=None, **kwargs):
         """
-        :param df:
+        :param df: DataFrame, with the attribute of the rule already corrected
         :param rule:
+        :param transforms: TransformCache of the DataFrame of the run, shared by its rules
         :param kwargs:
         :return:
         """
         df = self.apply_constraints(df, rule, **kwargs)
         if rule.is_file_rule:
             result_df = pd.DataFrame({rule.name(): rule._execute(df, **kwargs)}, index=[rule.name()])
+        elif rule.supports_series():
+            prepared = factorized = None
+            if transforms is not None:
+                prepared = transforms.prepared(rule.attribute, rule.pre_validation)
+                if rule.memoize:
+                    factorized = transforms.factorized(rule.attribute, rule.pre_validation)
+            result_df = pd.DataFrame(rule._execute_series(df[rule.attribute], prepared, factorized, **kwargs))
         else:
-            result_df = pd.DataFrame(df[rule.attribute].apply(rule._execute, **kwargs))
+            result_df = pd.DataFrame(rule._execute_records(df[rule.attribute], **kwargs))
         result_df = result_df.rename(columns={result_df.columns[0]: rule.name()})
 
         self.log.record(rule.name(), "Validated field {}.".format(rule.attribute), all(result_df[rule.name()]))
@@ -155,3 +383,114 @@ class Validator(AttributeValidator, FileValidator):
 
         rule.process_result(result_df)
 
+
+
+class ChunkedValidator(Validator):
+    """
+    Validates a file chunk by chunk, eg: the batches streamed by `CSVFileReader.iter_batches`, so that files larger
+    than memory can be validated. Each chunk goes through every rule in schema order, exactly like a whole file does.
+    Rules fold chunk results together (see `Base.merge_result`): attribute rules keep their failed records and count
+    the passed ones, file rules merge their chunk outcomes (eg: duplicate counts). With `workers`, chunks are spread
+    across the pool while at most two chunks per worker are held in memory.
+    With a `stream` (eg: `StreamingReport`), failed records of attribute rules are handed over chunk by chunk instead
+    of being kept by the rules, which then only count them. Stop policies are checked after every chunk: chunks left
+    are not read, and rules keep the results of the chunks validated so far.
+    """
+    def __init__(self, logs, workers=None, backend=THREAD, stream=None, **kwargs):
+        super(ChunkedValidator, self).__init__(logs, workers, backend, **kwargs)
+        self.stream = stream
+        self._records_count = 0
+
+    def records_count(self):
+        return self._records_count
+
+    def _validate(self, chunks, schema, **kwargs):
+        plan = ExecutionPlan(schema.validations())
+        self._merge_chunks(self._map_chunks(chunks, plan, **kwargs), plan, schema, **kwargs)
+        return chunks, schema
+
+    def _merge_chunks(self, results, plan, schema, **kwargs):
+        """
+        Fold the results of the chunks into the rules, in file order, then finish the rules.
+        :param results: generator of number of records and chunk state per rule, one item per chunk
+        :param plan: ExecutionPlan of the schema
+        :return:
+        """
+        rules = plan.rules
+        for rule in rules:
+            rule.reset_result()
+
+        if self.stream is not None:
+            self.stream.start(schema, **kwargs)
+
+        failed_rules = set()
+        # failures of attribute rules, and file rules failed, so far
+        failures, failed_file_rules = 0, set()
+        self._records_count = 0
+        for records_count, states in results:
+            self._records_count += records_count
+            for index, state in enumerate(states):
+                if state is None:
+                    failed_rules.add(index)
+                elif index not in failed_rules:
+                    rule = rules[index]
+                    if rule.is_file_rule and rule.chunk_failures(state):
+                        failed_file_rules.add(index)
+                    elif not rule.is_file_rule:
+                        failures += rule.chunk_failures(state)
+                    rule.merge_result(self._stream_state(rule, state, **kwargs))
+
+            if self.stops():
+                fatal_failed = any(rules[index].fatal for index in failed_file_rules)
+                reason = self.stop_reason(failures + len(failed_file_rules), fatal_failed)
+                if reason:
+                    results.close()
+                    self.log.record(
+                        self.__class__.__name__, ValidatorMessages.VALIDATION_STOPPED.format(
+                            self._records_count, reason), False)
+                    break
+
+        for index, rule in enumerate(rules):
+            if index in failed_rules or rule._chunk_state is None:
+                continue
+            rule.finish_result()
+            self.log.record(rule.name(), "Validated field {}.".format(rule.attribute), rule.failed_count() == 0)
+
+    def _stream_state(self, rule, state, **kwargs):
+        """
+        Hand the failed records of a chunk over to the stream, if any.
+        :return: chunk state left to merge into the rule
+        """
+        if self.stream is None or rule.is_file_rule:
+            return state
+        failed, state = rule.drain_state(state)
+        for failed_objects in failed:
+            self.stream.add(rule, failed_objects, **kwargs)
+        return state
+
+    def _map_chunks(self, chunks, plan, **kwargs):
+        context = (self, plan, kwargs)
+        if self.workers and self.workers > 1:
+            return Executor(self.workers, self.backend).imap(_validate_chunk, chunks, context, window=2 * self.workers)
+        return (_validate_chunk(context, chunk) for chunk in chunks)
+
+    def _validate_chunk_rule(self, chunk, rule, transforms=None, **kwargs):
+        """
+        Validate one rule against one chunk. Log records of the chunk are not kept; the run records one outcome per
+        rule once all chunks are merged. The rule is copied since other chunks may be running it at the same time.
+        :return: chunk state of the rule, None when the rule raised
+        """
+        rule = copy.copy(rule)
+        validator = copy.copy(self)
+        validator.log = LogRecordFactory()
+        try:
+            transforms = transforms or TransformCache(chunk)
+            df = validator.apply_pre_validation_correction(chunk, rule, transforms, **kwargs)
+            if rule.is_file_rule:
+                return rule.chunk_state(df, **kwargs)
+
+            result_df = validator._validate_rule(df, rule, transforms, **kwargs)
+            return rule.chunk_state(pd.concat([df[rule.unique_key[0]], df[rule.attribute], result_df], axis=1))
+        except Exception as e:
+            logger.info("Failed Rule {}. {}".format(rule.name(), e))
+            return None
@@ -22,11 +22,15 @@ setup(
     author_email='suja.varghese@kalido.com.au',
     scripts=['file_validator/__main__.py'],
     install_requires=[
-        'pandas==0.23.4',
+        'numpy>=1.17',
+        'pandas>=1.5',
         'csvvalidator==1.2',
         'xmlschema==1.0.7',
-        'sqlalchemy==1.1.14',
-        "openpyxl==2.6.2",
+        'sqlalchemy>=1.4',
+        "openpyxl>=3.1",
         "pdfkit==0.6.1",
     ],
+    extras_require={
+        'arrow': ['pyarrow'],
+    },
 )
@@ -0,0 +1,51 @@
+from file_validator.validator.rules import AttributeValidation, RegexAttributeValidation
+
+
+def create_rule(rule_class, constraint=None, attribute='test_column_1', message="'{}' failed", pre_validation=None):
+    return rule_class(
+        validate_key=rule_class.__name__, attribute=attribute, unique_key=['test_column_0'], constraint=constraint,
+        message=message, tags=["Attribute", "Data"], pre_validation=pre_validation or []
+    )
+
+
+class Schema(object):
+    schema_type = 'TEST'
+
+    def __init__(self, rules, fields=None):
+        self._rules = rules
+        self._fields = fields or ['test_column_0', 'test_column_1']
+
+    def validations(self):
+        return self._rules
+
+    schema = validations
+
+    def fields(self):
+        return self._fields
+
+
+class CustomRule(AttributeValidation):
+    def _execute(self, record, **kwargs):
+        return record == 'custom'
+
+
+class CustomRegexRule(RegexAttributeValidation):
+    def execute(self, record, **kwargs):
+        return self._attr_value.startswith('a')
+
+
+class CustomMessageRule(AttributeValidation):
+    def execute(self, record, **kwargs):
+        return False
+
+    def fail_message(self, *args, **kwargs):
+        return "custom {}".format(args[0]['test_column_0'])
+
+
+class CountingRule(AttributeValidation):
+    calls = 0
+    memoize = True
+
+    def _execute(self, record, **kwargs):
+        CountingRule.calls += 1
+        return record in ('NSW', 'VIC')
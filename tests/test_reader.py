@@ -1,8 +1,17 @@
+import os
+import tempfile
+from unittest import mock
 from tests import TestCase
+from file_validator.reader import mapped
+from file_validator.reader.mapped import MappedFile
+from file_validator.validator.rules import (
+    FileNameValidation, HeaderValidation, RequiredAttributeValidation, FileValidation
+)
+from file_validator.schema.schema import GenericSchema
 from file_validator.reader.messages import ReaderPrefixes, ReaderMessages
 from file_validator.reader.reader import (
     FileExistsMixin, logger, FileExtensionValidatorMixin, FileReaderMixin, FileReader, CSVFileReader, PSVFileReader,
-    JSONFileReader
+    JSONFileReader, ArrowCSVFileReader, ArrowPSVFileReader
 )
 
 
@@ -205,17 +214,15 @@ class TestFileReaderMixin(TestCase):
         path = self.path("test.json")  # non existing file with is_config=True
         status, log, result = self.instance.read(path, 'json', is_config=True)
         self.assertFalse(status)
+        error = "[Errno 2] No such file or directory: '" + self.basepath + "/fixtures/test.json'"
         logs = [(
             self.basepath + '/fixtures/test.json',
             "<LogRecord: name=" + self.basepath + "/fixtures/test.json, status=False, message=Verify File Read: Failed for " +
-            self.basepath + "/fixtures/test.json with error: Don't use pandas to read json config>"
+            self.basepath + "/fixtures/test.json with error: " + error + ">"
         )]
         self.assertEqual(logs, log.serialize(clear=True))
         self.assertTrue(result.get('invalid'))
-        self.assertEqual(
-            ("Don't use pandas to read json config",),
-            result.get('message')
-        )
+        self.assertEqual((error,), result.get('message'))
 
 
 class FileReaderTest(FileReader):
@@ -324,6 +331,209 @@ class TestCSVFileReader(TestCase):
         instance = self.CSVFileReaderTest()
         self.assertEqual('csv', instance.get_extn())
 
+    def test_should_stream_batches(self):
+        path = self.path("tbl_account.csv")
+        status, log, batches = self.CSVFileReaderTest().iter_batches(path, batch_rows=3)
+        self.assertTrue(status)
+        batches = list(batches)
+        self.assertEqual([3, 1], [len(batch) for batch in batches])
+        self.assertEqual([3], batches[1].index.tolist())
+        self.assertEqual(['12/01/1989'], batches[1]['test_column_1'].tolist())
+        self.assertTrue(all('True' in record for name, record in log.serialize(clear=True)))
+
+    def test_should_not_stream_missing_file(self):
+        path = self.path("tbl_contact.csv")
+        status, log, batches = self.CSVFileReaderTest().iter_batches(path, batch_rows=3)
+        self.assertFalse(status)
+        self.assertIsNone(batches)
+        self.assertTrue('Verify File Exists: Failed' in log.serialize(clear=True)[0][1])
+
+
+def write_file(test, content, extn='csv'):
+    fd, path = tempfile.mkstemp(suffix='.' + extn)
+    with os.fdopen(fd, 'w', newline='') as f:
+        f.write(content)
+    test.addCleanup(os.remove, path)
+    return path
+
+
+class TestMappedFile(TestCase):
+    contents = [
+        'a,b\n1,2\n3,4\n',
+        'a,b\n1,2\n3,4',
+        '\na,b\r\n1,2\r\n\r\n3,4\r\n\n',
+        '"a\nx",b\n1,2\n',
+        'a,b\n',
+        'a,b',
+    ]
+
+    def test_should_scan_like_read_csv(self):
+        for content in self.contents:
+            path = write_file(self, content)
+            expected = CSVFileReader().validate_and_read(path)[2]
+            with MappedFile(path) as f:
+                self.assertEqual(expected.columns.tolist(), f.header(), content)
+                self.assertEqual(len(expected), f.records_count(), content)
+
+    def test_should_count_across_windows(self):
+        path = write_file(self, 'a\n' + '\n'.join(str(i) * (i % 5) for i in range(100)) + '\n')
+        with MappedFile(path) as f:
+            expected = f.records_count()
+            with mock.patch.object(mapped, 'SCAN_WINDOW', 7):
+                self.assertEqual(expected, f.records_count())
+        self.assertEqual(80, expected)
+
+    def test_should_fail_empty_file(self):
+        with MappedFile(write_file(self, '')) as f:
+            self.assertRaises(ValueError, f.header)
+
+
+class TestFileScanMixin(TestCase):
+    def test_should_scan_header_and_records(self):
+        self.assertEqual((['test_column_1', 'test_column_2'], 4), CSVFileReader().scan(self.path('tbl_account.csv')))
+        path = write_file(self, 'a|b\n1|2\n', 'psv')
+        self.assertEqual((['a', 'b'], 1), PSVFileReader().scan(path))
+
+    def test_should_read_memory_mapped(self):
+        class MappedCSVFileReader(CSVFileReader):
+            memory_map = True
+
+        class MappedArrowCSVFileReader(ArrowCSVFileReader):
+            memory_map = True
+
+        path = self.path('tbl_account.csv')
+        expected = CSVFileReader().validate_and_read(path, as_dict=True)[2]
+        self.assertEqual(expected, MappedCSVFileReader().validate_and_read(path, as_dict=True)[2])
+        self.assertEqual(expected, MappedArrowCSVFileReader().validate_and_read(path, as_dict=True)[2])
+        batches = MappedArrowCSVFileReader().iter_batches(path, batch_rows=3)[2]
+        self.assertEqual([3, 1], [len(batch) for batch in batches])
+        logger.serialize(clear=True)
+
+
+class PreflightSchema(object):
+    def __init__(self, header):
+        def create_rule(rule_class, attribute, constraint):
+            return rule_class(rule_class.__name__, attribute, ['test_column_1'], constraint, "{}", [], [])
+
+        self.rules = [
+            create_rule(FileNameValidation, 'FILE', ['^tbl_.*$']),
+            create_rule(HeaderValidation, 'FILE', header),
+            create_rule(RequiredAttributeValidation, 'test_column_1', None),
+        ]
+
+    def validations(self):
+        return self.rules
+
+    def required_columns(self):
+        return None
+
+
+class TestPreflight(TestCase):
+    def test_should_pass_preflight_and_read(self):
+        reader = CSVFileReader()
+        schema = PreflightSchema(['test_column_1', 'test_column_2'])
+        status, log, result = reader.validate_and_read(self.path('tbl_account.csv'), schema=schema)
+        self.assertTrue(status)
+        self.assertEqual(4, len(result))
+        self.assertEqual({'header': ['test_column_1', 'test_column_2'], 'records_count': 4}, reader.metadata())
+        logs = [record for name, record in log.serialize(clear=True)]
+        self.assertTrue('Verify File Read: Passed pre-flight checks' in logs[1])
+        # rules of the schema are left untouched for the validation of the loaded file
+        self.assertEqual([], schema.rules[0].failed_objects())
+
+    def test_should_not_load_file_failing_preflight(self):
+        reader = CSVFileReader()
+        with mock.patch.object(reader, 'read') as read:
+            status, log, result = reader.validate_and_read(
+                self.path('tbl_account.csv'), schema=PreflightSchema(['test_column_1', 'test_column_3']))
+        self.assertFalse(status)
+        self.assertIsNone(result)
+        read.assert_not_called()
+        self.assertEqual(4, reader.metadata()['records_count'])
+        self.assertTrue(
+            "Failed pre-flight checks for {} with failed rules: ['HeaderValidation".format(self.path('tbl_account.csv'))
+            in log.serialize(clear=True)[-1][1])
+
+    def test_should_skip_preflight_for_other_files(self):
+        self.assertEqual((True, None), JSONFileReader().preflight(self.path('test_schema.json'), PreflightSchema([])))
+
+
+class TestProjection(TestCase):
+    content = 'id,name , code,unused_1,unused_2\n1,a,x,u,v\n2,b,y,u,v\n'
+
+    def create_schema(self, validations):
+        schema = GenericSchema()
+        schema('TEST', {'fields': ['name'], 'unique': 'id', 'validations': validations})
+        return schema
+
+    def test_should_collect_required_columns(self):
+        schema = self.create_schema({
+            'required': {'fields': ['name']},
+            'check_column_headers': {'fields': ['ALL'], 'constraint': ['id', 'code']},
+            'file_name': {'fields': ['FILE'], 'constraint': ['.*']},
+        })
+        self.assertEqual({'id', 'name', 'code'}, schema.required_columns())
+
+        schema._append_rule(FileValidation('custom', 'FILE', ['id'], None, '', [], []))
+        self.assertIsNone(schema.required_columns())
+
+    def test_should_read_required_columns_only(self):
+        path = write_file(self, self.content)
+        schema = self.create_schema({'check_column_headers': {'fields': ['ALL'], 'constraint': ['id', 'code']}})
+        for reader in [CSVFileReader(), ArrowCSVFileReader()]:
+            status, log, result = reader.validate_and_read(path, schema=schema)
+            self.assertTrue(status)
+            self.assertEqual(['id', 'name ', ' code'], result.columns.tolist())
+            self.assertEqual(['a', 'b'], result['name '].tolist())
+            self.assertTrue(HeaderValidation('header', 'ALL', ['id'], ['id', 'code'], '', [], [])._execute(result))
+
+            batches = reader.iter_batches(path, batch_rows=1, schema=schema)[2]
+            self.assertEqual([['id', 'name ', ' code']] * 2, [batch.columns.tolist() for batch in batches])
+        logger.serialize(clear=True)
+
+    def test_should_not_project_other_files(self):
+        schema = self.create_schema({'required': {'fields': ['name']}})
+        self.assertIsNone(JSONFileReader().projection(schema))
+        self.assertIsNotNone(PSVFileReader().projection(schema))
+
+
+class TestArrowCSVFileReader(TestCase):
+    def setUp(self) -> None:
+        self.instance = ArrowCSVFileReader()
+
+    def write(self, content, extn='csv'):
+        return write_file(self, content, extn)
+
+    def test_should_read_like_pandas_engine(self):
+        path = self.write('id,name,code\n1, a ,007\n2,,NA\n3,"x, y",\n')
+        status, log, result = self.instance.validate_and_read(path)
+        self.assertTrue(status)
+        status, log, expected = CSVFileReader().validate_and_read(path)
+        self.assertEqual(expected.columns.tolist(), result.columns.tolist())
+        self.assertEqual(expected.astype(object).to_dict(), result.astype(object).to_dict())
+        log.serialize(clear=True)
+
+    def test_should_stream_batches(self):
+        path = self.write('id|name\n' + ''.join('{}|n{}\n'.format(i, i) for i in range(7)), 'psv')
+        status, log, batches = ArrowPSVFileReader().iter_batches(path, batch_rows=3)
+        self.assertTrue(status)
+        batches = list(batches)
+        self.assertEqual([3, 3, 1], [len(batch) for batch in batches])
+        self.assertEqual([6], batches[2].index.tolist())
+        self.assertEqual(['n6'], batches[2]['name'].tolist())
+        log.serialize(clear=True)
+
+    def test_should_fail_malformed_file(self):
+        path = self.write('id,name\n1,a,extra\n')
+        status, log, result = self.instance.validate_and_read(path)
+        self.assertFalse(status)
+        self.assertTrue('Verify File Read: Failed' in log.serialize(clear=True)[-1][1])
+
+    def test_should_reject_unknown_engine(self):
+        class UnknownEngineReader(CSVFileReader):
+            engine = 'spark'
+        self.assertRaises(ValueError, UnknownEngineReader().set_func_mapping)
+
 
 class TestPSVFileReader(TestCase):
     class PSVFileReaderTest(PSVFileReader):pass
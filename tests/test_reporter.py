@@ -0,0 +1,269 @@
+import json
+import shutil
+import tempfile
+import numpy
+import pandas
+from tests import TestCase
+from tests.helpers import create_rule, Schema, CustomMessageRule
+from file_validator.logger import LogRecordFactory
+from file_validator.reporter.reporter import Report, StreamingReport, FailureSample, FIRST, SAMPLE
+from file_validator.reporter.writer import (
+    CSVReportWriter, CSVStreamWriter, JsonLinesStreamWriter, ParquetReportWriter, PARQUET,
+)
+from file_validator.validator.rules import (
+    RegexAttributeValidation, AttributeLengthValidation, AlphaNumericAttributeValidation,
+    IsDateAttributeValidation, FileNameValidation,
+)
+from file_validator.validator.validator import Validator, ChunkedValidator
+
+
+class ReportFixture(object):
+    def create_schema(self):
+        return Schema([
+            create_rule(FileNameValidation, ['^tbl_.*$'], attribute='FILE', message="{} failed {}"),
+            create_rule(RegexAttributeValidation, ['^[a-z]+$'], message="'{}' does not match {}"),
+            create_rule(AttributeLengthValidation, [1, 2], message="{} {} '{}'"),
+            create_rule(AlphaNumericAttributeValidation),
+            create_rule(IsDateAttributeValidation),
+            create_rule(CustomMessageRule),
+        ])
+
+    def create_df(self):
+        return pandas.DataFrame({
+            'test_column_0': [str(i) for i in range(8)],
+            'test_column_1': ['abc', '12', 'a-b', '12', None, 'xyz', '2019-01-31', 'a b'],
+        }, dtype=object)
+
+    def run_report(self, **kwargs):
+        df = self.create_df()
+        schema = self.create_schema()
+        schema, logs = Validator(LogRecordFactory())(df, schema, file_path='account.csv')
+        report = Report(**kwargs)
+        report.report(schema, logs, file_path='account.csv', records_count=len(df))
+        return schema, logs, report
+
+
+class TestReport(ReportFixture, TestCase):
+    def test_should_match_record_by_record_report(self):
+        schema, logs, report = self.run_report()
+
+        expected = []
+        for rule in schema.schema():
+            if rule.is_file_rule:
+                expected.append(('FILE', 'account.csv', 'N/A', rule.fail_message(file_path='account.csv')))
+                continue
+            for _, record in rule.failed_objects().iterrows():
+                expected.append((rule.attribute, record['test_column_0'], record[rule.attribute],
+                                 rule.fail_message(record)))
+
+        detailed = report.detailed()
+        self.assertEqual(report.detailed_columns(), detailed.columns.tolist())
+        self.assertEqual(
+            expected, list(zip(detailed['Attribute'], detailed['Unique ID'], detailed['Value'], detailed['Fail Message'])))
+        self.assertIn("'a-b' does not match ['^[a-z]+$']", detailed['Fail Message'].tolist())
+        self.assertIn("custom 3", detailed['Fail Message'].tolist())
+
+    def test_should_summarise_rules(self):
+        schema, logs, report = self.run_report()
+        summary = report.summary()
+        self.assertEqual(['Summary', 'Details'], summary.columns.tolist())
+        self.assertEqual(['File path', 'account.csv'], summary.iloc[0].tolist())
+        self.assertEqual(['Total Number of Records', 8], summary.iloc[4].tolist())
+        self.assertEqual(['CDP_AT_007: Failures', 5], summary.iloc[10].tolist())
+        self.assertEqual(['CDP_AT_007: Passes', 3], summary.iloc[11].tolist())
+
+    def test_should_list_logs(self):
+        logs = LogRecordFactory()
+        logs.record('account.csv', 'read', True)
+        logs.record('rule', 'failed', False)
+        df = Report.logs(logs)
+        self.assertEqual([['account.csv', True, 'read'], ['rule', False, 'failed']], df.values.tolist())
+
+    def test_should_cap_detailed_rows_per_rule(self):
+        schema, logs, report = self.run_report()
+        _, _, capped = self.run_report(detail_cap=2)
+
+        detailed = report.detailed()
+        expected = detailed.groupby(['Rule ID', 'Attribute'], sort=False, dropna=False).head(2)
+        self.assertEqual(expected.values.tolist(), capped.detailed().values.tolist())
+        self.assertEqual(['Detailed Failures', 'first 2 per rule'], capped.summary().iloc[5].tolist())
+        self.assertEqual(['CDP_AT_007: Failures', 5], capped.summary().iloc[11].tolist())
+
+    def test_should_sample_detailed_rows_per_rule(self):
+        schema, logs, report = self.run_report()
+        _, _, sampled = self.run_report(detail_cap=3, detail_mode=SAMPLE, random_state=1)
+
+        detailed = report.detailed().values.tolist()
+        rows = sampled.detailed().values.tolist()
+        self.assertEqual(16, len(rows))
+        positions = [detailed.index(row) for row in rows]
+        self.assertEqual(sorted(positions), positions)
+        self.assertEqual(['Detailed Failures', 'sample 3 per rule'], sampled.summary().iloc[5].tolist())
+
+    def test_should_summarise_skipped_rules(self):
+        schema = self.create_schema()
+        schema, logs = Validator(LogRecordFactory(), fail_fast=True)(self.create_df(), schema, file_path='account.csv')
+        report = Report()
+        report.report(schema, logs, file_path='account.csv', records_count=8)
+        rows = report.summary().values.tolist()
+        self.assertIn(['CDP_FL_001: Failures', 1], rows)
+        self.assertIn(['CDP_AT_007: Skipped Rules', 1], rows)
+        self.assertEqual(['FILE'], report.detailed()['Attribute'].tolist())
+
+    def test_should_report_nothing_without_failures(self):
+        detailed = Report().validation_result(Schema([]))
+        self.assertTrue(detailed.empty)
+        self.assertEqual(Report().detailed_columns(), detailed.columns.tolist())
+
+
+class TestStreamingReport(ReportFixture, TestCase):
+    def setUp(self):
+        self.report_path = tempfile.mkdtemp()
+        self.options = dict(report_path=self.report_path, summary_name='summary', detailed_name='detailed')
+
+    def tearDown(self):
+        shutil.rmtree(self.report_path)
+
+    def expected_rows(self):
+        schema, logs, report = self.run_report()
+        return report.detailed().values.tolist(), report.summary()
+
+    def assertSummary(self, expected, summary):
+        ran_at = expected['Summary'] == 'Ran at'
+        self.assertEqual(expected[~ran_at].astype(str).values.tolist(), summary[~ran_at].astype(str).values.tolist())
+
+    def test_should_stream_failures_of_chunks(self):
+        expected, expected_summary = self.expected_rows()
+        df = self.create_df()
+        schema = self.create_schema()
+        report = StreamingReport(CSVStreamWriter(), batch_size=1, **self.options)
+        chunks = (df.iloc[start:start + 3] for start in range(0, len(df), 3))
+        schema, logs = ChunkedValidator(LogRecordFactory(), stream=report)(chunks, schema, file_path='account.csv')
+        report.report(schema, logs, file_path='account.csv', records_count=len(df))
+
+        with open(report.writer.detailed_path) as detailed:
+            lines = detailed.read().splitlines()
+        expected = pandas.DataFrame(expected, columns=report.detailed_columns()).to_csv(index=False).splitlines()
+        self.assertEqual(expected[0], lines[0])
+        self.assertEqual(sorted(expected[1:]), sorted(lines[1:]))
+        self.assertSummary(expected_summary, report.summary())
+        self.assertTrue(all(rule.failed_objects().empty for rule in schema.schema() if not rule.is_file_rule))
+        self.assertEqual(5, schema.schema()[1].failed_count())
+
+    def test_should_stream_failures_of_validated_schema(self):
+        expected, expected_summary = self.expected_rows()
+        schema, logs, _ = self.run_report()
+        report = StreamingReport(JsonLinesStreamWriter(), batch_size=2, **self.options)
+        report.report(schema, logs, file_path='account.csv', records_count=8)
+
+        with open(report.writer.detailed_path) as detailed:
+            rows = [list(json.loads(line).values()) for line in detailed]
+        with open(report.writer.summary_path) as summary:
+            summary = [json.loads(line) for line in summary]
+        self.assertEqual(expected, rows)
+        self.assertEqual({'Summary': 'CDP_AT_007: Failures', 'Details': 5}, summary[10])
+        self.assertIsNone(report.writer.detailed_json)
+        self.assertTrue(report.detailed().empty)
+
+    def test_should_write_report_built_in_memory(self):
+        schema, logs, report = self.run_report()
+        writer = CSVReportWriter()
+        writer.write(report, **self.options)
+        self.assertEqual(report.summary().to_json(), writer.summary_json)
+        self.assertEqual(len(report.detailed()), len(pandas.read_csv(writer.detailed_path)))
+
+
+class TestFailureSample(TestCase):
+    def test_should_sample_uniformly_across_batches(self):
+        df = pandas.DataFrame({'position': range(100)})
+        rng = numpy.random.default_rng(0)
+        counts = numpy.zeros(100)
+        for _ in range(200):
+            sample = FailureSample(10, rng)
+            for start in range(0, 100, 13):
+                sample.add(df.iloc[start:start + 13])
+            positions = sample.records()['position'].values
+            self.assertEqual(10, len(positions))
+            self.assertTrue((numpy.diff(positions) > 0).all())
+            counts[positions] += 1
+        self.assertTrue((abs(counts / 200 - 0.1) < 0.07).all())
+
+    def test_should_keep_everything_below_cap(self):
+        sample = FailureSample(10)
+        sample.add(pandas.DataFrame({'position': range(4)}))
+        sample.add(pandas.DataFrame({'position': range(4, 6)}))
+        self.assertEqual(list(range(6)), sample.records()['position'].tolist())
+        self.assertIsNone(FailureSample(10).records())
+
+
+class TestParquetReportWriter(ReportFixture, TestCase):
+    def setUp(self):
+        self.report_path = tempfile.mkdtemp()
+        self.options = dict(report_path=self.report_path, summary_name='summary', detailed_name='detailed')
+
+    def tearDown(self):
+        shutil.rmtree(self.report_path)
+
+    def test_should_write_one_rule_per_row_group(self):
+        import pyarrow.parquet as pq
+        schema, logs, report = self.run_report()
+        writer = ParquetReportWriter(row_group_size=2)
+        self.assertIn(PARQUET, writer.allowed_types)
+        writer.write(report, **self.options)
+
+        detailed = report.detailed()
+        table = pq.read_table(writer.detailed_path)
+        self.assertEqual(report.detailed_columns(), table.column_names)
+        self.assertEqual(len(detailed), table.num_rows)
+        self.assertEqual(
+            sorted(map(str, detailed['Fail Message'].tolist())), sorted(table.column('Fail Message').to_pylist()))
+
+        metadata = pq.ParquetFile(writer.detailed_path).metadata
+        rule_id = report.detailed_columns().index('Rule ID')
+        message = report.detailed_columns().index('Fail Message')
+        for index in range(metadata.num_row_groups):
+            group = metadata.row_group(index)
+            self.assertLessEqual(group.num_rows, 2)
+            self.assertEqual(group.column(rule_id).statistics.min, group.column(rule_id).statistics.max)
+            self.assertTrue(any('DICTIONARY' in encoding for encoding in group.column(message).encodings))
+
+        failures = pq.read_table(writer.detailed_path, filters=[('Rule ID', '=', 'CDP_AT_007')])
+        self.assertEqual(5, failures.num_rows)
+        self.assertEqual(['CDP_AT_007'], failures.column('Rule ID').unique().to_pylist())
+
+        summary = pq.read_table(writer.summary_path).to_pandas()
+        self.assertEqual(['Total Number of Records', '8'], summary.iloc[4].tolist())
+
+    def test_should_stream_rows_to_parquet(self):
+        import pyarrow.parquet as pq
+        df = self.create_df()
+        report = StreamingReport(ParquetReportWriter(), batch_size=1, **self.options)
+        chunks = (df.iloc[start:start + 3] for start in range(0, len(df), 3))
+        schema, logs = ChunkedValidator(LogRecordFactory(), stream=report)(
+            chunks, self.create_schema(), file_path='account.csv')
+        report.report(schema, logs, file_path='account.csv', records_count=len(df))
+
+        _, _, expected = self.run_report()
+        table = pq.read_table(report.writer.detailed_path)
+        self.assertEqual(len(expected.detailed()), table.num_rows)
+        self.assertEqual(
+            len(expected.detailed().groupby(['Rule ID', 'Attribute'], dropna=False)),
+            pq.ParquetFile(report.writer.detailed_path).metadata.num_row_groups)
+
+    def test_should_cap_streamed_rows(self):
+        import pyarrow.parquet as pq
+        df = self.create_df()
+        for mode, rows in ((FIRST, 10), (SAMPLE, 10)):
+            report = StreamingReport(ParquetReportWriter(), detail_cap=2, detail_mode=mode, **self.options)
+            chunks = (df.iloc[start:start + 3] for start in range(0, len(df), 3))
+            schema, logs = ChunkedValidator(LogRecordFactory(), stream=report)(
+                chunks, self.create_schema(), file_path='account.csv')
+            report.report(schema, logs, file_path='account.csv', records_count=len(df))
+
+            detailed = pq.read_table(report.writer.detailed_path).to_pandas()
+            self.assertEqual(rows + 1, len(detailed))
+            self.assertEqual(5, schema.schema()[1].failed_count())
+            if mode == FIRST:
+                _, _, capped = self.run_report(detail_cap=2)
+                self.assertEqual(
+                    sorted(capped.detailed()['Unique ID'].astype(str)), sorted(detailed['Unique ID']))
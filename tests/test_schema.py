@@ -1,13 +1,18 @@
 import json
+import os
+import shutil
+import tempfile
+from unittest import mock
 
 from file_validator.exception.exception import (
     EmptySchemaException, SchemaMissingFieldsException, NotDeclaredFieldsException, InvalidSchemaException
 )
+from file_validator.schema.generator import SchemaCache, SchemaFactory
 from file_validator.schema.schema import ValidationMapping, Base as BaseSchema, GenericSchema, FeatureSchema
 from file_validator.validator.rules import (
     Base as BaseRules, IsNullAttributeValidation, IsDateAttributeValidation, RequiredAttributeValidation
 )
-from tests import Base as BaseTest
+from tests import Base as BaseTest, TestCase
 
 
 class ValidationA(BaseRules):
@@ -150,3 +155,60 @@ class FeatureSchemaTest(BaseTest):
         schema_inst(dummy_schema_type, input, map={})
         self.assertEqual([], schema_inst.validations())
         self.assertEqual([], schema_inst.fields())
+
+
+class TestSchemaCache(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.cache_dir, 'schema.json')
+        self.write_config(['tbl_account.csv'])
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def write_config(self, constraint):
+        with open(self.path('test_schema.json')) as fixture:
+            config = json.load(fixture)
+        config['validations']['file_name']['constraint'] = constraint
+        with open(self.config_path, 'w') as config_file:
+            json.dump(config, config_file)
+
+    def generate(self, cache):
+        factory = SchemaFactory(cache)
+        with mock.patch.object(SchemaFactory, 'read', wraps=factory.read) as read:
+            factory.generate(GenericSchema, 'ACCOUNT', self.config_path)
+        return factory.schema(), read.call_count
+
+    def test_should_reuse_compiled_schema(self):
+        cache = SchemaCache()
+        schema, reads = self.generate(cache)
+        cached, cached_reads = self.generate(cache)
+
+        self.assertEqual((1, 0), (reads, cached_reads))
+        self.assertIsNot(schema, cached)
+        self.assertIsNot(schema.validations()[0], cached.validations()[0])
+        self.assertEqual([str(rule) for rule in schema.validations()], [str(rule) for rule in cached.validations()])
+        self.assertEqual(['tbl_account.csv'], cached.validations()[0].constraint)
+
+    def test_should_rebuild_changed_config(self):
+        cache = SchemaCache()
+        self.generate(cache)
+        self.write_config(['tbl_contact.csv'])
+        schema, reads = self.generate(cache)
+        self.assertEqual(1, reads)
+        self.assertEqual(['tbl_contact.csv'], schema.validations()[0].constraint)
+
+    def test_should_share_schemas_on_disk(self):
+        cache_dir = os.path.join(self.cache_dir, 'schemas')
+        self.generate(SchemaCache(cache_dir=cache_dir))
+        schema, reads = self.generate(SchemaCache(cache_dir=cache_dir))
+        self.assertEqual(0, reads)
+        self.assertEqual(['tbl_account.csv'], schema.validations()[0].constraint)
+        self.assertEqual(['test_column_1'], schema.fields())
+
+    def test_should_evict_least_recently_used(self):
+        cache = SchemaCache(maxsize=1)
+        cache.put('a', 'schema a')
+        cache.put('b', 'schema b')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual('schema b', cache.get('b'))
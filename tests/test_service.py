@@ -0,0 +1,310 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from tests import TestCase
+from file_validator.models import Base as ModelBase, ValidationRecord, Status
+from file_validator.schema.generator import SchemaFactory
+from file_validator.service import (
+    ValidationJob, JobRunner, RecordStore, ValidationDaemon, BatchValidator, SchemaMapping, send_jobs, RESULT_SUFFIX,
+    DONE_SUFFIX,
+)
+from file_validator.validator.executor import THREAD, PROCESS
+from file_validator import __main__ as cli
+
+
+class SlowRunner(JobRunner):
+    def __init__(self, *args, **kwargs):
+        super(SlowRunner, self).__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def run(self, job):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        return super(SlowRunner, self).run(job)
+
+
+class ServiceFixture(object):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.tmp_dir, 'test_schema.json')
+        shutil.copy(self.path('test_schema.json'), self.config_path)
+        self.report_path = os.path.join(self.tmp_dir, 'reports')
+        os.makedirs(self.report_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def create_file(self, name='tbl_account.csv'):
+        file_path = os.path.join(self.tmp_dir, name)
+        shutil.copy(self.path('tbl_account.csv'), file_path)
+        return file_path
+
+    def create_job(self, name='tbl_account.csv'):
+        return ValidationJob(self.create_file(name), 'ACCOUNT', self.config_path, report_path=self.report_path)
+
+    def create_store(self):
+        engine = create_engine('sqlite:///' + os.path.join(self.tmp_dir, 'records.db'))
+        ModelBase.metadata.create_all(engine)
+        return RecordStore(sessionmaker(bind=engine))
+
+    def records(self, store):
+        session = store.session_factory()
+        try:
+            return {record.input_path: record for record in session.query(ValidationRecord)}
+        finally:
+            session.close()
+
+
+class TestJobRunner(ServiceFixture, TestCase):
+    def test_should_run_job_end_to_end(self):
+        job = self.create_job()
+        result = JobRunner().run(job)
+
+        self.assertTrue(result.passed(), result.error)
+        self.assertEqual((job.job_id, job.file_path, 'ACCOUNT', 4), (
+            result.job_id, result.input_path, result.name, result.records_count))
+        self.assertTrue(os.path.isfile(result.output_path['summary']))
+        self.assertTrue(os.path.isfile(result.output_path['detailed']))
+        self.assertEqual(self.report_path, os.path.dirname(result.output_path['summary']))
+        self.assertEqual(('Summary Report ACCOUNT.csv', 'Detailed Report ACCOUNT.csv'), (
+            os.path.basename(result.output_path['summary']), os.path.basename(result.output_path['detailed'])))
+        self.assertIn('Summary', json.loads(result.summary))
+        self.assertIn(job.file_path, [name for name, log in result.logs])
+
+    def test_should_build_schema_once(self):
+        runner = JobRunner(name_reports_by_file=True)
+        with mock.patch.object(SchemaFactory, 'read', autospec=True, side_effect=SchemaFactory.read) as read:
+            results = [runner.run(self.create_job(name)) for name in ['tbl_account.csv', 'tbl_account_2.csv']]
+
+        self.assertEqual(1, read.call_count)
+        self.assertEqual([True, True], [result.passed() for result in results])
+        self.assertEqual('Summary Report ACCOUNT tbl_account_2.csv', os.path.basename(results[1].output_path['summary']))
+
+    def test_should_fail_unreadable_file(self):
+        job = ValidationJob(os.path.join(self.tmp_dir, 'missing.csv'), 'ACCOUNT', self.config_path)
+        result = JobRunner().run(job)
+        self.assertEqual(Status.failed, result.status)
+        self.assertIsNone(result.output_path)
+        self.assertEqual([job.file_path], [name for name, log in result.logs])
+
+    def test_should_only_run_allowed_schema_classes(self):
+        job = self.create_job()
+        job.schema_class = 'tests.helpers.Schema'
+        result = JobRunner().run(job)
+        self.assertEqual(Status.failed, result.status)
+        self.assertIn('Schema class tests.helpers.Schema is not allowed', result.error)
+
+        job.schema_class = 'file_validator.schema.schema.GenericSchema'
+        self.assertTrue(JobRunner().run(job).passed())
+
+    def test_should_keep_reports_in_report_path(self):
+        runner = JobRunner(report_path=self.report_path)
+        file_path = self.create_file()
+        outside = ValidationJob(file_path, 'ACCOUNT', self.config_path, report_path=self.tmp_dir)
+        self.assertIn('is outside', runner.run(outside).error)
+        escaping = ValidationJob(file_path, 'ACCOUNT', self.config_path, summary_name='../summary.csv')
+        self.assertIn('is not a file name', runner.run(escaping).error)
+
+        job = ValidationJob(file_path, 'ACCOUNT', self.config_path, summary_name='summary.csv')
+        job.options['report_path'] = self.tmp_dir
+        result = runner.run(job)
+        self.assertTrue(result.passed(), result.error)
+        self.assertEqual(os.path.join(self.report_path, 'summary.csv'), result.output_path['summary'])
+
+    def test_should_round_trip_jobs(self):
+        job = ValidationJob('a.csv', 'ACCOUNT', 'schema.json', schema_class=JobRunner, report_name='report.xlsx')
+        self.assertEqual(job.to_dict(), ValidationJob.from_dict(json.loads(json.dumps(job.to_dict()))).to_dict())
+        self.assertEqual('file_validator.service.job.JobRunner', job.to_dict()['schema_class'])
+
+
+class TestRecordStore(ServiceFixture, TestCase):
+    def test_should_write_records_like_single_runs(self):
+        store = self.create_store()
+        job = self.create_job()
+        record_id = store.start(job)
+        self.assertEqual(Status.validating, self.records(store)[job.file_path].status)
+
+        result = JobRunner().run(job)
+        store.finish(record_id, result)
+
+        record = self.records(store)[job.file_path]
+        self.assertEqual((Status.validated, 'ACCOUNT'), (record.status, record.name))
+        self.assertEqual(result.output_path, record.output_path)
+        self.assertEqual(json.loads(result.summary), record.summary)
+        self.assertEqual([list(log) for log in result.logs], record.logs)
+        self.assertIsNotNone(record.ended_at)
+
+
+class TestValidationDaemon(ServiceFixture, TestCase):
+    def test_should_serve_jobs_over_socket(self):
+        daemon = ValidationDaemon(JobRunner(name_reports_by_file=True), workers=2)
+        address = os.path.join(self.tmp_dir, 'daemon.sock')
+        server = threading.Thread(target=daemon.serve, args=(address,))
+        server.start()
+        try:
+            while not os.path.exists(address):
+                time.sleep(0.01)
+            self.assertEqual(0o600, os.stat(address).st_mode & 0o777)
+            jobs = [self.create_job(), {'file_path': 'missing.csv'}, self.create_job('tbl_account_2.csv')]
+            results = send_jobs(address, jobs, timeout=30)
+        finally:
+            daemon.close()
+            server.join()
+
+        self.assertEqual([Status.validated, Status.failed, Status.validated], [result['status'] for result in results])
+        self.assertEqual(jobs[2].job_id, results[2]['job_id'])
+        self.assertIn('Invalid job', results[1]['error'])
+
+    def test_should_run_watched_job_files(self):
+        store = self.create_store()
+        daemon = ValidationDaemon(JobRunner(name_reports_by_file=True), workers=2, store=store)
+        jobs = [self.create_job('tbl_account_{}.csv'.format(i)) for i in range(3)]
+        job_dir = os.path.join(self.tmp_dir, 'jobs')
+        os.makedirs(job_dir)
+        for i, job in enumerate(jobs):
+            with open(os.path.join(job_dir, 'job_{}.json'.format(i)), 'w') as f:
+                json.dump(job.to_dict(), f)
+
+        watcher = threading.Thread(target=daemon.watch, args=(job_dir, 0.01))
+        watcher.start()
+        try:
+            done = [os.path.join(job_dir, 'job_{}'.format(i) + DONE_SUFFIX) for i in range(3)]
+            deadline = time.time() + 30
+            while not all(os.path.exists(path) for path in done) and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            daemon.close()
+            watcher.join()
+
+        for i, job in enumerate(jobs):
+            with open(os.path.join(job_dir, 'job_{}'.format(i) + RESULT_SUFFIX)) as f:
+                result = json.load(f)
+            self.assertEqual((job.job_id, Status.validated), (result['job_id'], result['status']))
+            self.assertEqual(Status.validated, self.records(store)[job.file_path].status)
+
+    def test_should_fail_jobs_that_cannot_be_submitted(self):
+        store = self.create_store()
+        daemon = ValidationDaemon(JobRunner(), workers=1, store=store)
+        job_dir = os.path.join(self.tmp_dir, 'jobs')
+        os.makedirs(job_dir)
+        with open(os.path.join(job_dir, 'job.json'), 'w') as f:
+            json.dump(self.create_job().to_dict(), f)
+
+        try:
+            with mock.patch.object(RecordStore, 'start', side_effect=RuntimeError('database is down')):
+                daemon._claim(os.path.join(job_dir, 'job.json'))
+        finally:
+            daemon.close()
+
+        with open(os.path.join(job_dir, 'job' + RESULT_SUFFIX)) as f:
+            result = json.load(f)
+        self.assertEqual((Status.failed, 'RuntimeError: database is down'), (result['status'], result['error']))
+        self.assertEqual(['job' + DONE_SUFFIX, 'job' + RESULT_SUFFIX], sorted(os.listdir(job_dir)))
+
+    def test_should_bound_parallel_jobs(self):
+        runner = SlowRunner(name_reports_by_file=True)
+        daemon = ValidationDaemon(runner, workers=2, max_pending=3)
+        try:
+            futures = [daemon.submit(self.create_job('tbl_account_{}.csv'.format(i))) for i in range(6)]
+            results = [future.result() for future in futures]
+        finally:
+            daemon.close()
+
+        self.assertEqual([True] * 6, [result.passed() for result in results])
+        self.assertEqual(2, runner.max_running)
+
+    def test_should_run_jobs_in_worker_processes(self):
+        store = self.create_store()
+        daemon = ValidationDaemon(JobRunner(name_reports_by_file=True), workers=2, backend=PROCESS, store=store)
+        try:
+            jobs = [self.create_job('tbl_account_{}.csv'.format(i)) for i in range(3)]
+            results = [future.result() for future in [daemon.submit(job) for job in jobs]]
+        finally:
+            daemon.close()
+
+        self.assertEqual([True] * 3, [result.passed() for result in results])
+        self.assertEqual({Status.validated}, {record.status for record in self.records(store).values()})
+
+
+class TestBatchValidator(ServiceFixture, TestCase):
+    def setUp(self):
+        super(TestBatchValidator, self).setUp()
+        self.input_path = os.path.join(self.tmp_dir, 'input')
+        os.makedirs(self.input_path)
+        for name in ['tbl_account_1.csv', 'tbl_account_2.csv', 'tbl_account_3.csv', 'tbl_contact_1.csv', 'notes.txt']:
+            shutil.copy(self.path('tbl_account.csv'), os.path.join(self.input_path, name))
+
+        self.mapping_path = os.path.join(self.tmp_dir, 'mapping.json')
+        with open(self.mapping_path, 'w') as f:
+            json.dump({
+                'tbl_account_*.csv': {'schema_type': 'ACCOUNT', 'config_path': 'test_schema.json'},
+                'tbl_contact_*.csv': {
+                    'schema_type': 'CONTACT', 'config_path': 'test_schema.json', 'schema_class': 'tests.NoSuchSchema',
+                },
+            }, f)
+
+    def run_batch(self, backend, store=None):
+        batch = BatchValidator(JobRunner(name_reports_by_file=True), workers=2, backend=backend, store=store)
+        pattern = os.path.join(self.input_path, '*')
+        return batch.run(pattern, SchemaMapping.from_file(self.mapping_path), report_path=self.report_path)
+
+    def test_should_match_first_pattern(self):
+        mapping = SchemaMapping([
+            ('tbl_account_1.csv', {'schema_type': 'FIRST', 'config_path': 'a.json'}),
+            ('tbl_account_*.csv', {'schema_type': 'ACCOUNT', 'config_path': 'b.json'}),
+        ], base_path='/schemas')
+        job = mapping.job('/input/tbl_account_1.csv', report_path='/reports')
+        self.assertEqual(('FIRST', '/schemas/a.json', '/reports'), (job.schema_type, job.config_path, job.report_path))
+        self.assertEqual('ACCOUNT', mapping.job('tbl_account_2.csv').schema_type)
+        self.assertIsNone(mapping.job('tbl_contact_1.csv'))
+
+    def test_should_validate_files_concurrently(self):
+        store = self.create_store()
+        summary = self.run_batch(THREAD, store)
+
+        rows = summary.to_frame()
+        self.assertEqual(sorted(rows['File']), rows['File'].tolist())
+        self.assertEqual(
+            [Status.skipped, Status.validated, Status.validated, Status.validated, Status.failed],
+            rows['Status'].tolist()
+        )
+        totals = summary.totals()
+        self.assertEqual((5, 3, 1, 1, 12), (
+            totals['files'], totals['validated'], totals['failed'], totals['skipped'], totals['records']))
+        self.assertFalse(summary.passed())
+        self.assertEqual(3, len(os.listdir(self.report_path)) // 2)
+
+        records = self.records(store)
+        self.assertEqual(4, len(records))
+        self.assertEqual(Status.failed, records[os.path.join(self.input_path, 'tbl_contact_1.csv')].status)
+
+    def test_should_match_thread_run_with_processes(self):
+        thread_rows = self.run_batch(THREAD).to_frame()
+        process_rows = self.run_batch(PROCESS).to_frame()
+        columns = ['File', 'Schema', 'Status', 'Records', 'Summary Report', 'Detailed Report']
+        self.assertEqual(thread_rows[columns].fillna('').values.tolist(), process_rows[columns].fillna('').values.tolist())
+
+    def test_should_run_from_command_line(self):
+        summary_path = os.path.join(self.tmp_dir, 'batch.csv')
+        pattern = os.path.join(self.input_path, 'tbl_account_*.csv')
+        self.assertEqual(PROCESS, cli.parser().parse_args(['batch', pattern, '--mapping', self.mapping_path]).backend)
+        self.assertEqual(THREAD, cli.parser().parse_args(['daemon', '--watch', self.tmp_dir]).backend)
+
+        status = cli.main([
+            'batch', pattern, '--mapping', self.mapping_path, '--summary', summary_path, '--backend', THREAD,
+            '--report-path', self.report_path,
+        ])
+        self.assertEqual(0, status)
+        self.assertEqual([Status.validated] * 3, self.read_input_csv(summary_path)['Status'].tolist())
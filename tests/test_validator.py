@@ -0,0 +1,761 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import numpy
+import pandas
+from unittest import mock
+from tests import TestCase
+from tests.helpers import create_rule, Schema, CustomRule, CustomRegexRule, CountingRule
+from file_validator.logger import LogRecordFactory
+from file_validator.validator import validator as validator_module
+from file_validator.validator.executor import Executor, THREAD, PROCESS
+from file_validator.validator.incremental import IncrementalValidator
+from file_validator.validator.messages import ValidatorMessages
+from file_validator.validator.keys import KeyCounter, KeyIndex, count_keys, hash_keys
+from file_validator.validator.plan import ExecutionPlan
+from file_validator.validator.rules import (
+    AttributeValidation, FileNameValidation, IsStringAttributeValidation, IsIntegerAttributeValidation, IsNullAttributeValidation,
+    RequiredAttributeValidation, IsDateAttributeValidation, AttributeLengthValidation, RegexAttributeValidation,
+    EnumAttributeValidation, DateFormatAttributeValidation, AlphaNumericAttributeValidation, EmailValidation,
+    PhoneValidation, UniqueAttributeValidation, HeaderValidation, ForeignKeyValidation,
+)
+from file_validator.validator.utils import compile_patterns, factorize_values, upper_case, lower_case, remove_space, is_date, is_date_series
+from file_validator.validator.validator import Validator, ChunkedValidator
+from file_validator.reader.reader import CSVFileReader
+from file_validator.schema.generator import SchemaCache, SchemaFactory
+from file_validator.schema.schema import GenericSchema
+from file_validator.reader.arrow import string_dtype
+
+
+def add_context(context, item):
+    return context + item
+
+
+class UndecidedRule(AttributeValidation):
+    def _execute(self, record, **kwargs):
+        return None if record == 'abc' else record == 'custom'
+
+
+def count_hashes(values):
+    return hash_keys(pandas.DataFrame({'key': values}, dtype=object), ['key'])[0]
+
+
+class TestSeriesExecution(TestCase):
+    values = [
+        'abc', ' abc ', 'ABC1', '', '   ', '0', '12', ' -12 ', '1_000', '1.5', '2019-01-31', '31/01/2019', '31/02/2019',
+        'm', 'F', 'a@b.com', 'not an email', '+61 (02) 9999-9999', 'a' * 20,
+    ]
+
+    def rules(self):
+        return [
+            create_rule(IsStringAttributeValidation),
+            create_rule(IsIntegerAttributeValidation),
+            create_rule(IsNullAttributeValidation),
+            create_rule(RequiredAttributeValidation),
+            create_rule(IsDateAttributeValidation),
+            create_rule(AttributeLengthValidation, [2, 10]),
+            create_rule(RegexAttributeValidation, ['^[a-z]+$', '^[0-9]+$']),
+            create_rule(EnumAttributeValidation, ['m', 'f', ['case_sensitive']]),
+            create_rule(DateFormatAttributeValidation, ['%d/%m/%Y']),
+            create_rule(AlphaNumericAttributeValidation),
+            create_rule(EmailValidation),
+            create_rule(PhoneValidation),
+        ]
+
+    def test_should_match_per_record_execution(self):
+        series = pandas.Series(self.values, dtype=object)
+        for rule in self.rules():
+            self.assertTrue(rule.supports_series(), rule.name())
+            expected = series.apply(rule._execute).tolist()
+            self.assertEqual(expected, rule._execute_series(series).tolist(), rule.name())
+
+    def test_should_match_per_record_execution_for_arrow_strings(self):
+        dtype = string_dtype()
+        if dtype is None:
+            self.skipTest("pandas has no arrow backed string dtype")
+
+        values = self.values + ['abc\n', '\u0661\u0662']
+        series = pandas.Series(values, dtype=dtype)
+        for rule in self.rules():
+            expected = series.apply(rule._execute).tolist()
+            self.assertEqual(expected, rule._execute_series(series).tolist(), rule.name())
+
+    def test_should_run_missing_values_per_record(self):
+        series = pandas.Series(['1', None, numpy.nan, '', 'x'], dtype=object)
+        rule = create_rule(IsIntegerAttributeValidation)
+        self.assertEqual([True, True, False, True, False], rule._execute_series(series).tolist())
+
+        rule = create_rule(RegexAttributeValidation, ['^[a-z]+$'])
+        self.assertRaises(TypeError, rule._execute_series, series)
+
+    def test_should_keep_index(self):
+        series = pandas.Series(['abc', '1'], index=[10, 11], dtype=object)
+        result = create_rule(RegexAttributeValidation, ['^[a-z]+$'])._execute_series(series)
+        self.assertEqual([10, 11], result.index.tolist())
+        self.assertEqual([True, False], result.tolist())
+
+    def test_should_fall_back_for_custom_rules(self):
+        self.assertFalse(create_rule(CustomRule).supports_series())
+        self.assertFalse(create_rule(CustomRegexRule, ['^a']).supports_series())
+
+
+class TestMemoization(TestCase):
+    values = TestSeriesExecution.values + [None, numpy.nan, 12, 1.5]
+
+    def low_cardinality(self, dtype=object):
+        return pandas.Series(self.values * 100, dtype=dtype)
+
+    def test_should_factorize_low_cardinality_values_only(self):
+        codes, uniques = factorize_values(pandas.Series(['NSW', 'VIC', 'NSW'] * 1000))
+        self.assertEqual(['NSW', 'VIC'], uniques.tolist())
+        self.assertEqual([0, 1, 0], codes[:3].tolist())
+
+        self.assertIsNone(factorize_values(pandas.Series(['NSW', 'VIC'] * 10)))
+        self.assertIsNone(factorize_values(pandas.Series([str(i) for i in range(5000)])))
+
+    @staticmethod
+    def outcome(func, series):
+        try:
+            return func(series).tolist()
+        except Exception as e:
+            return type(e)
+
+    def test_should_match_per_record_execution(self):
+        series = self.low_cardinality()
+        for rule in TestSeriesExecution.rules(self):
+            expected = self.outcome(lambda values: values.apply(rule._execute), series)
+            self.assertEqual(expected, self.outcome(rule._execute_series, series), rule.name())
+
+            rule.memoize = False
+            self.assertEqual(expected, self.outcome(rule._execute_series, series), rule.name())
+
+    def test_should_match_per_record_execution_for_arrow_strings(self):
+        dtype = string_dtype()
+        if dtype is None:
+            self.skipTest("pandas has no arrow backed string dtype")
+
+        series = pandas.Series(TestSeriesExecution.values * 100, dtype=dtype)
+        for rule in TestSeriesExecution.rules(self):
+            expected = series.apply(rule._execute).tolist()
+            self.assertEqual(expected, rule._execute_series(series).tolist(), rule.name())
+
+    def test_should_execute_custom_rules_once_per_distinct_value(self):
+        series = pandas.Series(['NSW', 'VIC', 'QLD', None, numpy.nan, 1] * 1000, dtype=object)
+        rule = create_rule(CountingRule)
+
+        CountingRule.calls = 0
+        result = rule._execute_records(series)
+        self.assertEqual(series.apply(lambda value: value in ('NSW', 'VIC')).tolist(), result.tolist())
+        self.assertEqual(bool, result.dtype)
+        # 3 strings, None, NaN and every number
+        self.assertEqual(3 + 2 + 1000, CountingRule.calls)
+
+        rule.memoize = False
+        CountingRule.calls = 0
+        self.assertEqual(result.tolist(), rule._execute_records(series).tolist())
+        self.assertEqual(len(series), CountingRule.calls)
+
+    def test_should_not_memoize_custom_rules_by_default(self):
+        class RecordRule(AttributeValidation):
+            def _execute(self, record, **kwargs):
+                CountingRule.calls += 1
+                return record in ('NSW', 'VIC')
+
+        series = pandas.Series(['NSW', 'VIC', 'QLD'] * 1000, dtype=object)
+        CountingRule.calls = 0
+        create_rule(RecordRule)._execute_records(series)
+        self.assertEqual(len(series), CountingRule.calls)
+        self.assertTrue(all(rule.memoize for rule in TestSeriesExecution.rules(self)))
+
+    def test_should_share_factorized_column(self):
+        df = pandas.DataFrame({'test_column_0': range(2000), 'test_column_1': [' m', 'f '] * 1000}, dtype=object)
+        transforms = validator_module.TransformCache(df)
+        codes, uniques = transforms.factorized('test_column_1', ['upper_case'])
+        self.assertEqual(['M', 'F'], uniques.tolist())
+        self.assertIs(codes, transforms.factorized('test_column_1', ('upper_case',))[0])
+
+        rules = [
+            create_rule(EnumAttributeValidation, ['M', 'F', ['case_sensitive']], pre_validation=['upper_case']),
+            create_rule(CountingRule),
+        ]
+        Validator(LogRecordFactory())(df, Schema(rules))
+        self.assertEqual(0, rules[0].failed_count())
+        self.assertEqual(2000, rules[1].failed_count())
+
+
+class TestDateSeries(TestCase):
+    values = [
+        '2019-01-31', '2019-1-1', '2019-01- 1', '2020-02-29', '2019-02-29', '2019-04-31', '0000-01-01', '31/01/2019',
+        '29/02/1900', '29/02/2000', '31-12-99', '2019-01-31x', '2019-01-31 23:59:59', '2019-01-31 23:59:60',
+        '2019-01-31 24:00:00', '20190131', '01-31', '02-29', 'Jan 31 2019', '\u0661\u0669/01/2019', 'abc', '2019',
+    ]
+    formats = [
+        [], ['%Y-%m-%d'], ['%d/%m/%y', '%Y%m%d'], ['%Y-%m-%d %H:%M:%S', '%m-%d'], ['%d-%m-%y', '%Y-%m-%d %H:%M:%S.%f'],
+        ['%b %d %Y', '%d/%m/%Y'], ['YYYY-MM-DD'], ['%Q', '%', '%Y'], ['%%%Y', '%d %m'],
+    ]
+
+    def test_should_match_per_record_execution(self):
+        series = pandas.Series(self.values, dtype=object)
+        for formats in self.formats:
+            expected = series.map(lambda value: is_date(value, formats)).tolist()
+            self.assertEqual(expected, is_date_series(series, formats).tolist(), formats)
+
+    def test_should_raise_like_per_record_execution(self):
+        series = pandas.Series(['31 01'], dtype=object)
+        self.assertRaises(re.error, is_date, '31 01', ['%d %d'])
+        self.assertRaises(re.error, is_date_series, series, ['%d %d'])
+
+    def test_should_build_patterns_per_locale(self):
+        import _strptime
+        series = pandas.Series(['2019-01-31'], dtype=object)
+        with mock.patch.object(_strptime, 'TimeRE', side_effect=_strptime.TimeRE) as time_re:
+            for time_locale in [('xx_XX', 'UTF-8'), ('xx_XX', 'UTF-8'), ('yy_YY', 'UTF-8')]:
+                with mock.patch('locale.getlocale', return_value=time_locale):
+                    self.assertEqual([True], is_date_series(series, ['%Y-%m-%d']).tolist())
+        self.assertEqual(2, time_re.call_count)
+
+
+class TestUniqueAttributeValidation(TestCase):
+    def create_df(self):
+        return pandas.DataFrame({
+            'test_column_0': [str(i) for i in range(12)],
+            'test_column_1': ['a', 'b', 'a', None, 'c', 'b', 'a', None, 'd', 'e', 'f', 'g'],
+            'test_column_2': ['x', 'x', 'y', 'x', 'x', 'x', 'x', 'x', 'x', 'x', 'x', 'x'],
+        }, dtype=object)
+
+    def test_should_fail_with_every_duplicated_key(self):
+        rule = create_rule(UniqueAttributeValidation)
+        self.assertFalse(rule._execute(self.create_df()))
+        self.assertEqual({'a': 3, 'b': 2}, rule.failed_info())
+
+        self.assertTrue(rule._execute(self.create_df().iloc[8:]))
+        self.assertEqual({}, rule.failed_info())
+
+    def test_should_check_composite_keys(self):
+        rule = create_rule(UniqueAttributeValidation, ['test_column_1', 'test_column_2'])
+        self.assertEqual(['test_column_1', 'test_column_2'], rule.required_columns())
+        self.assertFalse(rule._execute(self.create_df()))
+        self.assertEqual({('b', 'x'): 2, ('a', 'x'): 2}, rule.failed_info())
+
+        rule = create_rule(UniqueAttributeValidation, attribute='ALL')
+        self.assertEqual(['test_column_0'], rule.key_columns())
+        self.assertTrue(rule._execute(self.create_df()))
+
+    def test_should_spill_chunks_to_disk(self):
+        rule = create_rule(UniqueAttributeValidation, ['test_column_1', 'test_column_2'])
+        rule.max_keys = 2
+        df = self.create_df()
+        validator = ChunkedValidator(LogRecordFactory())
+        validator((df.iloc[start:start + 3] for start in range(0, len(df), 3)), Schema([rule]))
+
+        self.assertEqual(0, rule.passed_count())
+        self.assertEqual({('a', 'x'): 2, ('b', 'x'): 2}, rule.failed_info())
+
+    def test_should_count_keys_across_spilled_partitions(self):
+        df = pandas.DataFrame({'key': [str(i % 50) for i in range(1000)]})
+        counter = KeyCounter(max_keys=10, partitions=4)
+        for start in range(0, len(df), 64):
+            counter.add(count_keys(df.iloc[start:start + 64], ['key']))
+
+        self.assertTrue(counter.spilled())
+        self.assertEqual({str(i): 20 for i in range(50)}, counter.duplicates())
+        counter.close()
+        self.assertFalse(counter.spilled())
+
+
+class TestForeignKeyValidation(TestCase):
+    def setUp(self):
+        self.index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.index_dir)
+        self.reference = os.path.join(self.index_dir, 'tbl_account.csv')
+        self.write_reference('id,name\n1,a\n2,b\n3,c\n')
+
+    def write_reference(self, content, mode='w'):
+        with open(self.reference, mode, newline='') as f:
+            f.write(content)
+
+    def create_rule(self):
+        rule = create_rule(ForeignKeyValidation, [self.reference, 'id'], attribute='test_column_1')
+        rule.index_dir = self.index_dir
+        return rule
+
+    def create_df(self):
+        return pandas.DataFrame({
+            'test_column_0': ['1', '2', '3', '4', '5'],
+            'test_column_1': ['1', '4', None, '3', '4'],
+        }, dtype=object)
+
+    def test_should_report_keys_missing_from_reference(self):
+        rule = self.create_rule()
+        self.assertFalse(rule._execute(self.create_df()))
+        self.assertEqual({'4': 2}, rule.failed_info())
+        self.assertTrue(rule._execute(self.create_df().iloc[:4].drop(1)))
+
+    def test_should_validate_chunks(self):
+        rule = self.create_rule()
+        df = self.create_df()
+        ChunkedValidator(LogRecordFactory())((df.iloc[start:start + 2] for start in range(0, 5, 2)), Schema([rule]))
+        self.assertEqual({'4': 2}, rule.failed_info())
+        self.assertEqual(1, rule.failed_count())
+
+    def test_should_update_index_of_cached_schemas(self):
+        config_path = os.path.join(self.index_dir, 'schema.json')
+        with open(config_path, 'w') as f:
+            json.dump({'fields': ['test_column_1'], 'unique': ['test_column_0'], 'validations': {'check_foreign_key': {
+                'fields': ['test_column_1'], 'constraint': [self.reference, 'id'], 'message': '{} {}',
+                'tags': ['Attribute', 'Key'],
+            }}}, f)
+
+        cache = SchemaCache()
+        df = self.create_df().iloc[:4]
+        for expected in [{'4': 1}, {}]:
+            factory = SchemaFactory(cache)
+            factory.generate(GenericSchema, 'ACCOUNT', config_path)
+            rule = factory.schema().validations()[0]
+            ChunkedValidator(LogRecordFactory())(iter([df]), factory.schema())
+            self.assertEqual(expected, rule.failed_info())
+            self.write_reference('4,d\n', mode='a')
+        self.assertTrue(rule._execute(self.create_df()))
+
+    def test_should_reuse_and_update_index(self):
+        index = KeyIndex(self.reference, 'id', index_dir=self.index_dir)
+        self.assertEqual(3, index.update())
+        self.assertEqual(0, KeyIndex(self.reference, 'id', index_dir=self.index_dir).update())
+
+        self.write_reference('4,d\n', mode='a')
+        index = KeyIndex(self.reference, 'id', index_dir=self.index_dir)
+        self.assertEqual(1, index.update())
+        self.assertEqual(4, index.meta()['records'])
+        self.assertEqual([True, True, False], index.contains(count_hashes(['4', '1', '5'])).tolist())
+
+        self.write_reference('id,name\n5,e\n')
+        self.assertEqual(1, index.update())
+        self.assertEqual([False, False, True], index.contains(count_hashes(['4', '1', '5'])).tolist())
+
+
+class TestCompiledPatterns(TestCase):
+    def test_should_combine_patterns(self):
+        compiled = compile_patterns(['^[a-z]+$', '^[0-9]+$'])
+        self.assertEqual(1, len(compiled))
+        self.assertTrue(compiled[0].match('abc'))
+        self.assertTrue(compiled[0].match('123'))
+        self.assertFalse(compiled[0].match('abc123'))
+
+    def test_should_not_combine_back_references(self):
+        compiled = compile_patterns(['^(a)b$', '^(c)\\1$'])
+        self.assertEqual(2, len(compiled))
+        self.assertTrue(any(regex.match('cc') for regex in compiled))
+
+    def test_should_share_compiled_patterns(self):
+        rule_1 = create_rule(RegexAttributeValidation, ['^[a-z]+$', '^[0-9]+$'])
+        rule_2 = create_rule(RegexAttributeValidation, ['^[a-z]+$', '^[0-9]+$'], attribute='test_column_2')
+        rule_1.compile()
+        rule_2.compile()
+        self.assertIs(rule_1.regex(), rule_2.regex())
+        self.assertIs(create_rule(EmailValidation).regex(), create_rule(EmailValidation).regex())
+
+    def test_should_set_built_in_patterns_once(self):
+        rule = create_rule(PhoneValidation, ['ignored'])
+        self.assertEqual(rule.patterns, rule.constraint)
+
+    def test_should_defer_invalid_patterns_to_execution(self):
+        rule = create_rule(RegexAttributeValidation, None)
+        rule.compile()
+        self.assertRaises(TypeError, rule._execute, 'abc')
+
+
+class TestValidator(TestCase):
+    def test_should_validate_with_series_and_custom_rules(self):
+        df = pandas.DataFrame({
+            'test_column_0': ['1', '2', '3'],
+            'test_column_1': ['abc', 'custom', '12'],
+        }, dtype=object)
+        regex_rule = create_rule(RegexAttributeValidation, ['^[a-z]+$'])
+        custom_rule = create_rule(CustomRule)
+
+        schema, logs = Validator(LogRecordFactory())(df, Schema([regex_rule, custom_rule]))
+
+        self.assertEqual(['1', '2'], regex_rule.passed_objects()['test_column_0'].tolist())
+        self.assertEqual(['3'], regex_rule.failed_objects()['test_column_0'].tolist())
+        self.assertEqual(['2'], custom_rule.passed_objects()['test_column_0'].tolist())
+        self.assertEqual(['1', '3'], custom_rule.failed_objects()['test_column_0'].tolist())
+
+    def test_should_keep_failures_as_positions(self):
+        df = pandas.DataFrame({
+            'test_column_0': ['1', '2', '3', '4'],
+            'test_column_1': ['abc', '12', 'xyz', '3'],
+        }, dtype=object)
+        rule = create_rule(RegexAttributeValidation, ['^[a-z]+$'])
+        Validator(LogRecordFactory())(df, Schema([rule]))
+
+        self.assertEqual([1, 3], rule._failed_positions.tolist())
+        self.assertEqual((2, 2), (rule.passed_count(), rule.failed_count()))
+        self.assertTrue(numpy.shares_memory(df['test_column_1'].values, rule._result['test_column_1'].values))
+        self.assertEqual(['2', '4'], rule.failed_objects()['test_column_0'].tolist())
+        self.assertEqual(['4'], rule.failed_objects(numpy.array([1]))['test_column_0'].tolist())
+        self.assertEqual([False], rule.failed_objects([1])[rule.name()].tolist())
+
+
+class TestParallelValidator(TestCase):
+    def create_df(self):
+        return pandas.DataFrame({
+            'test_column_0': [str(i) for i in range(40)],
+            'test_column_1': ['abc', 'custom', '12', ' x '] * 10,
+            'test_column_2': ['m', 'F', 'f', 'x'] * 10,
+        }, dtype=object)
+
+    def create_rules(self):
+        return [
+            create_rule(FileNameValidation, ['^tbl_.*$'], attribute='FILE'),
+            create_rule(RegexAttributeValidation, ['^[a-z]+$']),
+            create_rule(CustomRule),
+            create_rule(EnumAttributeValidation, ['m', 'f'], attribute='test_column_2', pre_validation=['lower_case']),
+            create_rule(EnumAttributeValidation, ['M'], attribute='test_column_2', pre_validation=['upper_case']),
+            create_rule(AttributeLengthValidation, [1, 3]),
+        ]
+
+    def run_validator(self, **kwargs):
+        rules = self.create_rules() + [create_rule(UndecidedRule)]
+        df = self.create_df()
+        schema, logs = Validator(LogRecordFactory(), **kwargs)(
+            df, Schema(rules, ['test_column_0', 'test_column_1', 'test_column_2']), file_path='tbl_account.csv')
+        results = [
+            (rule.passed_objects().to_dict(), rule.failed_objects().to_dict(), rule.failed_info()) for rule in rules
+        ]
+        return results, logs.serialize(), df.to_dict()
+
+    def test_should_match_serial_run(self):
+        expected = self.run_validator()
+        self.assertEqual(expected, self.run_validator(workers=3, backend=THREAD))
+        self.assertEqual(expected, self.run_validator(workers=3, backend=PROCESS))
+
+    def test_should_send_back_results_without_columns(self):
+        rules = self.create_rules() + [create_rule(UndecidedRule)]
+        plan = ExecutionPlan(rules)
+        context = (Validator(LogRecordFactory()), validator_module.TransformCache(self.create_df()), plan, {})
+        outcomes = [outcome for index in range(len(plan.tasks)) for outcome in validator_module._validate_task_state(
+            context, index)]
+
+        self.assertEqual(len(rules), len(outcomes))
+        for index, state, log in outcomes:
+            self.assertFalse(set(state) - {'_failed_positions', '_passed_count', '_failed_count', '_failed_info',
+                                           '_passed_positions'}, rules[index].name())
+        states = {index: state for index, state, log in outcomes}
+        self.assertEqual([1, 5, 9, 13], states[len(rules) - 1]['_passed_positions'][:4].tolist())
+
+    def test_should_reject_unknown_backend(self):
+        self.assertRaises(ValueError, self.run_validator, workers=2, backend='gpu')
+
+    def test_should_keep_context_of_overlapping_maps(self):
+        executor = Executor(2, PROCESS)
+        second = []
+
+        def items():
+            # runs once the pool of the first map exists, before its workers are forked
+            second.extend(executor.map(add_context, ['1', '2'], 'b'))
+            yield '1'
+            yield '2'
+
+        self.assertEqual(['a1', 'a2'], executor.map(add_context, items(), 'a'))
+        self.assertEqual(['b1', 'b2'], second)
+
+
+class TestExecutionPlan(TestCase):
+    create_df = TestParallelValidator.create_df
+    create_rules = TestParallelValidator.create_rules
+
+    def test_should_group_rules_by_column_and_chain(self):
+        rules = self.create_rules() + [
+            create_rule(EnumAttributeValidation, ['m'], attribute='test_column_2', pre_validation='lower_case'),
+        ]
+        plan = ExecutionPlan(rules)
+        self.assertEqual(['FILE', 'test_column_1', 'test_column_2'], [task.attribute for task in plan.tasks])
+        self.assertEqual(
+            [[((), [0])], [((), [1, 2, 5])], [(('lower_case',), [3, 6]), (('upper_case',), [4])]],
+            [[(chain, step.rules) for chain, step in task.steps.items()] for task in plan.tasks])
+
+        planned, unplanned = plan.cost()
+        self.assertLess(planned, unplanned)
+        with mock.patch('builtins.print'):
+            text = plan.explain(records_count=10)
+        self.assertTrue(text.startswith('Execution plan: 3 tasks, 7 rules'))
+        self.assertTrue('({} without the plan)'.format(unplanned * 10) in text)
+
+    def test_should_apply_each_chain_once_without_mutating_input(self):
+        rules = self.create_rules() + [
+            create_rule(EnumAttributeValidation, ['m'], attribute='test_column_2', pre_validation=['lower_case']),
+        ]
+        df = self.create_df()
+        transform_column = validator_module.transform_column
+        with mock.patch.object(validator_module, 'transform_column', wraps=transform_column) as correct:
+            Validator(LogRecordFactory())(df, Schema(rules), file_path='tbl_account.csv')
+
+        self.assertEqual(2, correct.call_count)
+        self.assertEqual(self.create_df().to_dict(), df.to_dict())
+        self.assertEqual(10, rules[6].passed_count())
+        # results hold the values as corrected for the rule
+        self.assertEqual(['m', 'f', 'f'] * 10, rules[3].passed_objects()['test_column_2'].tolist())
+
+    def test_should_apply_own_pre_validation_only(self):
+        rules = [
+            create_rule(EnumAttributeValidation, ['M'], attribute='test_column_2', pre_validation=['upper_case']),
+            create_rule(EnumAttributeValidation, ['m'], attribute='test_column_2'),
+        ]
+        Validator(LogRecordFactory())(self.create_df(), Schema(rules))
+        self.assertEqual(10, rules[0].passed_count())
+        self.assertEqual(10, rules[1].passed_count())
+
+
+class TestTransformCache(TestCase):
+    values = ['abc', ' Abc ', 'ß', 'İx', '', None, numpy.nan, 12, 1.5]
+
+    def test_should_match_per_record_transforms(self):
+        series = pandas.Series(self.values, dtype=object)
+        arrow_series = pandas.Series(['abc', ' Abc ', None], dtype=string_dtype() or object)
+        for action in [upper_case, lower_case, remove_space]:
+            series_func = validator_module.SERIES_TRANSFORMS[action.__name__]
+            for values in [series, series[:2], arrow_series]:
+                self.assertEqual(values.apply(action).tolist(), series_func(values).tolist(), action.__name__)
+
+    def test_should_cache_read_only_columns(self):
+        df = pandas.DataFrame({'test_column_1': [' a ', 'b']}, dtype=object)
+        transforms = validator_module.TransformCache(df)
+        column = transforms.column('test_column_1', ['remove_space', 'upper_case'])
+        self.assertEqual(['A', 'B'], column.tolist())
+        self.assertIs(column, transforms.column('test_column_1', ('remove_space', 'upper_case')))
+        self.assertEqual(['a', 'b'], transforms.column('test_column_1', 'remove_space').tolist())
+        self.assertEqual([' a ', 'b'], transforms.column('test_column_1', []).tolist())
+        self.assertEqual([' a ', 'b'], df['test_column_1'].tolist())
+
+        with self.assertRaises(ValueError):
+            column.values[0] = 'changed'
+
+
+class TestChunkedValidator(TestCase):
+    create_df = TestParallelValidator.create_df
+
+    def create_rules(self):
+        return TestParallelValidator.create_rules(self) + [
+            create_rule(UniqueAttributeValidation, attribute='test_column_1'),
+            create_rule(HeaderValidation, ['test_column_0', 'test_column_3'], attribute='FILE'),
+        ]
+
+    def run_chunked(self, chunk_size, **kwargs):
+        rules = self.create_rules()
+        df = self.create_df()
+        chunks = (df.iloc[start:start + chunk_size].copy() for start in range(0, len(df), chunk_size))
+        validator = ChunkedValidator(LogRecordFactory(), **kwargs)
+        schema, logs = validator(
+            chunks, Schema(rules, ['test_column_0', 'test_column_1', 'test_column_2']), file_path='tbl_account.csv')
+        self.assertEqual(len(df), validator.records_count())
+        return [(rule.passed_count(), rule.failed_objects().to_dict(), rule.failed_info()) for rule in rules]
+
+    def test_should_match_whole_file_run(self):
+        rules = self.create_rules()
+        Validator(LogRecordFactory())(
+            self.create_df(), Schema(rules, ['test_column_0', 'test_column_1', 'test_column_2']),
+            file_path='tbl_account.csv')
+        expected = [(rule.passed_count(), rule.failed_objects().to_dict(), rule.failed_info()) for rule in rules]
+
+        self.assertEqual(expected, self.run_chunked(7))
+        self.assertEqual(expected, self.run_chunked(7, workers=3, backend=THREAD))
+        self.assertEqual(expected, self.run_chunked(7, workers=3, backend=PROCESS))
+
+    def test_should_validate_chunks_from_reader(self):
+        rule = create_rule(RegexAttributeValidation, ['^[0-9]+$'])
+        rule.unique_key = ['test_column_2']
+        has_read, logs, chunks = CSVFileReader().validate_and_read(self.path('tbl_account.csv'), 'csv', chunksize=3)
+        self.assertTrue(has_read)
+
+        validator = ChunkedValidator(logs)
+        validator(chunks, Schema([rule], ['test_column_1', 'test_column_2']))
+        self.assertEqual(4, validator.records_count())
+        self.assertEqual(2, rule.passed_count())
+        self.assertEqual(['test1', '12/01/1989'], rule.failed_objects()['test_column_1'].tolist())
+
+
+class TestStopPolicies(TestCase):
+    def create_df(self):
+        return pandas.DataFrame({
+            'test_column_0': [str(i) for i in range(8)],
+            'test_column_1': ['abc', 'def', 'ghi', '12', 'jkl', '34', 'mno', 'pqr'],
+        }, dtype=object)
+
+    def create_rules(self):
+        rules = [
+            create_rule(RegexAttributeValidation, ['^[a-z]+$']),
+            create_rule(RegexAttributeValidation, ['^[a-c]+$']),
+            create_rule(FileNameValidation, ['^tbl_.*$'], attribute='FILE'),
+        ]
+        rules[1].validate_key = 'abc_only'
+        return rules
+
+    def skipped(self, rules, logs):
+        names = [rule.name() for rule in rules if rule.skipped]
+        for name in names:
+            self.assertEqual([ValidatorMessages.RULE_SKIPPED], [log.get_message() for log in logs.get_records()[name]])
+        return [rules.index(rule) for rule in rules if rule.skipped]
+
+    def test_should_stop_at_first_failing_rule(self):
+        rules = self.create_rules()
+        schema, logs = Validator(LogRecordFactory(), fail_fast=True)(
+            self.create_df(), Schema(rules), file_path='tbl_account.csv')
+        self.assertEqual([1], self.skipped(rules, logs))
+        self.assertEqual((0, 2), (rules[2].failed_count(), rules[0].failed_count()))
+        self.assertEqual((0, 0), (rules[1].passed_count(), rules[1].failed_count()))
+
+    def test_should_run_file_rules_first(self):
+        rules = self.create_rules()
+        schema, logs = Validator(LogRecordFactory(), stop_after_fatal_file_rule=True)(
+            self.create_df(), Schema(rules), file_path='account.csv')
+        self.assertEqual([0, 1], self.skipped(rules, logs))
+        self.assertEqual(1, rules[2].failed_count())
+
+    def test_should_stop_after_max_failures(self):
+        rules = self.create_rules()
+        Validator(LogRecordFactory(), max_failures=3)(self.create_df(), Schema(rules), file_path='tbl_account.csv')
+        self.assertEqual([], [rule for rule in rules if rule.skipped])
+
+        rules = self.create_rules()
+        schema, logs = Validator(LogRecordFactory(), max_failures=2)(
+            self.create_df(), Schema(rules), file_path='tbl_account.csv')
+        self.assertEqual([1], self.skipped(rules, logs))
+
+    def test_should_stop_at_first_failing_chunk(self):
+        df = self.create_df()
+        read = []
+
+        def chunks():
+            for start in range(0, len(df), 2):
+                read.append(start)
+                yield df.iloc[start:start + 2]
+
+        rules = self.create_rules()
+        validator = ChunkedValidator(LogRecordFactory(), fail_fast=True)
+        schema, logs = validator(chunks(), Schema(rules), file_path='tbl_account.csv')
+        self.assertEqual(2, validator.records_count())
+        self.assertEqual([0], read)
+        self.assertEqual(1, rules[1].failed_count())
+        self.assertEqual(
+            [ValidatorMessages.VALIDATION_STOPPED.format(2, 'fail fast')],
+            [log.get_message() for log in logs.get_records()['ChunkedValidator']])
+
+        rules = self.create_rules()
+        validator = ChunkedValidator(LogRecordFactory(), workers=2, max_failures=4)
+        validator(chunks(), Schema(rules), file_path='tbl_account.csv')
+        self.assertEqual(4, validator.records_count())
+        self.assertEqual((1, 3), (rules[0].failed_count(), rules[1].failed_count()))
+
+
+class TestIncrementalValidator(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.directory, 'tbl_account.csv')
+        self.lines = ['{},{},{}\n'.format(i, 'abc' if i % 7 else '12', i % 40) for i in range(100)]
+        self.write(self.lines)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, lines):
+        with open(self.file_path, 'w') as f:
+            f.write('test_column_0,test_column_1,test_column_2\n')
+            f.writelines(lines)
+
+    def create_rules(self, pattern='^[a-z]+$'):
+        rules = [
+            create_rule(RegexAttributeValidation, [pattern]),
+            create_rule(UniqueAttributeValidation, attribute='test_column_2'),
+            create_rule(HeaderValidation, ['test_column_0', 'test_column_1'], attribute='FILE'),
+        ]
+        rules[0].unique_key = rules[1].unique_key = ['test_column_0']
+        return rules
+
+    def results(self, rules):
+        return [(rule.passed_count(), rule.failed_objects().to_dict(), rule.failed_info()) for rule in rules]
+
+    def run_incremental(self, rules=None, read_options=None, **kwargs):
+        rules = rules or self.create_rules()
+        validator = IncrementalValidator(
+            LogRecordFactory(), state_dir=os.path.join(self.directory, 'state'), block_size=200,
+            read_options=read_options or {'dtype': str}, **kwargs)
+        validator(self.file_path, Schema(rules, ['test_column_0', 'test_column_1', 'test_column_2']),
+                  file_path=self.file_path)
+        return validator, self.results(rules)
+
+    def expected(self):
+        rules = self.create_rules()
+        df = pandas.read_csv(self.file_path, dtype=str)
+        Validator(LogRecordFactory())(
+            df, Schema(rules, ['test_column_0', 'test_column_1', 'test_column_2']), file_path=self.file_path)
+        return self.results(rules)
+
+    def test_should_match_whole_file_run(self):
+        validator, results = self.run_incremental()
+        self.assertEqual(5, validator.validated_blocks())
+        self.assertEqual(100, validator.records_count())
+        self.assertEqual(self.expected(), results)
+
+        validator, results = self.run_incremental(workers=2)
+        self.assertEqual(0, validator.validated_blocks())
+        self.assertEqual(100, validator.records_count())
+        self.assertEqual(self.expected(), results)
+
+    def test_should_validate_appended_blocks_only(self):
+        self.run_incremental()
+        self.lines += ['{},{},{}\n'.format(i, 'xyz' if i % 5 else '34', i) for i in range(100, 110)]
+        self.write(self.lines)
+
+        validator, results = self.run_incremental()
+        self.assertEqual(1, validator.validated_blocks())
+        self.assertEqual(110, validator.records_count())
+        self.assertEqual(self.expected(), results)
+
+    def test_should_validate_changed_blocks_only(self):
+        validator, _ = self.run_incremental()
+        blocks = validator.validated_blocks()
+        self.lines[50] = '50,12,10\n'
+        self.lines[10] = '10,abcd,10\n'
+        self.write(self.lines)
+
+        validator, results = self.run_incremental()
+        self.assertLess(validator.validated_blocks(), blocks)
+        self.assertEqual(self.expected(), results)
+
+    def test_should_drop_state_of_changed_schema(self):
+        validator, _ = self.run_incremental()
+        blocks = validator.validated_blocks()
+        validator, results = self.run_incremental(self.create_rules('^[a-b]+$'))
+        self.assertEqual(blocks, validator.validated_blocks())
+        self.assertEqual((0, 100), (results[0][0], len(results[0][1]['test_column_0'])))
+
+    def test_should_read_values_as_strings_by_default(self):
+        def create_rules():
+            return [create_rule(RegexAttributeValidation, ['^[0-9]$'], attribute='test_column_2')]
+
+        rules = create_rules()
+        chunks = pandas.read_csv(self.file_path, dtype=object, chunksize=30)
+        ChunkedValidator(LogRecordFactory())(
+            chunks, Schema(rules, ['test_column_0', 'test_column_1', 'test_column_2']), file_path=self.file_path)
+        expected = self.results(rules)
+        self.assertEqual((30, 70), (rules[0].passed_count(), rules[0].failed_count()))
+
+        rules = create_rules()
+        validator = IncrementalValidator(
+            LogRecordFactory(), state_dir=os.path.join(self.directory, 'state'), block_size=200)
+        validator(self.file_path, Schema(rules, ['test_column_0', 'test_column_1', 'test_column_2']),
+                  file_path=self.file_path)
+        self.assertEqual(expected, self.results(rules))
+
+    def test_should_not_reuse_block_without_final_line_break(self):
+        self.lines[-1] = '99,abc,2'
+        self.write(self.lines)
+        self.run_incremental()
+
+        with open(self.file_path, 'a') as f:
+            f.write('3\n100,12,5\n')
+        validator, results = self.run_incremental()
+        self.assertEqual(101, validator.records_count())
+        self.assertEqual(self.expected(), results)